@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""compare encoding time and output size of the json encoder backends available for the descriptions writer"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from collections import OrderedDict
+
+from genedescriptions.gene_description import GeneDescription
+from genedescriptions.json_encoding import dump_json, get_available_json_encoder_backends
+from genedescriptions.stats import DescriptionsOverallProperties, DescriptionsStats
+
+
+def generate_gene_descriptions(num_genes: int, seed: int = 0):
+    """generate synthetic gene descriptions with stats similar to the ones produced by the pipeline
+
+    Args:
+        num_genes (int): the number of gene descriptions to generate
+        seed (int): seed for the random generator
+
+    Returns:
+        List[GeneDescription]: the generated gene descriptions
+    """
+    rand = random.Random(seed)
+    gene_descs = []
+    for i in range(num_genes):
+        gene_desc = GeneDescription(gene_id="WB:WBGene" + str(i).zfill(8), gene_name="gene-" + str(i))
+        for aspect in ["f", "p", "c"]:
+            num_initial_terms = rand.randint(0, 20)
+            setattr(gene_desc.stats, "num_initial_go_ids_" + aspect, num_initial_terms)
+            setattr(gene_desc.stats, "num_initial_experimental_go_ids_" + aspect, num_initial_terms // 2)
+            setattr(gene_desc.stats, "set_final_go_ids_" + aspect, ["GO:" + str(rand.randint(0, 99999)).zfill(7)
+                                                                    for _ in range(min(num_initial_terms, 3))])
+        if rand.random() < 0.8:
+            gene_desc.go_function_description = "Exhibits protein kinase activity and ATP binding activity"
+            gene_desc.go_process_description = "involved in several processes, including embryo development " \
+                                               "ending in birth or egg hatching and locomotion"
+            gene_desc.go_description = gene_desc.go_function_description + "; " + gene_desc.go_process_description
+            gene_desc.description = gene_desc.go_description + "."
+            gene_desc.stats.total_number_go_annotations = rand.randint(1, 50)
+            gene_desc.stats.average_terms_level = rand.random() * 10
+            gene_desc.stats.coverage_percentage = rand.random()
+        if rand.random() < 0.3:
+            gene_desc.orthology_description = "Is an ortholog of human BRCA1 (BRCA1 DNA repair associated)"
+            gene_desc.stats.set_best_orthologs = ["HGNC:1100"]
+        gene_desc.paper_evidences = ["WBPaper" + str(rand.randint(0, 99999)).zfill(8) for _ in range(5)]
+        gene_descs.append(gene_desc)
+    return gene_descs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark json encoders for gene descriptions output")
+    parser.add_argument("-n", "--num-genes", dest="num_genes", type=int, default=20000,
+                        help="number of synthetic gene descriptions to encode. Default 20000")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=3,
+                        help="number of repetitions for each encoder. The best time is reported. Default 3")
+    args = parser.parse_args()
+    gene_descs = generate_gene_descriptions(args.num_genes)
+    for gene_desc in gene_descs:
+        gene_desc.stats.calculate_stats()
+    general_stats = DescriptionsStats()
+    general_stats.calculate_stats(gene_descriptions=gene_descs)
+    json_dict = OrderedDict([("overall_properties", vars(DescriptionsOverallProperties(species="synthetic"))),
+                             ("general_stats", general_stats.to_dict()),
+                             ("data", [gene_desc.to_dict(include_stats=True) for gene_desc in gene_descs])])
+    print("{:<8} {:<8} {:>10} {:>14}".format("encoder", "format", "time (s)", "size (bytes)"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for backend in get_available_json_encoder_backends():
+            for pretty in [True, False]:
+                file_path = os.path.join(out_dir, backend.value + ("_pretty" if pretty else "_compact") + ".json")
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    with open(file_path, "w", encoding="utf-8") as outfile:
+                        dump_json(json_dict, outfile, indent=4 if pretty else None, backend=backend)
+                    times.append(time.perf_counter() - start)
+                print("{:<8} {:<8} {:>10.3f} {:>14}".format(backend.value, "pretty" if pretty else "compact",
+                                                            min(times), os.path.getsize(file_path)))
+
+
+if __name__ == '__main__':
+    main()
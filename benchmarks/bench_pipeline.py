@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+"""time the main steps of the generation of gene descriptions on synthetic data or on larger versions of the test
+fixtures, and save the results as json to track performance across commits"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Any, Callable, Dict, List
+
+from ontobio.ontol_factory import OntologyFactory
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir))
+
+from genedescriptions.commons import DataType, Gene, Module
+from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
+from genedescriptions.data_manager import DataManager
+from genedescriptions.descriptions_generator import OntologySentenceGenerator
+from genedescriptions.descriptions_writer import DescriptionsWriter, StreamingDescriptionsWriter
+from genedescriptions.gene_description import GeneDescription
+from genedescriptions.ontology_tools import get_best_nodes, set_all_information_content_values
+from genedescriptions.precanned_modules import set_gene_ontology_module
+from genedescriptions.stats import DescriptionsStats
+
+from synthetic_data import generate_gaf, generate_obograph_ontology, scale_gaf
+
+# version of the results format. Increase it whenever the structure of the results or the measured code changes
+RESULTS_VERSION = 2
+
+BENCHMARKS = ["load_ontology", "load_associations", "get_annotations", "information_content", "trimming_naive",
+              "trimming_ic", "trimming_lca", "get_module_sentences", "set_gene_ontology_module", "write_files",
+              "write_streaming", "stats"]
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir, "tests")
+
+
+def get_commit() -> str:
+    """get the current git commit of the repository, if available
+
+    Returns:
+        str: the commit hash, or None if it cannot be read
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_function(func: Callable[[], Any], repeat: int, setup: Callable[[], Any] = None) -> List[float]:
+    """time a function multiple times
+
+    Args:
+        func (Callable[[], Any]): the function to time. If a setup function is provided, its result is passed to func
+        repeat (int): the number of repetitions
+        setup (Callable[[], Any]): function called before each repetition, not included in the time
+
+    Returns:
+        List[float]: the time of each repetition, in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        setup_result = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            func(setup_result)
+        else:
+            func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def prepare_data(args, data_dir: str) -> Dict[str, Any]:
+    """write the ontology and the annotations to benchmark
+
+    Args:
+        args: the command line arguments
+        data_dir (str): directory where to write the data
+
+    Returns:
+        Dict[str, Any]: paths to the ontology and GAF files and ids of the annotated genes
+    """
+    gaf_path = os.path.join(data_dir, "go.gaf")
+    if args.fixtures:
+        ontology_path = os.path.join(TEST_DIR, "data", "go_gd_test.obo")
+        gene_ids = scale_gaf(os.path.join(TEST_DIR, "data", "gene_association_1.7.wb.partial"), gaf_path,
+                             args.scale, term_ids=set(OntologyFactory().create(ontology_path).nodes()))
+    else:
+        ontology_path = os.path.join(data_dir, "go.json")
+        terms_by_aspect = generate_obograph_ontology(ontology_path, num_terms=args.num_terms, seed=args.seed)
+        gene_ids = generate_gaf(gaf_path, terms_by_aspect, num_genes=args.num_genes,
+                                annotations_per_gene=args.annotations_per_gene,
+                                heavily_annotated_perc=args.heavily_annotated_perc, seed=args.seed)
+    return {"ontology_path": ontology_path, "gaf_path": gaf_path, "gene_ids": gene_ids}
+
+
+def run_benchmarks(args, conf_parser: GenedescConfigParser, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """run the selected benchmarks
+
+    Args:
+        args: the command line arguments
+        conf_parser (GenedescConfigParser): the configuration object
+        data (Dict[str, Any]): the data to benchmark, as returned by prepare_data
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the times of each benchmark, with the number of items processed in each repetition
+    """
+    results = {}
+    genes = [Gene(gene_id, gene_id, False, False) for gene_id in data["gene_ids"]]
+
+    def new_data_manager():
+        return DataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"], use_cache=True)
+
+    def load_ontology(dm: DataManager):
+        dm.load_ontology_from_file(ontology_type=DataType.GO, ontology_url="file://" + data["ontology_path"],
+                                   ontology_cache_path=data["ontology_path"], config=conf_parser)
+
+    def load_associations(dm: DataManager):
+        dm.load_associations_from_file(associations_type=DataType.GO, associations_url="file://" + data["gaf_path"],
+                                       associations_cache_path=data["gaf_path"], config=conf_parser)
+
+    def add_result(name: str, times: List[float], num_items: int):
+        results[name] = {"times": times, "min": min(times), "median": statistics.median(times),
+                         "num_items": num_items}
+        print("{:<26} {:>10.3f} {:>10.3f} {:>10}".format(name, min(times), statistics.median(times), num_items))
+
+    print("{:<26} {:>10} {:>10} {:>10}".format("benchmark", "min (s)", "median (s)", "items"))
+    dm = new_data_manager()
+    load_ontology(dm)
+    if "load_ontology" in args.benchmarks:
+        add_result("load_ontology", time_function(load_ontology, args.repeat, setup=new_data_manager),
+                   len(dm.go_ontology.nodes()))
+    load_associations(dm)
+    if "load_associations" in args.benchmarks:
+        add_result("load_associations", time_function(load_associations, args.repeat, setup=lambda: dm),
+                   len(dm.go_associations.associations_by_subj))
+    priority_list = conf_parser.get_annotations_priority(module=Module.GO)
+    annotations = {gene.id: dm.get_annotations_for_gene(gene_id=gene.id, annot_type=DataType.GO,
+                                                        priority_list=priority_list) for gene in genes}
+    if "get_annotations" in args.benchmarks:
+        add_result("get_annotations", time_function(lambda: [dm.get_annotations_for_gene(
+            gene_id=gene.id, annot_type=DataType.GO, priority_list=priority_list) for gene in genes], args.repeat),
+                   len(genes))
+    if "information_content" in args.benchmarks:
+        add_result("information_content", time_function(
+            lambda ontology: set_all_information_content_values(ontology=ontology), args.repeat,
+            setup=lambda: OntologyFactory().create(data["ontology_path"]).subontology(
+                relations=["subClassOf", "BFO:0000050"])), len(dm.go_ontology.nodes()))
+    set_all_information_content_values(ontology=dm.go_ontology)
+    max_terms = conf_parser.get_module_property(module=Module.GO, prop=ConfigModuleProperty.MAX_NUM_TERMS_IN_SENTENCE)
+    dist_root = conf_parser.get_module_property(module=Module.GO, prop=ConfigModuleProperty.DISTANCE_FROM_ROOT)
+    slim_bonus_perc = conf_parser.get_module_property(module=Module.GO, prop=ConfigModuleProperty.SLIM_BONUS_PERC)
+    terms_to_trim = []
+    for gene_annotations in annotations.values():
+        for aspect in ["F", "P", "C"]:
+            terms = {annotation["object"]["id"] for annotation in gene_annotations if annotation["aspect"] == aspect}
+            if len(terms) > max_terms:
+                terms_to_trim.append((aspect, terms))
+    if not terms_to_trim and any(benchmark.startswith("trimming_") for benchmark in args.benchmarks):
+        print("Warning: no gene has more than " + str(max_terms) + " terms in an aspect, trimming benchmarks do not "
+              "trim any term", file=sys.stderr)
+    for trimming_algorithm in ["naive", "ic", "lca"]:
+        if "trimming_" + trimming_algorithm in args.benchmarks:
+            add_result("trimming_" + trimming_algorithm, time_function(lambda: [get_best_nodes(
+                terms, trimming_algorithm, max_terms, dm.go_ontology, set(), slim_bonus_perc=slim_bonus_perc,
+                min_dist_from_root=dist_root[aspect] if dist_root else 0, slim_set=dm.get_slim(Module.GO)) for
+                aspect, terms in terms_to_trim], args.repeat), len(terms_to_trim))
+    if "get_module_sentences" in args.benchmarks:
+        add_result("get_module_sentences", time_function(lambda: [OntologySentenceGenerator(
+            gene_id=gene.id, module=Module.GO, data_manager=dm, config=conf_parser).get_module_sentences(
+            config=conf_parser, aspect="P", merge_groups_with_same_prefix=True, keep_only_best_group=True) for gene in
+            genes], args.repeat), len(genes))
+    gene_descs = []
+
+    def set_gene_ontology_modules():
+        gene_descs.clear()
+        for gene in genes:
+            gene_desc = GeneDescription(gene_id=gene.id, gene_name=gene.name)
+            set_gene_ontology_module(dm=dm, conf_parser=conf_parser, gene_desc=gene_desc, gene=gene)
+            gene_descs.append(gene_desc)
+
+    times = time_function(set_gene_ontology_modules, args.repeat if "set_gene_ontology_module" in args.benchmarks
+                          else 1)
+    if "set_gene_ontology_module" in args.benchmarks:
+        add_result("set_gene_ontology_module", times, len(genes))
+    with tempfile.TemporaryDirectory() as out_dir:
+        if "write_files" in args.benchmarks:
+            def write_files():
+                desc_writer = DescriptionsWriter()
+                for gene_desc in gene_descs:
+                    desc_writer.add_gene_desc(gene_desc)
+                desc_writer.write_json(os.path.join(out_dir, "descriptions.json"), pretty=True,
+                                       include_single_gene_stats=True, data_manager=dm)
+                desc_writer.write_plain_text(os.path.join(out_dir, "descriptions.txt"))
+                desc_writer.write_tsv(os.path.join(out_dir, "descriptions.tsv"))
+            add_result("write_files", time_function(write_files, args.repeat), len(gene_descs))
+        if "write_streaming" in args.benchmarks:
+            def write_streaming():
+                desc_writer = StreamingDescriptionsWriter()
+                desc_writer.open_output_files(json_file_path=os.path.join(out_dir, "streamed.json"),
+                                              plain_text_file_path=os.path.join(out_dir, "streamed.txt"),
+                                              tsv_file_path=os.path.join(out_dir, "streamed.tsv"),
+                                              ace_file_path=os.path.join(out_dir, "streamed.ace"),
+                                              curators_list=["WBPerson324"], release_version="WS000", pretty=True,
+                                              include_single_gene_stats=True, data_manager=dm)
+                with desc_writer:
+                    for gene_desc in gene_descs:
+                        desc_writer.add_gene_desc(gene_desc)
+            add_result("write_streaming", time_function(write_streaming, args.repeat), len(gene_descs))
+    if "stats" in args.benchmarks:
+        def calculate_stats():
+            for gene_desc in gene_descs:
+                gene_desc.stats.calculate_stats(data_manager=dm)
+            DescriptionsStats().calculate_stats(gene_descriptions=gene_descs)
+        add_result("stats", time_function(calculate_stats, args.repeat), len(gene_descs))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generation of gene descriptions")
+    parser.add_argument("-c", "--config-file", metavar="config_file", dest="config_file", type=str,
+                        default=os.path.join(TEST_DIR, "config_test.yml"),
+                        help="configuration file. Default tests/config_test.yml")
+    parser.add_argument("-t", "--num-terms", dest="num_terms", type=int, default=5000,
+                        help="number of terms of the synthetic ontology. Default 5000")
+    parser.add_argument("-n", "--num-genes", dest="num_genes", type=int, default=1000,
+                        help="number of genes of the synthetic annotations. Default 1000")
+    parser.add_argument("-a", "--annotations-per-gene", dest="annotations_per_gene", type=int, default=10,
+                        help="average number of annotations per gene of the synthetic annotations, excluding heavily "
+                             "annotated genes. Default 10")
+    parser.add_argument("-H", "--heavily-annotated-perc", dest="heavily_annotated_perc", type=float, default=0.1,
+                        help="fraction of the synthetic genes with enough annotations in each aspect to be trimmed. "
+                             "Default 0.1")
+    parser.add_argument("-f", "--fixtures", dest="fixtures", action="store_true", default=False,
+                        help="use the GO ontology and the WormBase annotations of the test fixtures instead of "
+                             "synthetic data")
+    parser.add_argument("-s", "--scale", dest="scale", type=int, default=10,
+                        help="with --fixtures, number of copies of the annotations of each gene. Default 10")
+    parser.add_argument("-S", "--seed", dest="seed", type=int, default=0,
+                        help="seed for the generation of synthetic data. Default 0")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=3,
+                        help="number of repetitions of each benchmark. Default 3")
+    parser.add_argument("-b", "--benchmarks", dest="benchmarks", type=str, nargs="+", default=BENCHMARKS,
+                        choices=BENCHMARKS, help="benchmarks to run. Default all")
+    parser.add_argument("-o", "--output-file", metavar="output_file", dest="output_file", type=str,
+                        default="benchmark_results.json",
+                        help="json file where to write the results. Default ./benchmark_results.json")
+    args = parser.parse_args()
+    conf_parser = GenedescConfigParser(args.config_file)
+    with tempfile.TemporaryDirectory() as data_dir:
+        data = prepare_data(args, data_dir)
+        results = run_benchmarks(args, conf_parser, data)
+    with open(args.output_file, "w") as output_file:
+        json.dump({"version": RESULTS_VERSION,
+                   "commit": get_commit(),
+                   "date": datetime.datetime.now().isoformat(),
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "parameters": {"data": "fixtures" if args.fixtures else "synthetic",
+                                  "num_terms": None if args.fixtures else args.num_terms,
+                                  "num_genes": len(data["gene_ids"]),
+                                  "annotations_per_gene": None if args.fixtures else args.annotations_per_gene,
+                                  "heavily_annotated_perc": None if args.fixtures else args.heavily_annotated_perc,
+                                  "scale": args.scale if args.fixtures else None,
+                                  "seed": args.seed,
+                                  "repeat": args.repeat},
+                   "results": results}, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
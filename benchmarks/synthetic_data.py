@@ -0,0 +1,144 @@
+"""generators of synthetic ontologies and annotation files for benchmarks, and of larger versions of the test
+fixtures"""
+
+import json
+import random
+
+from typing import Dict, List, Set
+
+# roots of the synthetic ontology, with the GO namespace and aspect of each of them
+GO_ROOTS = [("GO:0003674", "molecular_function", "F"),
+            ("GO:0008150", "biological_process", "P"),
+            ("GO:0005575", "cellular_component", "C")]
+
+GO_PREFIX = "http://purl.obolibrary.org/obo/"
+
+PART_OF = "http://purl.obolibrary.org/obo/BFO_0000050"
+
+EVIDENCE_CODES = ["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "ISS", "ISO", "IBA", "IEA"]
+
+WORDS = ["binding", "activity", "regulation", "positive", "negative", "transport", "signaling", "cell", "protein",
+         "development", "process", "membrane", "receptor", "kinase", "complex", "response", "neuron", "metabolic",
+         "nucleus", "organization"]
+
+
+def _to_iri(term_id: str) -> str:
+    return GO_PREFIX + term_id.replace(":", "_")
+
+
+def generate_obograph_ontology(file_path: str, num_terms: int, max_parents: int = 3, part_of_perc: float = 0.2,
+                               seed: int = 0) -> Dict[str, List[str]]:
+    """write a synthetic GO-like ontology in obograph json format
+
+    Terms are split among the three GO roots. Each term gets between one and max_parents parents among the terms
+    previously created in the same namespace, so that the graph is acyclic
+
+    Args:
+        file_path (str): path to the json file to write
+        num_terms (int): the number of terms, including the roots
+        max_parents (int): the maximum number of parents of each term
+        part_of_perc (float): the fraction of edges that are part_of relations instead of is_a
+        seed (int): seed for the random generator
+
+    Returns:
+        Dict[str, List[str]]: the ids of the non-root terms of each aspect
+    """
+    rand = random.Random(seed)
+    nodes = []
+    edges = []
+    terms_by_aspect = {aspect: [] for _, _, aspect in GO_ROOTS}
+    namespace_terms = {aspect: [root_id] for root_id, _, aspect in GO_ROOTS}
+    for root_id, namespace, aspect in GO_ROOTS:
+        nodes.append({"id": _to_iri(root_id), "lbl": namespace, "type": "CLASS", "meta": {"basicPropertyValues": [
+            {"pred": "http://www.geneontology.org/formats/oboInOwl#hasOBONamespace", "val": namespace}]}})
+    for i in range(num_terms - len(GO_ROOTS)):
+        term_id = "GO:" + str(1000000 + i).zfill(7)
+        root_id, namespace, aspect = GO_ROOTS[i % len(GO_ROOTS)]
+        label = " ".join(rand.sample(WORDS, 3)) + " " + str(i)
+        nodes.append({"id": _to_iri(term_id), "lbl": label, "type": "CLASS", "meta": {"basicPropertyValues": [
+            {"pred": "http://www.geneontology.org/formats/oboInOwl#hasOBONamespace", "val": namespace}]}})
+        # most GO terms have a single parent. Parents are chosen uniformly among the previous terms, so that the
+        # depth grows logarithmically with the number of terms as in GO
+        num_parents = min(max_parents, 1 + int(rand.expovariate(2)))
+        for parent_id in set(rand.choices(namespace_terms[aspect], k=num_parents)):
+            edges.append({"sub": _to_iri(term_id), "pred": PART_OF if rand.random() < part_of_perc else "is_a",
+                          "obj": _to_iri(parent_id)})
+        namespace_terms[aspect].append(term_id)
+        terms_by_aspect[aspect].append(term_id)
+    with open(file_path, "w") as ontology_file:
+        json.dump({"graphs": [{"id": "http://purl.obolibrary.org/obo/go.owl", "nodes": nodes, "edges": edges}]},
+                  ontology_file)
+    return terms_by_aspect
+
+
+def generate_gaf(file_path: str, terms_by_aspect: Dict[str, List[str]], num_genes: int,
+                 annotations_per_gene: int, heavily_annotated_perc: float = 0.1,
+                 heavy_annotations_per_aspect: int = 20, seed: int = 0) -> List[str]:
+    """write a synthetic GAF 2.1 file with WormBase genes annotated to the terms of an ontology
+
+    As in real annotation files, a fraction of the genes is heavily annotated, with enough terms in each aspect to be
+    trimmed in the descriptions
+
+    Args:
+        file_path (str): path to the GAF file to write
+        terms_by_aspect (Dict[str, List[str]]): the ids of the terms that can be annotated, for each aspect
+        num_genes (int): the number of genes
+        annotations_per_gene (int): the average number of annotations of each gene that is not heavily annotated
+        heavily_annotated_perc (float): the fraction of heavily annotated genes
+        heavy_annotations_per_aspect (int): the number of annotations in each aspect of heavily annotated genes
+        seed (int): seed for the random generator
+
+    Returns:
+        List[str]: the ids of the annotated genes, with prefix
+    """
+    rand = random.Random(seed)
+    gene_ids = []
+    aspects = [aspect for aspect, terms in terms_by_aspect.items() if terms]
+    with open(file_path, "w") as gaf_file:
+        gaf_file.write("!gaf-version: 2.1\n")
+        for i in range(num_genes):
+            gene_id = "WBGene" + str(i).zfill(8)
+            gene_ids.append("WB:" + gene_id)
+            if rand.random() < heavily_annotated_perc:
+                gene_aspects = [aspect for aspect in aspects for _ in range(heavy_annotations_per_aspect)]
+            else:
+                gene_aspects = [rand.choice(aspects) for _ in range(max(1, int(rand.gauss(
+                    annotations_per_gene, annotations_per_gene / 3))))]
+            for aspect in gene_aspects:
+                gaf_file.write("\t".join(["WB", gene_id, "gene-" + str(i), "", rand.choice(terms_by_aspect[aspect]),
+                                          "WB_REF:WBPaper" + str(rand.randint(0, 99999)).zfill(8),
+                                          rand.choice(EVIDENCE_CODES), "", aspect, "", "", "gene", "taxon:6239",
+                                          "20180115", "WB", "", ""]) + "\n")
+    return gene_ids
+
+
+def scale_gaf(source_path: str, file_path: str, factor: int, term_ids: Set[str] = None) -> List[str]:
+    """write a larger version of a GAF file by copying its annotations to new genes
+
+    Each copy of the annotations of a gene is assigned to a new gene id, obtained by adding a suffix to the original
+    id, so that the distribution of annotations per gene of the source file is preserved
+
+    Args:
+        source_path (str): path to the source GAF file
+        file_path (str): path to the GAF file to write
+        factor (int): the number of copies of the annotations of each gene
+        term_ids (Set[str]): if provided, only the annotations to these terms are copied. Useful to match the subset
+            of the ontology used by the test fixtures
+
+    Returns:
+        List[str]: the ids of the annotated genes, with prefix
+    """
+    gene_ids = set()
+    with open(source_path) as source_file, open(file_path, "w") as gaf_file:
+        lines = [line.rstrip("\n").split("\t") for line in source_file if not line.startswith("!") and line.strip()]
+        if term_ids is not None:
+            lines = [linearr for linearr in lines if linearr[4] in term_ids]
+        gaf_file.write("!gaf-version: 2.1\n")
+        for copy_num in range(factor):
+            for linearr in lines:
+                new_linearr = list(linearr)
+                if copy_num > 0:
+                    new_linearr[1] = linearr[1] + "_" + str(copy_num)
+                gene_ids.add(new_linearr[0] + ":" + new_linearr[1])
+                gaf_file.write("\t".join(new_linearr) + "\n")
+    return sorted(gene_ids)
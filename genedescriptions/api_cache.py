@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Any, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class APICache(object):
+    """persistent cache for the results of API calls, stored in a SQLite database
+
+    Results are stored as json values and grouped by namespace (e.g., one namespace per API endpoint). Entries older
+    than the time to live are considered expired and are not returned. The cache can be shared by different runs of
+    the pipeline and by different species
+    """
+
+    def __init__(self, file_path: str, ttl_seconds: float = 30 * 24 * 60 * 60):
+        """create a new cache or open an existing one
+
+        Args:
+            file_path (str): path to the SQLite database file. Use ':memory:' for a non-persistent cache
+            ttl_seconds (float): time to live of the entries in seconds. None for entries that never expire
+        """
+        if file_path != ":memory:" and os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.file_path = file_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS api_cache (namespace TEXT NOT NULL, "
+                                     "key TEXT NOT NULL, value TEXT, timestamp REAL NOT NULL, "
+                                     "PRIMARY KEY (namespace, key))")
+
+    def _get_min_valid_timestamp(self):
+        return time.time() - self.ttl_seconds if self.ttl_seconds is not None else float("-inf")
+
+    def get(self, namespace: str, key: str) -> Tuple[bool, Any]:
+        """get a value from the cache
+
+        Args:
+            namespace (str): the namespace of the entry
+            key (str): the key of the entry
+
+        Returns:
+            Tuple[bool, Any]: whether a valid entry was found and its value
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM api_cache WHERE namespace = ? AND key = ? AND "
+                                           "timestamp >= ?", (namespace, key,
+                                                              self._get_min_valid_timestamp())).fetchone()
+        if row is None:
+            return False, None
+        return True, json.loads(row[0])
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """get multiple values from the cache
+
+        Args:
+            namespace (str): the namespace of the entries
+            keys (Iterable[str]): the keys of the entries
+
+        Returns:
+            Dict[str, Any]: the values of the valid entries found in the cache, indexed by key
+        """
+        keys = list(set(keys))
+        results = {}
+        min_valid_timestamp = self._get_min_valid_timestamp()
+        # stay below the maximum number of variables allowed by SQLite in a single statement
+        for i in range(0, len(keys), 500):
+            keys_chunk = keys[i:i + 500]
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT key, value FROM api_cache WHERE namespace = ? AND timestamp >= ? AND key IN (" +
+                    ",".join(["?"] * len(keys_chunk)) + ")", (namespace, min_valid_timestamp, *keys_chunk)).fetchall()
+            results.update({key: json.loads(value) for key, value in rows})
+        return results
+
+    def set(self, namespace: str, key: str, value: Any):
+        """add or replace a value in the cache
+
+        Args:
+            namespace (str): the namespace of the entry
+            key (str): the key of the entry
+            value (Any): the value to store. It must be serializable to json
+        """
+        self.set_many(namespace, {key: value})
+
+    def set_many(self, namespace: str, values: Dict[str, Any]):
+        """add or replace multiple values in the cache in a single transaction
+
+        Args:
+            namespace (str): the namespace of the entries
+            values (Dict[str, Any]): the values to store, indexed by key. They must be serializable to json
+        """
+        timestamp = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO api_cache (namespace, key, value, timestamp) VALUES "
+                                         "(?, ?, ?, ?)", [(namespace, key, json.dumps(value), timestamp) for
+                                                          key, value in values.items()])
+
+    def delete_expired(self):
+        """remove all the expired entries from the cache"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM api_cache WHERE timestamp < ?", (self._get_min_valid_timestamp(),))
+
+    def close(self):
+        """close the connection to the cache database"""
+        with self._lock:
+            self._connection.close()
@@ -2,20 +2,126 @@ import json
 import logging
 import os
 import ssl
-import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from genedescriptions.api_cache import APICache
+from genedescriptions.http_session import HTTPRequestError, HTTPSession
+from genedescriptions.replay import ReplayMode, ReplayStore
 
 logger = logging.getLogger(__name__)
 
 
 class APIManager(object):
-    def __init__(self, textpresso_api_token):
+
+    TPC_CACHE_NAMESPACE = "textpresso_popularity"
+    GENE_CLASS_CACHE_NAMESPACE = "wb_gene_class"
+
+    def __init__(self, textpresso_api_token, cache_path: str = None, cache_ttl_days: float = 30,
+                 max_workers: int = 8, timeout: float = 60, retries: int = 3, backoff_factor: float = 0.5,
+                 replay_store: ReplayStore = None):
+        """create a new api manager
+
+        Args:
+            textpresso_api_token (str): token for Textpresso Central API
+            cache_path (str): path to the SQLite file used to store the results of the API calls across runs. If not
+                provided, or if responses are recorded or replayed, results are cached in memory only
+            cache_ttl_days (float): number of days after which results stored in the persistent cache expire
+            max_workers (int): maximum number of concurrent requests sent when resolving multiple keys, which is also
+                the number of connections kept open for each API host
+            timeout (float): timeout in seconds for reading the response of a request
+            retries (int): maximum number of retries for failed requests
+            backoff_factor (float): base in seconds of the exponential backoff between retries
+            replay_store (ReplayStore): store used to record API responses or to replay them without accessing the
+                network
+        """
         self.textpresso_api_token = textpresso_api_token
         self.tpc_cache = {}
         self.class_cache = {}
         self.tpc_api_endpoint = "https://textpressocentral.org:18080/v1/textpresso/api/get_documents_count"
+        self.wb_rest_api_endpoint = "http://rest.wormbase.org/rest/field/gene/"
+        self.max_workers = max_workers
+        self.http_session = HTTPSession(max_connections=max_workers, read_timeout=timeout, retries=retries,
+                                        backoff_factor=backoff_factor, replay_store=replay_store)
+        # when recording or replaying, all the results go through the replay store, so that a recording is complete
+        # even if some results were already stored in the persistent cache by previous runs
+        if replay_store is not None and replay_store.mode != ReplayMode.OFF:
+            cache_path = None
+        self.persistent_cache = APICache(cache_path, ttl_seconds=cache_ttl_days * 24 * 60 * 60) if cache_path else \
+            None
         if not os.environ.get('PYTHONHTTPSVERIFY', '') and getattr(ssl, '_create_unverified_context', None):
             ssl._create_default_https_context = ssl._create_unverified_context
 
+    def _resolve_keys(self, keys: Iterable[str], memory_cache: Dict[str, Any], cache_namespace: str,
+                      fetch_func: Callable[[str], Tuple[bool, Any]]) -> Dict[str, Any]:
+        # fetch_func returns a success flag and the value, or the fallback value if the request failed. Fallback values
+        # are returned but never cached
+        keys = set(keys)
+        fallback_values = {}
+        missing_keys = [key for key in keys if key not in memory_cache]
+        if missing_keys and self.persistent_cache:
+            memory_cache.update(self.persistent_cache.get_many(cache_namespace, missing_keys))
+            missing_keys = [key for key in missing_keys if key not in memory_cache]
+        if missing_keys:
+            if len(missing_keys) > 1 and self.max_workers > 1:
+                logger.debug("Sending " + str(len(missing_keys)) + " concurrent requests for " + cache_namespace)
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing_keys))) as executor:
+                    fetched_values = list(executor.map(fetch_func, missing_keys))
+            else:
+                fetched_values = [fetch_func(key) for key in missing_keys]
+            new_values = {key: value for key, (success, value) in zip(missing_keys, fetched_values) if success}
+            fallback_values = {key: value for key, (success, value) in zip(missing_keys, fetched_values) if
+                               not success}
+            memory_cache.update(new_values)
+            # missing values, such as genes without a class, are requested again in the next runs, since they may be
+            # added to the source before the cache expires
+            persistent_values = {key: value for key, value in new_values.items() if value is not None}
+            if persistent_values and self.persistent_cache:
+                self.persistent_cache.set_many(cache_namespace, persistent_values)
+        return {key: memory_cache[key] if key in memory_cache else fallback_values.get(key) for key in keys}
+
+    def _fetch_textpresso_popularity(self, keyword: str) -> Tuple[bool, int]:
+        data = json.dumps({"token": self.textpresso_api_token, "query": {
+            "keywords": keyword, "type": "document", "corpora": ["C. elegans"]}})
+        data = data.encode('utf-8')
+        try:
+            logger.debug("Sending request to Textpresso Central API")
+            res = self.http_session.request("POST", self.tpc_api_endpoint, endpoint_name="textpresso_documents_count",
+                                            body=data, headers={'Content-type': 'application/json',
+                                                                'Accept': 'application/json'},
+                                            replay_key="POST " + self.tpc_api_endpoint + " " + keyword)
+            return True, int(json.loads(res.decode('utf-8')))
+        except (HTTPRequestError, ValueError, TypeError) as e:
+            logger.warning("Failed to get Textpresso popularity for keyword " + keyword + ": " + str(e))
+            return False, 0
+
+    def _fetch_gene_class(self, gene_id: str) -> Tuple[bool, str]:
+        try:
+            logger.debug("Getting gene class for gene " + gene_id)
+            gene_class_data = json.loads(self.http_session.request("GET", self.wb_rest_api_endpoint + gene_id +
+                                                                   "/gene_class", endpoint_name="wb_gene_class"))
+            if "gene_class" in gene_class_data and gene_class_data["gene_class"]["data"] and "tag" in \
+                    gene_class_data["gene_class"]["data"] and "label" in gene_class_data["gene_class"]["data"]["tag"]:
+                return True, gene_class_data["gene_class"]["data"]["tag"]["label"]
+            return True, None
+        except (HTTPRequestError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Failed to get gene class for gene " + gene_id + ": " + str(e))
+            return False, None
+
+    def get_textpresso_popularities(self, keywords: Iterable[str]) -> Dict[str, int]:
+        """get the popularity of multiple keywords from Textpresso Central API, sending concurrent requests for the
+        keywords that are not cached
+
+        Args:
+            keywords (Iterable[str]): the keywords to search. Duplicates are resolved once
+        Returns:
+            Dict[str, int]: the popularity of each keyword, 0 for keywords for which the request failed
+        """
+        return self._resolve_keys(keys=keywords, memory_cache=self.tpc_cache,
+                                  cache_namespace=self.TPC_CACHE_NAMESPACE,
+                                  fetch_func=self._fetch_textpresso_popularity)
+
     def get_textpresso_popularity(self, keyword: str):
         """get the number of papers in the C. elegans literature that mention a certain keyword from Textpresso Central API
 
@@ -24,20 +130,19 @@ class APIManager(object):
         Returns:
             int: the popularity of the specified keyword
         """
-        if keyword in self.tpc_cache:
-            logger.debug("Popularity for keyword found in cache")
-            return self.tpc_cache[keyword]
-        else:
-            data = json.dumps({"token": self.textpresso_api_token, "query": {
-                "keywords": keyword, "type": "document", "corpora": ["C. elegans"]}})
-            data = data.encode('utf-8')
-            req = urllib.request.Request(self.tpc_api_endpoint, data, headers={'Content-type': 'application/json',
-                                                                               'Accept': 'application/json'})
-            res = urllib.request.urlopen(req)
-            logger.debug("Sending request to Textpresso Central API")
-            popularity = int(json.loads(res.read().decode('utf-8')))
-            self.tpc_cache[keyword] = popularity
-            return popularity
+        return self.get_textpresso_popularities([keyword])[keyword]
+
+    def get_gene_classes(self, gene_ids: Iterable[str]) -> Dict[str, str]:
+        """get the gene class of multiple genes from WormBase API, sending concurrent requests for the genes that are
+        not cached
+
+        Args:
+            gene_ids (Iterable[str]): the Wormbase WBGene IDs of the genes. Duplicates are resolved once
+        Returns:
+            Dict[str, str]: the class of each gene, None for genes without a class or for which the request failed
+        """
+        return self._resolve_keys(keys=gene_ids, memory_cache=self.class_cache,
+                                  cache_namespace=self.GENE_CLASS_CACHE_NAMESPACE, fetch_func=self._fetch_gene_class)
 
     def get_gene_class(self, gene_id: str):
         """get the gene class of a gene from WormBase API
@@ -47,20 +152,4 @@ class APIManager(object):
         Returns:
             str: the class of the gene
         """
-        if gene_id in self.class_cache:
-            logger.debug("Gene class for gene " + gene_id + " found in cache")
-            return self.class_cache[gene_id]
-        else:
-            try:
-                logger.debug("Getting gene class for gene " + gene_id)
-                gene_class_data = json.loads(urllib.request.urlopen("http://rest.wormbase.org/rest/field/gene/" +
-                                                                    gene_id + "/gene_class").read())
-                if "gene_class" in gene_class_data and gene_class_data["gene_class"]["data"] and "tag" in \
-                        gene_class_data["gene_class"]["data"] and "label" in \
-                        gene_class_data["gene_class"]["data"]["tag"]:
-                    result = gene_class_data["gene_class"]["data"]["tag"]["label"]
-                    self.class_cache[gene_id] = result
-                    return result
-            except:
-                return None
-            return None
+        return self.get_gene_classes([gene_id])[gene_id]
@@ -0,0 +1,341 @@
+"""read-only ontology backed by numpy arrays, which can be saved to and memory-mapped from a cache directory"""
+import json
+import logging
+import math
+import os
+import shutil
+
+from typing import Dict, Iterable, List, Tuple
+
+import networkx as nx
+import numpy as np
+from ontobio.ontol import Ontology
+
+from genedescriptions.ontology_tools import set_all_information_content_values
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded_strings = [string.encode("utf-8") if string is not None else b"" for string in strings]
+    offsets = np.zeros(len(encoded_strings) + 1, dtype=np.int64)
+    np.cumsum([len(encoded_string) for encoded_string in encoded_strings], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded_strings), dtype=np.uint8), offsets
+
+
+def _build_csr(num_nodes: int, edges: List[Tuple[int, int, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    edges = sorted(edges)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount([edge[0] for edge in edges], minlength=num_nodes), out=indptr[1:])
+    return indptr, np.array([edge[1] for edge in edges], dtype=np.int32), \
+        np.array([edge[2] for edge in edges], dtype=np.int16)
+
+
+class ArrayOntology(object):
+    """read-only ontology stored in compact arrays, with the methods of ontobio Ontology used by the description
+    generators
+
+    Terms are identified internally by their position in a string table of ids. The graph is stored as two CSR
+    adjacency structures (term to parents and term to children) with the relation of each edge, labels are stored
+    in a string table and depth, information content, number of subsumers and number of leaves in numeric arrays.
+
+    The arrays can be saved to a directory and loaded back as memory-mapped files, so that multiple processes and
+    data managers share the same physical memory. Since the ontology is read-only, the dictionaries returned by node()
+    are built on each call and changes to them are not persisted: all the properties needed by the generators,
+    including information content, are calculated before conversion
+    """
+
+    VERSION = 1
+    ARRAY_NAMES = ["ids_data", "ids_offsets", "labels_data", "labels_offsets", "has_label", "namespaces", "types",
+                   "obsolete", "depth", "ic", "num_subsumers", "num_leaves", "parents_indptr", "parents_indices",
+                   "parents_relations", "children_indptr", "children_indices", "children_relations"]
+
+    def __init__(self, arrays: Dict[str, np.ndarray], relations: List[str], namespaces: List[str], types: List[str]):
+        """create a new ontology from its arrays. Use from_ontology or load to obtain an instance
+
+        Args:
+            arrays (Dict[str, np.ndarray]): the arrays of the ontology, indexed by name
+            relations (List[str]): the relations table, indexed by the values in the relation arrays
+            namespaces (List[str]): the namespaces table, indexed by the values in the namespaces array
+            types (List[str]): the term types table, indexed by the values in the types array
+        """
+        self.arrays = arrays
+        self.relations = relations
+        self.namespaces = namespaces
+        self.types = types
+        ids_data = arrays["ids_data"].tobytes()
+        ids_offsets = arrays["ids_offsets"].tolist()
+        self._ids = [ids_data[ids_offsets[i]:ids_offsets[i + 1]].decode("utf-8") for i in range(len(ids_offsets) - 1)]
+        self._index_by_id = {node_id: i for i, node_id in enumerate(self._ids)}
+        self._adjacency_lists = {}
+        self._graph = None
+
+    @staticmethod
+    def from_ontology(ontology: Ontology) -> 'ArrayOntology':
+        """convert an ontobio ontology into an array ontology. Information content values are calculated if missing
+
+        Args:
+            ontology (Ontology): the ontology to convert, with depth values already set
+
+        Returns:
+            ArrayOntology: the converted ontology
+        """
+        logger.info("Converting ontology to array ontology")
+        if any("IC" not in ontology.node(root_id) for root_id in ontology.get_roots()):
+            set_all_information_content_values(ontology=ontology)
+        graph = ontology.get_graph()
+        ids = list(graph.nodes())
+        index_by_id = {node_id: i for i, node_id in enumerate(ids)}
+        relations = sorted({str(data.get("pred")) for _, _, data in graph.edges(data=True)})
+        relation_index = {relation: i for i, relation in enumerate(relations)}
+        namespaces = []
+        types = []
+        namespace_column = np.full(len(ids), -1, dtype=np.int16)
+        type_column = np.full(len(ids), -1, dtype=np.int16)
+        obsolete_column = np.zeros(len(ids), dtype=np.bool_)
+        depth_column = np.full(len(ids), -1, dtype=np.int32)
+        ic_column = np.full(len(ids), np.nan, dtype=np.float64)
+        num_subsumers_column = np.full(len(ids), -1, dtype=np.int32)
+        num_leaves_column = np.full(len(ids), -1, dtype=np.int32)
+        labels = []
+        for i, node_id in enumerate(ids):
+            node = graph.nodes[node_id]
+            labels.append(node.get("label"))
+            meta = node.get("meta", {})
+            for basic_prop_val in meta.get("basicPropertyValues", []):
+                if basic_prop_val["pred"] == "OIO:hasOBONamespace":
+                    if basic_prop_val["val"] not in namespaces:
+                        namespaces.append(basic_prop_val["val"])
+                    namespace_column[i] = namespaces.index(basic_prop_val["val"])
+            if "type" in node:
+                if node["type"] not in types:
+                    types.append(node["type"])
+                type_column[i] = types.index(node["type"])
+            obsolete_column[i] = bool(meta.get("deprecated", False))
+            depth_column[i] = node.get("depth", -1)
+            ic_column[i] = node.get("IC", np.nan)
+            num_subsumers_column[i] = node.get("num_subsumers", -1)
+            num_leaves_column[i] = node.get("num_leaves", -1)
+        parent_edges = []
+        child_edges = []
+        for parent_id, child_id, data in graph.edges(data=True):
+            relation = relation_index[str(data.get("pred"))]
+            parent_edges.append((index_by_id[child_id], index_by_id[parent_id], relation))
+            child_edges.append((index_by_id[parent_id], index_by_id[child_id], relation))
+        arrays = {"namespaces": namespace_column, "types": type_column, "obsolete": obsolete_column,
+                  "depth": depth_column, "ic": ic_column, "num_subsumers": num_subsumers_column,
+                  "num_leaves": num_leaves_column,
+                  "has_label": np.array([label is not None for label in labels], dtype=np.bool_)}
+        arrays["ids_data"], arrays["ids_offsets"] = _encode_strings(ids)
+        arrays["labels_data"], arrays["labels_offsets"] = _encode_strings(labels)
+        arrays["parents_indptr"], arrays["parents_indices"], arrays["parents_relations"] = _build_csr(
+            len(ids), parent_edges)
+        arrays["children_indptr"], arrays["children_indices"], arrays["children_relations"] = _build_csr(
+            len(ids), child_edges)
+        return ArrayOntology(arrays=arrays, relations=relations, namespaces=namespaces, types=types)
+
+    def save(self, dir_path: str):
+        """save the ontology to a directory, replacing any ontology previously saved there
+
+        Args:
+            dir_path (str): the directory where to save the ontology
+        """
+        tmp_dir_path = dir_path.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(tmp_dir_path, ignore_errors=True)
+        os.makedirs(tmp_dir_path)
+        for array_name in self.ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir_path, array_name + ".npy"), self.arrays[array_name])
+        with open(os.path.join(tmp_dir_path, "metadata.json"), "w") as metadata_file:
+            json.dump({"version": self.VERSION, "relations": self.relations, "namespaces": self.namespaces,
+                       "types": self.types}, metadata_file)
+        shutil.rmtree(dir_path, ignore_errors=True)
+        os.replace(tmp_dir_path, dir_path)
+
+    @staticmethod
+    def is_saved(dir_path: str) -> bool:
+        """check whether a directory contains an ontology saved with the current version of the format
+
+        Args:
+            dir_path (str): the directory to check
+
+        Returns:
+            bool: whether the ontology can be loaded from the directory
+        """
+        try:
+            with open(os.path.join(dir_path, "metadata.json")) as metadata_file:
+                return json.load(metadata_file)["version"] == ArrayOntology.VERSION
+        except (OSError, ValueError, KeyError):
+            return False
+
+    @staticmethod
+    def load(dir_path: str, mmap_mode: str = "r") -> 'ArrayOntology':
+        """load an ontology from a directory
+
+        Args:
+            dir_path (str): the directory where the ontology has been saved
+            mmap_mode (str): the mode used to memory-map the arrays, as in numpy.load. None to read them in memory
+
+        Returns:
+            ArrayOntology: the loaded ontology
+        """
+        logger.info("Loading array ontology from " + dir_path)
+        with open(os.path.join(dir_path, "metadata.json")) as metadata_file:
+            metadata = json.load(metadata_file)
+        arrays = {array_name: np.load(os.path.join(dir_path, array_name + ".npy"), mmap_mode=mmap_mode) for
+                  array_name in ArrayOntology.ARRAY_NAMES}
+        return ArrayOntology(arrays=arrays, relations=metadata["relations"], namespaces=metadata["namespaces"],
+                             types=metadata["types"])
+
+    def _get_relation_indices(self, relations: Iterable[str] = None):
+        if relations is None:
+            return None
+        return {i for i, relation in enumerate(self.relations) if relation in set(relations)}
+
+    def _get_adjacency_lists(self, direction: str) -> Tuple[List[int], List[int], List[int]]:
+        # graph traversals index the arrays once per visited term, which is much faster on python lists than on numpy
+        # arrays. The lists are private to each process and contain only integers
+        if direction not in self._adjacency_lists:
+            self._adjacency_lists[direction] = (self.arrays[direction + "_indptr"].tolist(),
+                                                self.arrays[direction + "_indices"].tolist(),
+                                                self.arrays[direction + "_relations"].tolist())
+        return self._adjacency_lists[direction]
+
+    def _get_neighbors(self, index: int, direction: str, relation_indices=None) -> List[int]:
+        indptr, indices, edge_relations = self._get_adjacency_lists(direction)
+        start, end = indptr[index], indptr[index + 1]
+        if relation_indices is None:
+            neighbors = indices[start:end]
+        else:
+            neighbors = [indices[j] for j in range(start, end) if edge_relations[j] in relation_indices]
+        # multiple relations between the same terms are stored as separate edges
+        return list(dict.fromkeys(neighbors)) if len(neighbors) > 1 else neighbors
+
+    def _get_closure(self, node: str, direction: str, relations: Iterable[str] = None,
+                     reflexive: bool = False) -> List[str]:
+        if node not in self._index_by_id:
+            return [node] if reflexive else []
+        relation_indices = self._get_relation_indices(relations)
+        start_index = self._index_by_id[node]
+        visited = set()
+        to_visit = [start_index]
+        while to_visit:
+            for neighbor in self._get_neighbors(to_visit.pop(), direction, relation_indices):
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    to_visit.append(neighbor)
+        visited.discard(start_index)
+        closure = [self._ids[i] for i in visited]
+        if reflexive:
+            closure.append(node)
+        return closure
+
+    def nodes(self) -> List[str]:
+        return list(self._ids)
+
+    def has_node(self, node: str) -> bool:
+        return node in self._index_by_id
+
+    def node(self, node: str) -> Dict:
+        """get the properties of a term
+
+        Args:
+            node (str): the term id
+
+        Returns:
+            Dict: a new dictionary with the properties of the term
+
+        Raises:
+            KeyError: if the term is not in the ontology
+        """
+        index = self._index_by_id[node]
+        arrays = self.arrays
+        node_props = {}
+        if arrays["types"][index] >= 0:
+            node_props["type"] = self.types[arrays["types"][index]]
+        meta = {}
+        if arrays["namespaces"][index] >= 0:
+            meta["basicPropertyValues"] = [{"pred": "OIO:hasOBONamespace",
+                                            "val": self.namespaces[arrays["namespaces"][index]]}]
+        if arrays["obsolete"][index]:
+            meta["deprecated"] = True
+        node_props["meta"] = meta
+        label = self.label(node)
+        if label is not None:
+            node_props["label"] = label
+        if arrays["depth"][index] >= 0:
+            node_props["depth"] = int(arrays["depth"][index])
+        if not math.isnan(arrays["ic"][index]):
+            node_props["IC"] = float(arrays["ic"][index])
+        if arrays["num_subsumers"][index] >= 0:
+            node_props["num_subsumers"] = int(arrays["num_subsumers"][index])
+        if arrays["num_leaves"][index] >= 0:
+            node_props["num_leaves"] = int(arrays["num_leaves"][index])
+        return node_props
+
+    def label(self, nid: str, id_if_null: bool = False) -> str:
+        index = self._index_by_id.get(nid)
+        if index is None or not self.arrays["has_label"][index]:
+            return nid if id_if_null else None
+        start, end = self.arrays["labels_offsets"][index:index + 2].tolist()
+        return self.arrays["labels_data"][start:end].tobytes().decode("utf-8")
+
+    def is_obsolete(self, nid: str) -> bool:
+        index = self._index_by_id.get(nid)
+        return index is not None and bool(self.arrays["obsolete"][index])
+
+    def parents(self, node: str, relations: List[str] = None) -> List[str]:
+        if node not in self._index_by_id:
+            return []
+        return [self._ids[i] for i in self._get_neighbors(self._index_by_id[node], "parents",
+                                                           self._get_relation_indices(relations))]
+
+    def children(self, node: str, relations: List[str] = None) -> List[str]:
+        if node not in self._index_by_id:
+            return []
+        return [self._ids[i] for i in self._get_neighbors(self._index_by_id[node], "children",
+                                                           self._get_relation_indices(relations))]
+
+    def ancestors(self, node: str, relations: List[str] = None, reflexive: bool = False) -> List[str]:
+        return self._get_closure(node, "parents", relations=relations, reflexive=reflexive)
+
+    def descendants(self, node: str, relations: List[str] = None, reflexive: bool = False) -> List[str]:
+        return self._get_closure(node, "children", relations=relations, reflexive=reflexive)
+
+    def get_roots(self, relations: List[str] = None) -> List[str]:
+        """get all the terms that have children but no parents, thus excluding singletons such as obsolete terms
+
+        Args:
+            relations (List[str]): the relations to consider
+
+        Returns:
+            List[str]: the root terms
+        """
+        relation_indices = self._get_relation_indices(relations)
+        if relation_indices is None:
+            has_parents = np.diff(self.arrays["parents_indptr"]) > 0
+            has_children = np.diff(self.arrays["children_indptr"]) > 0
+            return [self._ids[i] for i in np.flatnonzero(~has_parents & has_children).tolist()]
+        return [node_id for i, node_id in enumerate(self._ids) if
+                not self._get_neighbors(i, "parents", relation_indices) and
+                self._get_neighbors(i, "children", relation_indices)]
+
+    def get_graph(self) -> nx.MultiDiGraph:
+        """get a networkx graph of the ontology, with edges from parents to children as in ontobio. The graph is built
+        on first request
+
+        Returns:
+            nx.MultiDiGraph: the graph
+        """
+        if self._graph is None:
+            graph = nx.MultiDiGraph()
+            for node_id in self._ids:
+                graph.add_node(node_id, **self.node(node_id))
+            children_indptr = self.arrays["children_indptr"].tolist()
+            children_indices = self.arrays["children_indices"].tolist()
+            children_relations = self.arrays["children_relations"].tolist()
+            for i, parent_id in enumerate(self._ids):
+                for j in range(children_indptr[i], children_indptr[i + 1]):
+                    graph.add_edge(parent_id, self._ids[children_indices[j]],
+                                   pred=self.relations[children_relations[j]])
+            self._graph = graph
+        return self._graph
@@ -1,23 +1,29 @@
 import gzip
+import hashlib
+import json
 import logging
 import urllib.request
 import shutil
 import os
-import re
 import inflect
 
 from enum import Enum
-from collections import defaultdict
-from typing import List, Iterable, Dict
+from typing import List, Iterable, Dict, Tuple
 from ontobio import AssociationSetFactory
 from ontobio.io.assocparser import AssocParserConfig
 from ontobio.ontol_factory import OntologyFactory
 from ontobio.ontol import Ontology
 from ontobio.assocmodel import AssociationSet
 from ontobio.io.gafparser import GafParser
+from genedescriptions.array_ontology import ArrayOntology
 from genedescriptions.commons import Gene, DataType, Module
 from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
+from genedescriptions.human_gene_table import HumanGeneTable, get_shared_human_gene_table
+from genedescriptions.instrumentation import timed
+from genedescriptions.ontology_registry import OntologyRegistry
 from genedescriptions.ontology_tools import set_all_depths_in_subgraph
+from genedescriptions.replay import ReplayStore
+from genedescriptions.terms_renamer import TermsRenamer
 
 
 class ExpressionClusterType(Enum):
@@ -37,13 +43,16 @@ logger = logging.getLogger(__name__)
 class DataManager(object):
     """retrieve data for gene descriptions from different sources"""
 
-    def __init__(self, go_relations: List[str] = None, do_relations: List[str] = None, use_cache: bool = False):
+    def __init__(self, go_relations: List[str] = None, do_relations: List[str] = None, use_cache: bool = False,
+                 ontology_registry: OntologyRegistry = None):
         """create a new a data fetcher
 
         Args:
             go_relations (List[str]): list of ontology relations to be used for GO
             do_relations (List[str]): list of ontology relations to be used for DO
             use_cache (bool): whether to use cached files
+            ontology_registry (OntologyRegistry): registry of the ontologies already loaded, shared with other data
+                managers. Ontologies found in the registry are not parsed again
         """
         self.go_associations = None
         self.go_ontology = None
@@ -58,7 +67,12 @@ class DataManager(object):
         self.do_slim = set()
         self.exp_slim = set()
         self.use_cache = use_cache
+        self.ontology_registry = ontology_registry
+        # old and new labels of the terms renamed in each ontology type, indexed by term id. Ontologies reused from
+        # the registry or from saved array ontologies are not renamed again and have no entry
+        self.renamed_terms = {}
 
+    @timed("data_manager.get_cached_file")
     def _get_cached_file(self, cache_path: str, file_source_url):
         if not os.path.isfile(cache_path):
             os.makedirs(os.path.dirname(cache_path), exist_ok=True)
@@ -110,7 +124,8 @@ class DataManager(object):
             return association_set
 
     @staticmethod
-    def rename_ontology_terms(ontology: Ontology, terms_replacement_regex: Dict[str, str] = None) -> None:
+    def rename_ontology_terms(ontology: Ontology, terms_replacement_regex: Dict[str, str] = None) -> \
+            Dict[str, Tuple[str, str]]:
         """rename ontology terms based on regular expression matching
 
         Args:
@@ -118,13 +133,15 @@ class DataManager(object):
             terms_replacement_regex (Dict[str, str]): a dictionary containing the regular expression to be applied for
                 renaming terms. Each key must be a regular expression to search for terms and the associated value
                 another regular expression that defines the final result
+
+        Returns:
+            Dict[str, Tuple[str, str]]: the old and new labels of the renamed terms, indexed by term id
         """
         logger.info("Renaming ontology terms")
-        if terms_replacement_regex:
-            for regex_to_substitute, regex_target in terms_replacement_regex.items():
-                for node in ontology.search(regex_to_substitute, is_regex=True):
-                    ontology.node(node)["label"] = re.sub(regex_to_substitute, regex_target,
-                                                          ontology.node(node)["label"])
+        renamed_terms = TermsRenamer(terms_replacement_regex).rename_ontology_terms(ontology)
+        for term_id, (old_label, new_label) in renamed_terms.items():
+            logger.info("Renamed term " + term_id + " from '" + old_label + "' to '" + new_label + "'")
+        return renamed_terms
 
     def set_ontology(self, ontology_type: DataType, ontology: Ontology,
                      terms_replacement_regex: Dict[str, str] = None) -> None:
@@ -151,7 +168,8 @@ class DataManager(object):
             self.expression_ontology = ontology.subontology()
             DataManager.add_article_to_expression_nodes(self.expression_ontology)
             new_ontology = self.expression_ontology
-        self.rename_ontology_terms(ontology=new_ontology, terms_replacement_regex=terms_replacement_regex)
+        self.renamed_terms[ontology_type] = self.rename_ontology_terms(
+            ontology=new_ontology, terms_replacement_regex=terms_replacement_regex)
         for root_id in new_ontology.get_roots():
             set_all_depths_in_subgraph(ontology=new_ontology, root_id=root_id, relations=None)
 
@@ -163,8 +181,27 @@ class DataManager(object):
                     inflect_engine.singular_noun(ontology.node(term)["label"].split(" ")[-1]) is False:
                 ontology.node(term)["label"] = "the " + ontology.node(term)["label"]
 
+    @staticmethod
+    def get_ontology_key(ontology_type: DataType, ontology_url: str, relations: List[str] = None,
+                         terms_replacement_regex: Dict[str, str] = None) -> str:
+        """get a key that identifies an ontology after loading, based on its source and on the transformations
+        applied to it
+
+        Args:
+            ontology_type (DataType): the type of ontology
+            ontology_url (str): url to the ontology file
+            relations (List[str]): the relations used to extract the sub-ontology
+            terms_replacement_regex (Dict[str, str]): the regular expressions used to rename terms
+
+        Returns:
+            str: the key of the ontology, which can be used as a file name
+        """
+        return ontology_type.name.lower() + "_" + hashlib.sha1(json.dumps(
+            [ontology_url, relations, terms_replacement_regex]).encode("utf-8")).hexdigest()
+
+    @timed("data_manager.load_ontology_from_file")
     def load_ontology_from_file(self, ontology_type: DataType, ontology_url: str, ontology_cache_path: str,
-                                config: GenedescConfigParser) -> None:
+                                config: GenedescConfigParser, array_ontology_cache_dir: str = None) -> None:
         """load go ontology from file
 
         Args:
@@ -172,40 +209,59 @@ class DataManager(object):
             ontology_url (str): url to the ontology file
             ontology_cache_path (str): path to cache file for the ontology
             config (GenedescConfigParser): configuration object where to read properties
+            array_ontology_cache_dir (str): if provided, the ontology is converted into a read-only ArrayOntology,
+                which is saved in a sub-directory of this directory and memory-mapped from there. When using cached
+                files, a previously saved array ontology is loaded without parsing the ontology file again
         """
-        new_ontology = None
         module = None
         slim_cache_path = ""
+        relations = None
         if ontology_type == DataType.GO:
             logger.info("Loading GO ontology data from file")
-            self.go_ontology = OntologyFactory().create(self._get_cached_file(file_source_url=ontology_url,
-                                                                              cache_path=ontology_cache_path)
-                                                        ).subontology(relations=self.go_relations)
-            new_ontology = self.go_ontology
             module = Module.GO
+            relations = self.go_relations
             slim_cache_path = os.path.join(os.path.dirname(os.path.normpath(ontology_cache_path)), "go_slim.obo")
         elif ontology_type == DataType.DO:
             logger.info("Loading DO ontology data from file")
-            self.do_ontology = OntologyFactory().create(self._get_cached_file(file_source_url=ontology_url,
-                                                                              cache_path=ontology_cache_path)
-                                                        ).subontology(relations=self.do_relations)
-            new_ontology = self.do_ontology
             module = Module.DO_EXPERIMENTAL
+            relations = self.do_relations
             slim_cache_path = os.path.join(os.path.dirname(os.path.normpath(ontology_cache_path)), "do_slim.obo")
         elif ontology_type == DataType.EXPR:
             logger.info("Loading Expression ontology data from file")
-            self.expression_ontology = OntologyFactory().create(self._get_cached_file(
-                file_source_url=ontology_url, cache_path=ontology_cache_path)).subontology()
-            new_ontology = self.expression_ontology
             module = Module.EXPRESSION
             slim_cache_path = os.path.join(os.path.dirname(os.path.normpath(ontology_cache_path)), "exp_slim.obo")
         terms_replacement_regex = config.get_module_property(module=module, prop=ConfigModuleProperty.RENAME_TERMS)
-        if terms_replacement_regex:
-            self.rename_ontology_terms(ontology=new_ontology, terms_replacement_regex=terms_replacement_regex)
-        if ontology_type == DataType.EXPR:
-            DataManager.add_article_to_expression_nodes(self.expression_ontology)
-        for root_id in new_ontology.get_roots():
-            set_all_depths_in_subgraph(ontology=new_ontology, root_id=root_id, relations=None)
+        ontology_key = self.get_ontology_key(ontology_type=ontology_type, ontology_url=ontology_url,
+                                             relations=relations, terms_replacement_regex=terms_replacement_regex)
+        registry_key = ontology_key + "_array" if array_ontology_cache_dir else ontology_key
+        array_ontology_path = os.path.join(array_ontology_cache_dir, ontology_key) if array_ontology_cache_dir else \
+            None
+        if self.ontology_registry is not None and registry_key in self.ontology_registry:
+            logger.info("Reusing ontology already loaded from " + ontology_url)
+            new_ontology = self.ontology_registry.get(registry_key)
+        elif array_ontology_path and self.use_cache and ArrayOntology.is_saved(array_ontology_path):
+            new_ontology = ArrayOntology.load(array_ontology_path)
+        else:
+            new_ontology = OntologyFactory().create(self._get_cached_file(
+                file_source_url=ontology_url, cache_path=ontology_cache_path)).subontology(relations=relations)
+            if terms_replacement_regex:
+                self.renamed_terms[ontology_type] = self.rename_ontology_terms(
+                    ontology=new_ontology, terms_replacement_regex=terms_replacement_regex)
+            if ontology_type == DataType.EXPR:
+                DataManager.add_article_to_expression_nodes(new_ontology)
+            for root_id in new_ontology.get_roots():
+                set_all_depths_in_subgraph(ontology=new_ontology, root_id=root_id, relations=None)
+            if array_ontology_path:
+                ArrayOntology.from_ontology(new_ontology).save(array_ontology_path)
+                new_ontology = ArrayOntology.load(array_ontology_path)
+        if self.ontology_registry is not None:
+            self.ontology_registry.register(registry_key, new_ontology)
+        if ontology_type == DataType.GO:
+            self.go_ontology = new_ontology
+        elif ontology_type == DataType.DO:
+            self.do_ontology = new_ontology
+        elif ontology_type == DataType.EXPR:
+            self.expression_ontology = new_ontology
         slim_url = config.get_module_property(module=module, prop=ConfigModuleProperty.SLIM_URL)
         self.load_slim(module=module, slim_url=slim_url, slim_cache_path=slim_cache_path)
 
@@ -264,6 +320,7 @@ class DataManager(object):
                 association_set=associations, ontology=self.do_ontology, terms_blacklist=config.get_module_property(
                     module=Module.EXPRESSION, prop=ConfigModuleProperty.EXCLUDE_TERMS))
 
+    @timed("data_manager.load_associations_from_file")
     def load_associations_from_file(self, associations_type: DataType, associations_url: str,
                                     associations_cache_path: str, config: GenedescConfigParser) -> None:
         """load go associations from file
@@ -305,6 +362,7 @@ class DataManager(object):
                 terms_blacklist=config.get_module_property(module=Module.EXPRESSION,
                                                            prop=ConfigModuleProperty.EXCLUDE_TERMS))
 
+    @timed("data_manager.get_annotations_for_gene")
     def get_annotations_for_gene(self, gene_id: str, annot_type: DataType = DataType.GO,
                                  include_obsolete: bool = False, include_negative_results: bool = False,
                                  priority_list: Iterable = ("EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "IC", "ISS",
@@ -368,44 +426,39 @@ class DataManager(object):
         pass
 
     @staticmethod
-    def get_human_gene_props():
+    def get_human_gene_props(replay_store: ReplayStore = None, human_gene_table: HumanGeneTable = None):
         """ retrieve data for human genes, including Ensembl ID, symbol, name, and family symbol and name
 
+        Args:
+            replay_store (ReplayStore): store used to record the HGNC data or to replay them without accessing the
+                network. Ignored if human_gene_table is provided
+            human_gene_table (HumanGeneTable): the table from which data are read. If not provided, a table shared by
+                all the calls in the process is used, so that HGNC data are downloaded only once
+
         Returns:
             Dict[str, List[str]]: a dictionary of all human genes properties, indexed by Ensembl ID
 
         """
-        human_genes_props = defaultdict(list)
-        human_content_w_ensmbl = urllib.request.urlopen("https://www.genenames.org/cgi-bin/download/custom?col=gd_hgnc_id&col=gd_pub_ensembl_id&col=gd_app_sym&col=gd_app_name&status=Approved&status=Entry%20Withdrawn&hgnc_dbtag=on&order_by=gd_app_sym_sort&format=text&submit=submit")
-
-        header = True
-        for line in human_content_w_ensmbl:
-            if not header:
-                linearr = line.decode("utf-8").split("\t")
-                linearr[-1] = linearr[-1].strip()
-                if linearr[1] != "":
-                    human_genes_props[linearr[1]] = [linearr[0], linearr[2], linearr[3]]
-            else:
-                header = False
-        return human_genes_props
+        if human_gene_table is None:
+            human_gene_table = get_shared_human_gene_table(replay_store=replay_store)
+        return human_gene_table.get_human_gene_props()
 
     @staticmethod
-    def get_ensembl_hgnc_ids_map():
-        human_genes_props = {}
-        human_content_w_ensmbl = urllib.request.urlopen("https://www.genenames.org/cgi-bin/download?col=gd_hgnc_id&col="
-                                                        "gd_pub_ensembl_id&status=Approved&status=Entry+Withdrawn&statu"
-                                                        "s_opt=2&where=&order_by=gd_app_sym_sort&format=text&limit=&hgn"
-                                                        "c_dbtag=on&submit=submit")
-        header = True
-        for line in human_content_w_ensmbl:
-            if not header:
-                linearr = line.decode("utf-8").split("\t")
-                linearr[-1] = linearr[-1].strip()
-                if linearr[1] != "":
-                    human_genes_props[linearr[1]] = linearr[0]
-            else:
-                header = False
-        return human_genes_props
+    def get_ensembl_hgnc_ids_map(replay_store: ReplayStore = None, human_gene_table: HumanGeneTable = None):
+        """ retrieve the map between Ensembl IDs and HGNC IDs of human genes
+
+        Args:
+            replay_store (ReplayStore): store used to record the HGNC data or to replay them without accessing the
+                network. Ignored if human_gene_table is provided
+            human_gene_table (HumanGeneTable): the table from which data are read. If not provided, a table shared by
+                all the calls in the process is used, so that HGNC data are downloaded only once
+
+        Returns:
+            Dict[str, str]: the HGNC ID of each human gene, indexed by Ensembl ID
+        """
+        if human_gene_table is None:
+            human_gene_table = get_shared_human_gene_table(replay_store=replay_store)
+        return human_gene_table.get_ensembl_hgnc_ids_map()
 
     @staticmethod
     def create_annotation_record(source_line, gene_id, gene_symbol, gene_type, taxon_id, object_id, qualifiers, aspect,
@@ -4,6 +4,7 @@ import re
 from genedescriptions.commons import Sentence, Module, DataType
 from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
 from genedescriptions.data_manager import DataManager
+from genedescriptions.instrumentation import instrumentation, timed
 from genedescriptions.ontology_tools import *
 from genedescriptions.sentence_generation_functions import _get_single_sentence, compose_sentence
 
@@ -43,6 +44,7 @@ class SentenceMerger(object):
 class OntologySentenceGenerator(object):
     """generates sentences based on description rules"""
 
+    @timed("sentence_generator.init")
     def __init__(self, gene_id: str, module: Module, data_manager: DataManager, config: GenedescConfigParser,
                  limit_to_group: str = None, humans: bool = False):
         """initialize sentence generator object
@@ -95,6 +97,7 @@ class OntologySentenceGenerator(object):
                                 break
                     self.terms_groups[(aspect, qualifier)][ev_group].add(annotation["object"]["id"])
 
+    @timed("sentence_generator.get_module_sentences")
     def get_module_sentences(self,  config: GenedescConfigParser, aspect: str, qualifier: str = '',
                              keep_only_best_group: bool = False, merge_groups_with_same_prefix: bool = False,
                              high_priority_term_ids: List[str] = None):
@@ -171,8 +174,10 @@ class OntologySentenceGenerator(object):
         if remove_parents:
             terms = OntologySentenceGenerator.remove_parents_if_child_present(
                 terms, self.ontology, terms_already_covered, high_priority_term_ids)
+        instrumentation.observe("sentence_generator.num_terms_before_trimming", len(terms))
         if 0 < max_num_terms < len(terms):
             trimmed = True
+            instrumentation.increment("sentence_generator.trimmed_term_groups")
             terms, add_others, ancestors_covering_multiple_children = self.get_trimmed_terms_by_common_ancestor(
                 terms, terms_already_covered, aspect, config, high_priority_term_ids)
         else:
@@ -182,6 +187,7 @@ class OntologySentenceGenerator(object):
                                                             high_priority_term_ids)
         return terms, trimmed, add_others, ancestors_covering_multiple_children
 
+    @timed("sentence_generator.trimming")
     def get_trimmed_terms_by_common_ancestor(self, terms: Set[str], terms_already_covered, aspect: str,
                                              config: GenedescConfigParser, high_priority_terms: List[str] = None):
         dist_root = config.get_module_property(module=self.module, prop=ConfigModuleProperty.DISTANCE_FROM_ROOT)
@@ -1,12 +1,13 @@
 import datetime
-import json
-import copy
+import os
 
 from collections import OrderedDict
-from typing import List
+from typing import Any, Dict, List
 
 from genedescriptions.data_manager import DataManager
 from genedescriptions.gene_description import GeneDescription
+from genedescriptions.instrumentation import timed
+from genedescriptions.json_encoding import JsonEncoderBackend, dump_json, dumps_json
 from genedescriptions.stats import DescriptionsOverallProperties, DescriptionsStats
 
 
@@ -25,8 +26,10 @@ class DescriptionsWriter(object):
         """
         self.data.append(gene_description)
 
+    @timed("descriptions_writer.write_json")
     def write_json(self, file_path: str, pretty: bool = False, include_single_gene_stats: bool = False,
-                   data_manager: DataManager = None):
+                   data_manager: DataManager = None,
+                   json_encoder_backend: JsonEncoderBackend = JsonEncoderBackend.AUTO):
         """write the descriptions to a json file
 
         Args:
@@ -34,6 +37,7 @@ class DescriptionsWriter(object):
             pretty (bool): whether to format the json file to make it more human-readable
             include_single_gene_stats (bool): whether to include statistics about the descriptions in the output file
             data_manager (DataManager): data manager containing the ontologies used to calculate onto stats
+            json_encoder_backend (JsonEncoderBackend): the json encoder to use
         """
         indent = None
         if pretty:
@@ -42,27 +46,50 @@ class DescriptionsWriter(object):
             for gene_desc in self.data:
                 gene_desc.stats.calculate_stats(data_manager=data_manager)
             self.general_stats.calculate_stats(gene_descriptions=self.data)
-            for gene_desc in self.data:
-                gene_desc.stats.delete_extra_info()
-        json_serializable_self = copy.deepcopy(self)
-        json_serializable_self.overall_properties = vars(json_serializable_self.overall_properties)
+        json_dict = OrderedDict([("overall_properties", vars(self.overall_properties))])
         if include_single_gene_stats:
-            json_serializable_self.general_stats = vars(json_serializable_self.general_stats)
-            for gene_desc in json_serializable_self.data:
-                gene_desc.stats = vars(gene_desc.stats)
+            json_dict["general_stats"] = self.general_stats.to_dict()
+        json_dict["data"] = [gene_desc.to_dict(include_stats=include_single_gene_stats) for gene_desc in self.data]
+        with open(file_path, "w", encoding="utf-8") as outfile:
+            dump_json(json_dict, outfile, indent=indent, backend=json_encoder_backend)
+
+    @staticmethod
+    def _get_ace_entry(genedesc: GeneDescription, curators_list: List[str], release_version: str,
+                       date: datetime.datetime) -> str:
+        entry = ""
+        if genedesc.description:
+            entry += "Gene : \"" + genedesc.gene_id[3:] + "\"\n"
+            # for evidence in genedesc.evidences:
+            #    accession_arr = evidence.split(":")
+            #    entry += "Automated_description\t\"" + genedesc.description + "\"\tAccession_evidence\t\"" + \
+            #             accession_arr[0] + "\" \"" + accession_arr[1] + "\"\n"
+            for curator in curators_list:
+                entry += "Automated_description\t\"" + genedesc.description + "\"\tCurator_confirmed\t\"" + curator + \
+                         "\"\n"
+            # for paper in genedesc.papersref:
+            #    entry += "Automated_description\t\"" + genedesc.description + "\"\tPaper_evidence\t\"" + paper + "\"\n"
+            entry += "Automated_description\t\"" + genedesc.description + "\"\tDate_last_updated\t\"" + \
+                     str(date.year) + "-" + str(date.month) + "-" + str(date.day) + "\"\n"
+            entry += "Automated_description\t\"" + genedesc.description + "\"\tInferred_automatically\t\"" + \
+                     "This description was generated automatically by a script based on data from the " + \
+                     release_version + " version of WormBase\"\n\n"
+        return entry
+
+    @staticmethod
+    def _get_plain_text_entry(genedesc: GeneDescription) -> str:
+        if genedesc.description:
+            return genedesc.gene_id + "\t" + genedesc.gene_name + "\n" + genedesc.description + "\n\n"
         else:
-            for gene_desc in json_serializable_self.data:
-                gene_desc.stats = None
-            del json_serializable_self.general_stats
-        for gene_desc in json_serializable_self.data:
-            del gene_desc.add_gene_name
-        json_serializable_self.data = [vars(gene_desc) for gene_desc in json_serializable_self.data]
-        if not include_single_gene_stats:
-            for gene_desc in json_serializable_self.data:
-                del gene_desc["stats"]
-        with open(file_path, "w") as outfile:
-            json.dump(OrderedDict(vars(json_serializable_self)), outfile, indent=indent)
+            return genedesc.gene_id + "\t" + genedesc.gene_name + "\nNo description available\n\n"
+
+    @staticmethod
+    def _get_tsv_entry(genedesc: GeneDescription) -> str:
+        if genedesc.description:
+            return genedesc.gene_id + "\t" + genedesc.gene_name + "\t" + genedesc.description + "\n"
+        else:
+            return genedesc.gene_id + "\t" + genedesc.gene_name + "\tNo description available\n"
 
+    @timed("descriptions_writer.write_ace")
     def write_ace(self, file_path: str, curators_list: List[str], release_version: str):
         """write the descriptions to an ace file
 
@@ -74,26 +101,9 @@ class DescriptionsWriter(object):
         with open(file_path, "w") as outfile:
             outfile.write("\n")
             for genedesc in self.data:
-                if genedesc.description:
-                    outfile.write("Gene : \"" + genedesc.gene_id[3:] + "\"\n")
-                    # for evidence in genedesc.evidences:
-                    #    accession_arr = evidence.split(":")
-                    #    outfile.write("Automated_description\t\"" + genedesc.description +
-                    #                  "\"\tAccession_evidence\t\"" + accession_arr[0] + "\" \"" + accession_arr[1] +
-                    #                  "\"\n")
-                    for curator in curators_list:
-                        outfile.write("Automated_description\t\"" + genedesc.description +
-                                      "\"\tCurator_confirmed\t\"" + curator + "\"\n")
-                    # for paper in genedesc.papersref:
-                    #    outfile.write("Automated_description\t\"" + genedesc.description +
-                    #                  "\"\tPaper_evidence\t\"" + paper + "\"\n")
-                    outfile.write("Automated_description\t\"" + genedesc.description + "\"\tDate_last_updated\t\"" +
-                                  str(now.year) + "-" + str(now.month) + "-" + str(now.day) + "\"\n")
-                    outfile.write("Automated_description\t\"" + genedesc.description +
-                                  "\"\tInferred_automatically\t\"" + "This description was generated automatically by a"
-                                                                     " script based on data from the " +
-                                  release_version + " version of WormBase\"\n\n")
+                outfile.write(self._get_ace_entry(genedesc, curators_list, release_version, now))
 
+    @timed("descriptions_writer.write_plain_text")
     def write_plain_text(self, file_path):
         """write the descriptions to a plain text file
 
@@ -102,11 +112,9 @@ class DescriptionsWriter(object):
         """
         with open(file_path, "w") as outfile:
             for genedesc in self.data:
-                if genedesc.description:
-                    outfile.write(genedesc.gene_id + "\t" + genedesc.gene_name + "\n" + genedesc.description + "\n\n")
-                else:
-                    outfile.write(genedesc.gene_id + "\t" + genedesc.gene_name + "\nNo description available\n\n")
+                outfile.write(self._get_plain_text_entry(genedesc))
 
+    @timed("descriptions_writer.write_tsv")
     def write_tsv(self, file_path):
         """write the descriptions to a tsv file
 
@@ -115,7 +123,193 @@ class DescriptionsWriter(object):
         """
         with open(file_path, "w") as outfile:
             for genedesc in self.data:
-                if genedesc.description:
-                    outfile.write(genedesc.gene_id + "\t" + genedesc.gene_name + "\t" + genedesc.description + "\n")
-                else:
-                    outfile.write(genedesc.gene_id + "\t" + genedesc.gene_name + "\tNo description available\n")
+                outfile.write(self._get_tsv_entry(genedesc))
+
+
+class StreamingDescriptionsWriter(DescriptionsWriter):
+    """descriptions writer that writes each gene description to all the output files as soon as it is added
+
+    Gene descriptions are not kept in memory, so memory usage does not depend on the number of genes. Output files must
+    be opened through open_output_files after setting the overall properties and closed when all the genes have been
+    added. Files are written with a .partial extension and renamed to their final paths only when the writer is closed
+    successfully, so that a failed run does not leave files that look complete or replace the output of a previous run.
+    Writes are left to the buffers of the files, since the .partial extension already marks incomplete output
+
+    The write methods of DescriptionsWriter are not supported, since the descriptions are not kept in memory
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.json_file = None
+        self.plain_text_file = None
+        self.tsv_file = None
+        self.ace_file = None
+        self.curators_list = []
+        self.release_version = ""
+        self.indent = None
+        self.json_encoder_backend = JsonEncoderBackend.AUTO
+        self.include_single_gene_stats = False
+        self.data_manager = None
+        self.ace_date = None
+        self.num_genes_written = 0
+        self._partial_file_paths = {}
+
+    @staticmethod
+    def _raise_unsupported_write(method_name: str):
+        raise TypeError(method_name + " is not supported by StreamingDescriptionsWriter, which does not keep the "
+                        "descriptions in memory. Open the output files with open_output_files before adding the "
+                        "descriptions instead")
+
+    def write_json(self, *args, **kwargs):
+        self._raise_unsupported_write("write_json")
+
+    def write_ace(self, *args, **kwargs):
+        self._raise_unsupported_write("write_ace")
+
+    def write_plain_text(self, *args, **kwargs):
+        self._raise_unsupported_write("write_plain_text")
+
+    def write_tsv(self, *args, **kwargs):
+        self._raise_unsupported_write("write_tsv")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(complete=exc_type is None)
+
+    def _open_partial_file(self, file_path: str, encoding: str = None):
+        partial_file_path = file_path + ".partial"
+        self._partial_file_paths[partial_file_path] = file_path
+        return open(partial_file_path, "w", encoding=encoding)
+
+    def open_output_files(self, json_file_path: str = None, plain_text_file_path: str = None,
+                          tsv_file_path: str = None, ace_file_path: str = None, curators_list: List[str] = None,
+                          release_version: str = "", pretty: bool = False, include_single_gene_stats: bool = False,
+                          data_manager: DataManager = None,
+                          json_encoder_backend: JsonEncoderBackend = JsonEncoderBackend.AUTO):
+        """open the output files to which the gene descriptions will be streamed. Only the files for which a path is
+        provided are written
+
+        Args:
+            json_file_path (str): the path to the json file to write
+            plain_text_file_path (str): the path to the plain text file to write
+            tsv_file_path (str): the path to the tsv file to write
+            ace_file_path (str): the path to the ace file to write
+            curators_list (List[str]): list of WBPerson Ids to be attached as evidences to the automated descriptions
+                in the ace file
+            release_version (str): the release version to be reported in the ace file
+            pretty (bool): whether to format the json file to make it more human-readable
+            include_single_gene_stats (bool): whether to include statistics about the descriptions in the json file
+            data_manager (DataManager): data manager containing the ontologies used to calculate onto stats
+            json_encoder_backend (JsonEncoderBackend): the json encoder to use
+        """
+        self.curators_list = curators_list if curators_list else []
+        self.release_version = release_version
+        self.indent = 4 if pretty else None
+        self.json_encoder_backend = json_encoder_backend
+        self.include_single_gene_stats = include_single_gene_stats
+        self.data_manager = data_manager
+        self.ace_date = datetime.datetime.now()
+        if json_file_path:
+            self.json_file = self._open_partial_file(json_file_path, encoding="utf-8")
+            self.json_file.write("{" + self._get_json_separator(1) + self._get_json_key("overall_properties") +
+                                 self._dumps_json(vars(self.overall_properties), 1) +
+                                 self._get_json_separator(1, comma=True) + self._get_json_key("data") + "[")
+        if plain_text_file_path:
+            self.plain_text_file = self._open_partial_file(plain_text_file_path)
+        if tsv_file_path:
+            self.tsv_file = self._open_partial_file(tsv_file_path)
+        if ace_file_path:
+            self.ace_file = self._open_partial_file(ace_file_path)
+            self.ace_file.write("\n")
+
+    def _get_json_separator(self, level: int, comma: bool = False):
+        if self.indent is not None:
+            return ("," if comma else "") + "\n" + " " * self.indent * level
+        else:
+            return "," if comma else ""
+
+    def _get_json_key(self, key: str):
+        return "\"" + key + "\":" + (" " if self.indent is not None else "")
+
+    def _dumps_json(self, obj, level: int):
+        text = dumps_json(obj, indent=self.indent, backend=self.json_encoder_backend)
+        if self.indent is not None:
+            text = text.replace("\n", "\n" + " " * self.indent * level)
+        return text
+
+    def add_gene_desc(self, gene_description: GeneDescription) -> tuple:
+        """write a gene description to all the open output files
+
+        Args:
+            gene_description (GeneDescription): the gene description to be written
+
+        Returns:
+            tuple: the stats row of the gene description, as returned by DescriptionsStats.get_stats_row, if single
+                gene stats are included in the json file, or None otherwise
+        """
+        gene_desc_dict = None
+        stats_row = None
+        if self.json_file:
+            if self.include_single_gene_stats:
+                gene_description.stats.calculate_stats(data_manager=self.data_manager)
+                stats_row = DescriptionsStats.get_stats_row(gene_description)
+            gene_desc_dict = gene_description.to_dict(include_stats=self.include_single_gene_stats)
+        self._write_gene_desc(gene_desc_dict, gene_description, stats_row)
+        return stats_row
+
+    def add_gene_desc_dict(self, gene_desc_dict: Dict[str, Any], stats_row: tuple = None):
+        """write a gene description already serialized by a previous run to all the open output files, without
+        generating it again
+
+        Args:
+            gene_desc_dict (Dict[str, Any]): the gene description, as written in the data section of a json file
+            stats_row (tuple): the stats row of the gene description, as returned by DescriptionsStats.get_stats_row,
+                used to update the overall stats if single gene stats are included in the json file
+        """
+        self._write_gene_desc(gene_desc_dict, GeneDescription.from_dict(gene_desc_dict), stats_row)
+
+    @timed("streaming_descriptions_writer.write_gene_desc")
+    def _write_gene_desc(self, gene_desc_dict: Dict[str, Any], gene_description: GeneDescription,
+                         stats_row: tuple = None):
+        if self.json_file:
+            if self.include_single_gene_stats and stats_row is not None:
+                self.general_stats.add_stats_row(stats_row)
+            self.json_file.write(self._get_json_separator(2, comma=self.num_genes_written > 0) +
+                                 self._dumps_json(gene_desc_dict, 2))
+        if self.plain_text_file:
+            self.plain_text_file.write(self._get_plain_text_entry(gene_description))
+        if self.tsv_file:
+            self.tsv_file.write(self._get_tsv_entry(gene_description))
+        if self.ace_file:
+            self.ace_file.write(self._get_ace_entry(gene_description, self.curators_list, self.release_version,
+                                                    self.ace_date))
+        self.num_genes_written += 1
+
+    @timed("streaming_descriptions_writer.close")
+    def close(self, complete: bool = True):
+        """close all the output files
+
+        Args:
+            complete (bool): whether all the genes have been written. If True, the json file is completed with the
+                overall stats and the files are renamed to their final paths. Otherwise, the files are left with the
+                .partial extension, and the json file is not completed
+        """
+        if self.json_file and complete:
+            self.json_file.write((self._get_json_separator(1) if self.num_genes_written > 0 else "") + "]")
+            if self.include_single_gene_stats:
+                self.json_file.write(self._get_json_separator(1, comma=True) + self._get_json_key("general_stats") +
+                                     self._dumps_json(self.general_stats.to_dict(), 1))
+            self.json_file.write(self._get_json_separator(0) + "}")
+        for out_file in [self.json_file, self.plain_text_file, self.tsv_file, self.ace_file]:
+            if out_file:
+                out_file.close()
+        self.json_file = None
+        self.plain_text_file = None
+        self.tsv_file = None
+        self.ace_file = None
+        if complete:
+            for partial_file_path, file_path in self._partial_file_paths.items():
+                os.replace(partial_file_path, file_path)
+        self._partial_file_paths = {}
@@ -1,6 +1,7 @@
 import inflect
 
-from typing import List
+from collections import OrderedDict
+from typing import Any, Dict, List
 
 from genedescriptions.commons import Module
 from genedescriptions.descriptions_generator import OntologySentenceGenerator, ModuleSentences
@@ -38,6 +39,40 @@ class GeneDescription(object):
         self.accession_evidences = []
         self.add_gene_name = add_gene_name
 
+    def to_dict(self, include_stats: bool = False):
+        """get the gene description as a dictionary that can be serialized, without modifying the object
+
+        Args:
+            include_stats (bool): whether to include the stats of the gene description
+
+        Returns:
+            Dict[str, Any]: the gene description
+        """
+        gene_desc_dict = OrderedDict()
+        for key, value in vars(self).items():
+            if key == "stats":
+                if include_stats:
+                    gene_desc_dict[key] = value.to_dict()
+            elif key != "add_gene_name":
+                gene_desc_dict[key] = value
+        return gene_desc_dict
+
+    @staticmethod
+    def from_dict(gene_desc_dict: Dict[str, Any]) -> 'GeneDescription':
+        """create a gene description from a dictionary returned by to_dict. Stats are not restored
+
+        Args:
+            gene_desc_dict (Dict[str, Any]): the gene description as a dictionary
+
+        Returns:
+            GeneDescription: the gene description
+        """
+        gene_desc = GeneDescription(gene_id=gene_desc_dict["gene_id"])
+        for key, value in gene_desc_dict.items():
+            if key != "stats":
+                setattr(gene_desc, key, value)
+        return gene_desc
+
     @staticmethod
     def _concatenate_description(desc, desc_destination):
         if desc_destination:
@@ -0,0 +1,154 @@
+import logging
+import os
+import threading
+import time
+
+from typing import Dict
+
+import urllib3
+from urllib3.util.retry import Retry
+
+from genedescriptions.replay import ReplayMissError, ReplayStore
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPRequestError(Exception):
+    """error raised when an HTTP request fails after all the retries"""
+    pass
+
+
+class EndpointMetrics(object):
+    """latency and failure statistics for the requests sent to an endpoint"""
+
+    def __init__(self):
+        self.num_requests = 0
+        self.num_failures = 0
+        self.num_retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add_request(self, latency: float, failed: bool, num_retries: int):
+        self.num_requests += 1
+        self.num_failures += 1 if failed else 0
+        self.num_retries += num_retries
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def get_average_latency(self) -> float:
+        return self.total_latency / self.num_requests if self.num_requests > 0 else 0.0
+
+
+class HTTPSession(object):
+    """HTTP session that reuses connections through a pool and retries failed requests with exponential backoff
+
+    The session is thread-safe and collects latency and failure metrics for each endpoint
+    """
+
+    def __init__(self, max_connections: int = 8, connect_timeout: float = 10, read_timeout: float = 60,
+                 retries: int = 3, backoff_factor: float = 0.5, verify_ssl: bool = None,
+                 replay_store: ReplayStore = None):
+        """create a new session
+
+        Args:
+            max_connections (int): maximum number of connections kept open for each host
+            connect_timeout (float): timeout in seconds to establish a connection
+            read_timeout (float): timeout in seconds to receive data from the server
+            retries (int): maximum number of retries for failed requests. Requests are retried on connection errors
+                and on responses with status 429, 500, 502, 503 and 504
+            backoff_factor (float): base of the exponential backoff between retries, in seconds. The n-th retry waits
+                backoff_factor * 2^(n - 1) seconds, or the time requested by the server through Retry-After
+            verify_ssl (bool): whether to verify SSL certificates. By default, certificates are verified only if the
+                PYTHONHTTPSVERIFY environment variable is set, as for the rest of the package
+            replay_store (ReplayStore): store used to record responses or to replay them without accessing the network
+        """
+        if verify_ssl is None:
+            verify_ssl = bool(os.environ.get('PYTHONHTTPSVERIFY', ''))
+        if not verify_ssl:
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.retry = self._create_retry(retries=retries, backoff_factor=backoff_factor)
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.pool_manager = urllib3.PoolManager(num_pools=10, maxsize=max_connections, block=True,
+                                                cert_reqs="CERT_REQUIRED" if verify_ssl else "CERT_NONE",
+                                                retries=self.retry, timeout=self.timeout)
+        self.replay_store = replay_store
+        self.metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    @staticmethod
+    def _create_retry(retries: int, backoff_factor: float) -> Retry:
+        status_forcelist = [429, 500, 502, 503, 504]
+        try:
+            return Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=status_forcelist,
+                         allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"}, raise_on_status=False)
+        except (TypeError, AttributeError):
+            # urllib3 < 1.26
+            return Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=status_forcelist,
+                         method_whitelist=Retry.DEFAULT_METHOD_WHITELIST | {"POST"}, raise_on_status=False)
+
+    def _add_request_metrics(self, endpoint_name: str, latency: float, failed: bool, num_retries: int):
+        with self._metrics_lock:
+            if endpoint_name not in self.metrics:
+                self.metrics[endpoint_name] = EndpointMetrics()
+            self.metrics[endpoint_name].add_request(latency=latency, failed=failed, num_retries=num_retries)
+
+    def request(self, method: str, url: str, endpoint_name: str, body: bytes = None,
+                headers: Dict[str, str] = None, replay_key: str = None) -> bytes:
+        """send a request and get the body of the response
+
+        Args:
+            method (str): the HTTP method
+            url (str): the url of the request
+            endpoint_name (str): the name of the endpoint under which the metrics of the request are collected
+            body (bytes): the body of the request
+            headers (Dict[str, str]): the headers of the request
+            replay_key (str): the key of the request in the replay store. Provide it when the body contains data that
+                do not identify the request, such as access tokens. By default, the key is obtained from method, url
+                and body
+
+        Returns:
+            bytes: the body of the response
+
+        Raises:
+            HTTPRequestError: if the request fails after all the retries, the response has an error status or, in
+                replay mode, the response has not been recorded
+        """
+        if self.replay_store is None:
+            return self._send_request(method=method, url=url, endpoint_name=endpoint_name, body=body, headers=headers)
+        if replay_key is None:
+            replay_key = ReplayStore.get_request_key(method=method, url=url, body=body)
+        try:
+            return self.replay_store.fetch(replay_key, lambda: self._send_request(
+                method=method, url=url, endpoint_name=endpoint_name, body=body, headers=headers))
+        except ReplayMissError as e:
+            raise HTTPRequestError(str(e)) from e
+
+    def _send_request(self, method: str, url: str, endpoint_name: str, body: bytes = None,
+                      headers: Dict[str, str] = None) -> bytes:
+        start_time = time.perf_counter()
+        num_retries = 0
+        try:
+            response = self.pool_manager.request(method, url, body=body, headers=headers)
+            if response.retries is not None:
+                num_retries = len(response.retries.history)
+            if response.status >= 400:
+                raise HTTPRequestError("request to " + url + " failed with status " + str(response.status))
+            self._add_request_metrics(endpoint_name, time.perf_counter() - start_time, False, num_retries)
+            return response.data
+        except urllib3.exceptions.HTTPError as e:
+            if isinstance(e, urllib3.exceptions.MaxRetryError):
+                num_retries = self.retry.total
+            self._add_request_metrics(endpoint_name, time.perf_counter() - start_time, True, num_retries)
+            raise HTTPRequestError("request to " + url + " failed: " + str(e)) from e
+        except HTTPRequestError:
+            self._add_request_metrics(endpoint_name, time.perf_counter() - start_time, True, num_retries)
+            raise
+
+    def log_metrics(self):
+        """log the metrics collected for each endpoint"""
+        with self._metrics_lock:
+            for endpoint_name, endpoint_metrics in sorted(self.metrics.items()):
+                logger.info("Endpoint " + endpoint_name + ": " + str(endpoint_metrics.num_requests) + " requests, " +
+                            str(endpoint_metrics.num_failures) + " failures, " + str(endpoint_metrics.num_retries) +
+                            " retries, average latency " + "{:.3f}".format(endpoint_metrics.get_average_latency()) +
+                            "s, max latency " + "{:.3f}".format(endpoint_metrics.max_latency) + "s")
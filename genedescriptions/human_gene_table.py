@@ -0,0 +1,167 @@
+import logging
+import os
+import tempfile
+import urllib.request
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from genedescriptions.replay import ReplayStore
+
+logger = logging.getLogger(__name__)
+
+
+class HumanGeneTable(object):
+    """table of human genes from HGNC, indexed by Ensembl ID
+
+    The table is downloaded once from HGNC, optionally cached in a file, and loaded lazily the first time it is
+    accessed. Data are held in columns of equal length, one per HGNC field, plus an index from Ensembl ID to row
+    """
+
+    # version of the cached file format. Increase it whenever the columns requested to HGNC change
+    VERSION = 1
+    HGNC_URL = "https://www.genenames.org/cgi-bin/download/custom?col=gd_hgnc_id&col=gd_pub_ensembl_id&" \
+               "col=gd_app_sym&col=gd_app_name&status=Approved&status=Entry%20Withdrawn&hgnc_dbtag=on&" \
+               "order_by=gd_app_sym_sort&format=text&submit=submit"
+
+    def __init__(self, cache_path: str = None, use_cache: bool = False, replay_store: ReplayStore = None):
+        """create a new table. Data are not loaded until first accessed
+
+        Args:
+            cache_path (str): path to the file where the HGNC data are cached. The version of the table is added to
+                the file name. If not provided, data are not cached
+            use_cache (bool): whether to use the cached file, if present, instead of downloading the data again
+            replay_store (ReplayStore): store used to record the HGNC data or to replay them without accessing the
+                network
+        """
+        if cache_path:
+            root, ext = os.path.splitext(cache_path)
+            cache_path = root + "_v" + str(self.VERSION) + ext
+        self.cache_path = cache_path
+        self.use_cache = use_cache
+        self.replay_store = replay_store
+        self._loaded = False
+        self._hgnc_ids = ()
+        self._ensembl_ids = ()
+        self._symbols = ()
+        self._names = ()
+        self._row_by_ensembl_id = {}
+
+    def _download(self) -> bytes:
+        logger.info("Downloading human gene data from HGNC")
+
+        def fetch_func():
+            return urllib.request.urlopen(self.HGNC_URL).read()
+
+        if self.replay_store is None:
+            return fetch_func()
+        return self.replay_store.fetch(ReplayStore.get_request_key("GET", self.HGNC_URL), fetch_func)
+
+    def _get_content(self) -> bytes:
+        if self.cache_path and self.use_cache and os.path.isfile(self.cache_path):
+            logger.debug("Reading cached human gene data from " + self.cache_path)
+            with open(self.cache_path, "rb") as cache_file:
+                return cache_file.read()
+        content = self._download()
+        if self.cache_path:
+            cache_dir = os.path.dirname(self.cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_file_path = tempfile.mkstemp(dir=cache_dir if cache_dir else None, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_file_path, self.cache_path)
+        return content
+
+    def _load(self):
+        rows = []
+        for line in self._get_content().decode("utf-8").split("\n")[1:]:
+            linearr = line.split("\t")
+            if len(linearr) > 1 and linearr[1] != "":
+                linearr[-1] = linearr[-1].strip()
+                rows.append(linearr[0:4])
+        if rows:
+            self._hgnc_ids, self._ensembl_ids, self._symbols, self._names = zip(*rows)
+        # later rows replace earlier ones with the same Ensembl ID
+        self._row_by_ensembl_id = {ensembl_id: row for row, ensembl_id in enumerate(self._ensembl_ids)}
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._row_by_ensembl_id)
+
+    def __contains__(self, ensembl_id: str):
+        self._ensure_loaded()
+        return ensembl_id in self._row_by_ensembl_id
+
+    def get_gene_props(self, ensembl_id: str) -> Tuple[str, str, str]:
+        """get the properties of a human gene
+
+        Args:
+            ensembl_id (str): the Ensembl ID of the gene
+
+        Returns:
+            Tuple[str, str, str]: HGNC ID, symbol and name of the gene, or None if the gene is not in the table
+        """
+        self._ensure_loaded()
+        row = self._row_by_ensembl_id.get(ensembl_id)
+        if row is None:
+            return None
+        return self._hgnc_ids[row], self._symbols[row], self._names[row]
+
+    def get_hgnc_id(self, ensembl_id: str) -> str:
+        """get the HGNC ID of a human gene
+
+        Args:
+            ensembl_id (str): the Ensembl ID of the gene
+
+        Returns:
+            str: the HGNC ID of the gene, or None if the gene is not in the table
+        """
+        self._ensure_loaded()
+        row = self._row_by_ensembl_id.get(ensembl_id)
+        return self._hgnc_ids[row] if row is not None else None
+
+    def get_human_gene_props(self) -> Dict[str, List[str]]:
+        """get the properties of all human genes
+
+        Returns:
+            Dict[str, List[str]]: HGNC ID, symbol and name of each human gene, indexed by Ensembl ID
+        """
+        self._ensure_loaded()
+        human_genes_props = defaultdict(list)
+        for ensembl_id, row in self._row_by_ensembl_id.items():
+            human_genes_props[ensembl_id] = [self._hgnc_ids[row], self._symbols[row], self._names[row]]
+        return human_genes_props
+
+    def get_ensembl_hgnc_ids_map(self) -> Dict[str, str]:
+        """get the map between Ensembl IDs and HGNC IDs of all human genes
+
+        Returns:
+            Dict[str, str]: the HGNC ID of each human gene, indexed by Ensembl ID
+        """
+        self._ensure_loaded()
+        return {ensembl_id: self._hgnc_ids[row] for ensembl_id, row in self._row_by_ensembl_id.items()}
+
+
+_shared_human_gene_tables = {}
+
+
+def get_shared_human_gene_table(replay_store: ReplayStore = None) -> HumanGeneTable:
+    """get a non-cached human gene table shared by all the callers in the process, so that HGNC data are downloaded at
+    most once
+
+    Args:
+        replay_store (ReplayStore): store used to record the HGNC data or to replay them
+
+    Returns:
+        HumanGeneTable: the shared table
+    """
+    table_key = (replay_store.dir_path, replay_store.mode) if replay_store is not None else None
+    if table_key not in _shared_human_gene_tables:
+        _shared_human_gene_tables[table_key] = HumanGeneTable(replay_store=replay_store)
+    return _shared_human_gene_tables[table_key]
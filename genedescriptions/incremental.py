@@ -0,0 +1,199 @@
+"""fingerprints of the input data of gene descriptions, used to regenerate only the descriptions whose inputs changed
+since a previous run"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from typing import Any, Dict, List, Tuple, Union
+
+from ontobio.assocmodel import AssociationSet
+from ontobio.ontol import Ontology
+
+from genedescriptions.array_ontology import ArrayOntology
+
+logger = logging.getLogger(__name__)
+
+
+def get_fingerprint(data: Any) -> str:
+    """get the fingerprint of a json-serializable object
+
+    Args:
+        data (Any): the object. Dictionaries are serialized with sorted keys, so that their order does not change the
+            fingerprint
+
+    Returns:
+        str: the fingerprint of the object
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode(
+        "utf-8")).hexdigest()
+
+
+def get_ontology_fingerprint(ontology: Union[Ontology, ArrayOntology]) -> str:
+    """get the fingerprint of the terms of an ontology, with their labels and relations
+
+    Args:
+        ontology (Union[Ontology, ArrayOntology]): the ontology
+
+    Returns:
+        str: the fingerprint of the ontology, or None if the ontology is None
+    """
+    if ontology is None:
+        return None
+    ontology_hash = hashlib.sha1()
+    for node_id in sorted(ontology.nodes()):
+        ontology_hash.update((node_id + "\t" + str(ontology.label(node_id)) + "\n").encode("utf-8"))
+    for edge in sorted((str(subj), str(obj), str(data.get("pred"))) for subj, obj, data in
+                       ontology.get_graph().edges(data=True)):
+        ontology_hash.update(("\t".join(edge) + "\n").encode("utf-8"))
+    return ontology_hash.hexdigest()
+
+
+def get_associations_fingerprint_data(association_set: AssociationSet, subject_id: str) -> List[List[Any]]:
+    """get the properties of the associations of a subject that are used to generate descriptions, in a canonical
+    order, to be included in a fingerprint
+
+    Args:
+        association_set (AssociationSet): the association set
+        subject_id (str): the id of the subject
+
+    Returns:
+        List[List[Any]]: term id, aspect, qualifiers, evidence code and negation of each association of the subject
+    """
+    if association_set is None or association_set.associations_by_subj is None:
+        return []
+    return sorted([[association["object"]["id"], association["aspect"], sorted(association["qualifiers"]),
+                    association["evidence"]["type"], association["negated"]] for association in
+                   association_set.associations_by_subj.get(subject_id, [])])
+
+
+class IncrementalState(object):
+    """fingerprints of the inputs of the gene descriptions written to a json file, with their stats rows, saved as a
+    sidecar file so that a later run can copy unchanged descriptions from the json file instead of generating them
+
+    Fingerprints are only comparable between runs with the same context fingerprint, which covers the inputs shared by
+    all the genes, such as configuration. Ontologies can be tracked separately through the fingerprints of their
+    snapshots, so that a new version of an ontology invalidates only the genes affected by its changes
+    """
+
+    # version of the state file format. Increase it whenever the structure of the file changes
+    VERSION = 2
+
+    def __init__(self, context_fingerprint: str, json_file_path: str = None,
+                 ontology_fingerprints: Dict[str, str] = None):
+        """create a new empty state
+
+        Args:
+            context_fingerprint (str): fingerprint of the inputs shared by all the genes
+            json_file_path (str): path to the json file containing the gene descriptions
+            ontology_fingerprints (Dict[str, str]): fingerprints of the snapshots of the ontologies, indexed by name
+        """
+        self.context_fingerprint = context_fingerprint
+        self.json_file_path = json_file_path
+        self.ontology_fingerprints = ontology_fingerprints if ontology_fingerprints else {}
+        self._genes = {}
+
+    def __contains__(self, gene_id: str):
+        return gene_id in self._genes
+
+    def __len__(self):
+        return len(self._genes)
+
+    def set_gene(self, gene_id: str, fingerprint: str, stats_row: tuple = None):
+        """set the fingerprint and the stats row of a gene description
+
+        Args:
+            gene_id (str): the gene id
+            fingerprint (str): the fingerprint of the inputs of the gene description
+            stats_row (tuple): the stats row of the gene description, as returned by DescriptionsStats.get_stats_row
+        """
+        self._genes[gene_id] = [fingerprint, [value.item() if hasattr(value, "item") else value for value in
+                                              stats_row] if stats_row is not None else None]
+
+    def get_gene(self, gene_id: str) -> Tuple[str, tuple]:
+        """get the fingerprint and the stats row of a gene description
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            Tuple[str, tuple]: the fingerprint and the stats row of the gene description, or None, None if the gene is
+                not in the state
+        """
+        if gene_id not in self._genes:
+            return None, None
+        fingerprint, stats_row = self._genes[gene_id]
+        return fingerprint, tuple(stats_row) if stats_row is not None else None
+
+    def is_compatible_with(self, other: 'IncrementalState') -> bool:
+        """check whether the fingerprints of the genes in this state can be compared with those of another state
+
+        Args:
+            other (IncrementalState): the other state
+
+        Returns:
+            bool: whether the two states have the same context fingerprint
+        """
+        return other is not None and self.context_fingerprint == other.context_fingerprint
+
+    def save(self, file_path: str):
+        """save the state to a file, replacing it atomically if it already exists
+
+        Args:
+            file_path (str): path to the state file
+        """
+        dir_path = os.path.dirname(file_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        fd, tmp_file_path = tempfile.mkstemp(dir=dir_path if dir_path else None, suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump({"version": self.VERSION, "context_fingerprint": self.context_fingerprint,
+                       "json_file_path": self.json_file_path, "ontology_fingerprints": self.ontology_fingerprints,
+                       "genes": self._genes}, tmp_file)
+        os.replace(tmp_file_path, file_path)
+
+    @staticmethod
+    def load(file_path: str) -> 'IncrementalState':
+        """load a state saved by IncrementalState.save
+
+        Args:
+            file_path (str): path to the state file
+
+        Returns:
+            IncrementalState: the state, or None if the file does not exist, cannot be read or has been saved with a
+                different version
+        """
+        if not os.path.isfile(file_path):
+            return None
+        try:
+            with open(file_path) as state_file:
+                state_dict = json.load(state_file)
+        except (OSError, ValueError) as e:
+            logger.warning("Cannot read incremental state " + file_path + ": " + str(e))
+            return None
+        if state_dict.get("version") != IncrementalState.VERSION:
+            logger.debug("Ignoring incremental state " + file_path + " saved with a different version")
+            return None
+        state = IncrementalState(context_fingerprint=state_dict["context_fingerprint"],
+                                 json_file_path=state_dict["json_file_path"],
+                                 ontology_fingerprints=state_dict["ontology_fingerprints"])
+        state._genes = state_dict["genes"]
+        return state
+
+    def load_gene_descriptions(self) -> Dict[str, Dict[str, Any]]:
+        """read the gene descriptions from the json file of the state
+
+        Returns:
+            Dict[str, Dict[str, Any]]: the gene descriptions as written in the json file, indexed by gene id. Empty if
+                the file does not exist or cannot be read, so that all the descriptions are generated again
+        """
+        if not self.json_file_path or not os.path.isfile(self.json_file_path):
+            return {}
+        try:
+            with open(self.json_file_path, encoding="utf-8") as json_file:
+                return {gene_desc_dict["gene_id"]: gene_desc_dict for gene_desc_dict in json.load(json_file)["data"]}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Cannot read the descriptions of the previous run from " + self.json_file_path + ", all "
+                           "the descriptions will be generated again: " + str(e))
+            return {}
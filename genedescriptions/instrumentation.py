@@ -0,0 +1,370 @@
+"""lightweight timers, counters and histograms to profile the generation of gene descriptions"""
+import bisect
+import functools
+import heapq
+import json
+import logging
+import threading
+import time
+
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class TimerStats(object):
+    """number of calls and elapsed times of a timed operation"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.min = elapsed if self.min is None else min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count > 0 else 0.0,
+                "min": self.min if self.min is not None else 0.0, "max": self.max}
+
+
+class Histogram(object):
+    """distribution of observed values over fixed buckets"""
+
+    DEFAULT_BOUNDARIES = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+    def __init__(self, boundaries: List[float] = None):
+        """create a new histogram
+
+        Args:
+            boundaries (List[float]): sorted upper bounds, inclusive, of the buckets. An additional bucket collects the
+                values greater than the last boundary
+        """
+        self.boundaries = boundaries if boundaries is not None else self.DEFAULT_BOUNDARIES
+        self.bucket_counts = [0] * (len(self.boundaries) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.boundaries, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = [["<=" + str(boundary), count] for boundary, count in zip(self.boundaries, self.bucket_counts)]
+        buckets.append([">" + str(self.boundaries[-1]), self.bucket_counts[-1]])
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count if self.count > 0 else 0.0,
+                "min": self.min, "max": self.max, "buckets": buckets}
+
+
+class _Timer(object):
+    __slots__ = ["collector", "name", "start"]
+
+    def __init__(self, collector, name: str):
+        self.collector = collector
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.collector.add_time(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer(object):
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation(object):
+    """collector of timers, counters and histograms
+
+    Timers measure the time spent in an operation and are used as context managers, through timer, or as decorators,
+    through timed. Counters count events, such as the number of trimmed sentences, and histograms record the
+    distribution of values, such as the number of terms of each sentence. The collector is thread-safe. When disabled,
+    nothing is recorded and timers do not read the clock
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timers = {}
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name: str):
+        """get a context manager that adds the time spent in its block to a timer
+
+        Args:
+            name (str): the name of the timer
+
+        Returns:
+            a context manager
+        """
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def timed(self, name: str = None) -> Callable:
+        """get a decorator that adds the time spent in each call of a function to a timer
+
+        Args:
+            name (str): the name of the timer. Default the qualified name of the function
+
+        Returns:
+            Callable: the decorator
+        """
+        def decorator(func):
+            timer_name = name if name is not None else func.__module__ + "." + func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add_time(timer_name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def add_time(self, name: str, elapsed: float):
+        """add the elapsed time of an operation to a timer
+
+        Args:
+            name (str): the name of the timer
+            elapsed (float): the elapsed time, in seconds
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self.timers:
+                self.timers[name] = TimerStats()
+            self.timers[name].add(elapsed)
+
+    def increment(self, name: str, value: int = 1):
+        """increment a counter
+
+        Args:
+            name (str): the name of the counter
+            value (int): the increment
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, boundaries: List[float] = None):
+        """add a value to a histogram
+
+        Args:
+            name (str): the name of the histogram
+            value (float): the value
+            boundaries (List[float]): the bucket boundaries, used only when the histogram is created
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(boundaries)
+            self.histograms[name].add(value)
+
+    def reset(self):
+        """remove all the collected data"""
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+            self.histograms = {}
+
+    def get_report(self) -> Dict[str, Any]:
+        """get the collected data
+
+        Returns:
+            Dict[str, Any]: the timers, sorted by total time, the counters and the histograms
+        """
+        with self._lock:
+            return {"timers": {name: timer.to_dict() for name, timer in sorted(
+                        self.timers.items(), key=lambda name_timer: name_timer[1].total, reverse=True)},
+                    "counters": dict(sorted(self.counters.items())),
+                    "histograms": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}}
+
+    def write_report(self, file_path: str, properties: Dict[str, Any] = None):
+        """write the collected data to a json file
+
+        Args:
+            file_path (str): the path of the file
+            properties (Dict[str, Any]): additional properties to write in the report, such as the organism
+        """
+        report = dict(properties) if properties else {}
+        report.update(self.get_report())
+        with open(file_path, "w") as report_file:
+            json.dump(report, report_file, indent=4)
+
+    def log_report(self, report_logger: logging.Logger = None, max_timers: int = 20):
+        """log a summary of the collected data
+
+        Args:
+            report_logger (logging.Logger): the logger to use. Default the logger of this module
+            max_timers (int): the maximum number of timers to log, in order of total time
+        """
+        report_logger = report_logger if report_logger is not None else logger
+        report = self.get_report()
+        for name, timer in list(report["timers"].items())[0:max_timers]:
+            report_logger.info("Timer " + name + ": " + str(timer["count"]) + " calls, total " +
+                               "{:.3f}".format(timer["total"]) + "s, mean " + "{:.6f}".format(timer["mean"]) +
+                               "s, max " + "{:.6f}".format(timer["max"]) + "s")
+        for name, value in report["counters"].items():
+            report_logger.info("Counter " + name + ": " + str(value))
+        for name, histogram in report["histograms"].items():
+            report_logger.info("Histogram " + name + ": " + str(histogram["count"]) + " values, mean " +
+                               "{:.2f}".format(histogram["mean"]) + ", max " + str(histogram["max"]))
+
+
+class GeneLatencyTracer(object):
+    """per-gene timer of the modules of the descriptions, which keeps the data of the slowest genes
+
+    For each gene, start_gene is called before generating its description, each module is timed through trace, and
+    end_gene is called when the description is complete. Only the data of the max_genes slowest genes are kept, so
+    memory usage does not depend on the number of genes. When disabled, nothing is recorded
+    """
+
+    def __init__(self, max_genes: int = 20, enabled: bool = True):
+        """create a new tracer
+
+        Args:
+            max_genes (int): the number of slowest genes to keep
+            enabled (bool): whether to record the times
+        """
+        self.max_genes = max_genes
+        self.enabled = enabled
+        self.module_timers = {}
+        self.num_genes = 0
+        self._slowest_genes = []
+        self._gene_id = None
+        self._gene_name = None
+        self._gene_module_times = {}
+
+    def start_gene(self, gene_id: str, gene_name: str = ""):
+        """start tracing a gene
+
+        Args:
+            gene_id (str): the id of the gene
+            gene_name (str): the name of the gene
+        """
+        self._gene_id = gene_id
+        self._gene_name = gene_name
+        self._gene_module_times = {}
+
+    def trace(self, module_name: str):
+        """get a context manager that adds the time spent in its block to the time of a module of the current gene
+
+        Args:
+            module_name (str): the name of the module
+
+        Returns:
+            a context manager
+        """
+        return _Timer(self, module_name) if self.enabled else _NULL_TIMER
+
+    def add_time(self, name: str, elapsed: float):
+        """add the elapsed time of a module to the current gene
+
+        Args:
+            name (str): the name of the module
+            elapsed (float): the elapsed time, in seconds
+        """
+        self._gene_module_times[name] = self._gene_module_times.get(name, 0.0) + elapsed
+
+    def end_gene(self, term_counts: Dict[str, int] = None, properties: Dict[str, Any] = None):
+        """complete the data of the current gene
+
+        Args:
+            term_counts (Dict[str, int]): the number of terms of the gene, such as the number of annotated and final
+                terms of each module
+            properties (Dict[str, Any]): additional properties of the gene to include in the report
+        """
+        if not self.enabled:
+            return
+        for module_name, elapsed in self._gene_module_times.items():
+            if module_name not in self.module_timers:
+                self.module_timers[module_name] = TimerStats()
+            self.module_timers[module_name].add(elapsed)
+        total = sum(self._gene_module_times.values())
+        gene_data = {"gene_id": self._gene_id, "gene_name": self._gene_name, "total": total,
+                     "modules": dict(self._gene_module_times), "term_counts": term_counts if term_counts else {}}
+        if properties:
+            gene_data.update(properties)
+        # the gene counter breaks ties, so that gene data are never compared
+        entry = (total, self.num_genes, gene_data)
+        if len(self._slowest_genes) < self.max_genes:
+            heapq.heappush(self._slowest_genes, entry)
+        elif self.max_genes > 0 and total > self._slowest_genes[0][0]:
+            heapq.heapreplace(self._slowest_genes, entry)
+        self.num_genes += 1
+        self._gene_module_times = {}
+
+    def get_slowest_genes(self) -> List[Dict[str, Any]]:
+        """get the data of the slowest genes
+
+        Returns:
+            List[Dict[str, Any]]: the data of the slowest genes, sorted by total time
+        """
+        return [gene_data for _, _, gene_data in sorted(self._slowest_genes, key=lambda entry: (entry[0], -entry[1]),
+                                                        reverse=True)]
+
+    def get_report(self) -> Dict[str, Any]:
+        """get the collected data
+
+        Returns:
+            Dict[str, Any]: the number of traced genes, the per-gene timers of each module and the slowest genes
+        """
+        return {"num_genes": self.num_genes,
+                "modules": {name: timer.to_dict() for name, timer in sorted(
+                    self.module_timers.items(), key=lambda name_timer: name_timer[1].total, reverse=True)},
+                "slowest_genes": self.get_slowest_genes()}
+
+    def write_report(self, file_path: str, properties: Dict[str, Any] = None):
+        """write the collected data to a json file
+
+        Args:
+            file_path (str): the path of the file
+            properties (Dict[str, Any]): additional properties to write in the report, such as the trimming algorithms
+        """
+        report = dict(properties) if properties else {}
+        report.update(self.get_report())
+        with open(file_path, "w") as report_file:
+            json.dump(report, report_file, indent=4)
+
+
+# collector shared by the modules of the package. It is disabled by default, so that timed functions only check the
+# flag before being called, and is enabled by the pipelines when profiling is requested
+instrumentation = Instrumentation(enabled=False)
+
+
+def timed(name: str = None) -> Callable:
+    """get a decorator that adds the time spent in each call of a function to a timer of the shared collector
+
+    Args:
+        name (str): the name of the timer. Default the qualified name of the function
+
+    Returns:
+        Callable: the decorator
+    """
+    return instrumentation.timed(name)
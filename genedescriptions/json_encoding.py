@@ -0,0 +1,109 @@
+import json
+import logging
+
+from enum import Enum
+from typing import Any, List, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+
+class JsonEncoderBackend(Enum):
+    AUTO = "auto"
+    ORJSON = "orjson"
+    UJSON = "ujson"
+    STDLIB = "json"
+
+
+def get_available_json_encoder_backends() -> List[JsonEncoderBackend]:
+    """get the list of json encoder backends that can be used in the current environment
+
+    Returns:
+        List[JsonEncoderBackend]: the available backends, from the fastest to the slowest
+    """
+    backends = []
+    if orjson is not None:
+        backends.append(JsonEncoderBackend.ORJSON)
+    if ujson is not None:
+        backends.append(JsonEncoderBackend.UJSON)
+    backends.append(JsonEncoderBackend.STDLIB)
+    return backends
+
+
+def resolve_json_encoder_backend(backend: JsonEncoderBackend = JsonEncoderBackend.AUTO,
+                                 indent: int = None) -> JsonEncoderBackend:
+    """get the backend to be used to encode json data
+
+    With AUTO, the fastest available backend is selected for compact output, while indented output is encoded with the
+    standard library to keep the format of the pretty-printed files unchanged. A backend that is not installed is
+    replaced by the standard library encoder, and so is orjson for indented output with an indentation other than 2
+    spaces, which orjson does not support
+
+    Args:
+        backend (JsonEncoderBackend): the requested backend
+        indent (int): the indentation level of the output, None for compact output
+
+    Returns:
+        JsonEncoderBackend: the backend to be used
+    """
+    if backend == JsonEncoderBackend.AUTO:
+        return get_available_json_encoder_backends()[0] if indent is None else JsonEncoderBackend.STDLIB
+    if backend not in get_available_json_encoder_backends():
+        logger.warning("JSON encoder " + backend.value + " is not installed, using the standard library encoder")
+        return JsonEncoderBackend.STDLIB
+    if backend == JsonEncoderBackend.ORJSON and indent is not None and indent != 2:
+        return JsonEncoderBackend.STDLIB
+    return backend
+
+
+def dumps_json(obj: Any, indent: int = None, backend: JsonEncoderBackend = JsonEncoderBackend.AUTO) -> str:
+    """encode an object to a json string
+
+    Args:
+        obj (Any): the object to encode
+        indent (int): the indentation level of the output, None for compact output. orjson only supports an
+            indentation of 2 spaces, and other indentation levels are encoded with the standard library
+        backend (JsonEncoderBackend): the encoder backend to use
+
+    Returns:
+        str: the encoded object
+    """
+    backend = resolve_json_encoder_backend(backend=backend, indent=indent)
+    if backend == JsonEncoderBackend.ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent is not None:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    elif backend == JsonEncoderBackend.UJSON:
+        return ujson.dumps(obj, indent=indent if indent is not None else 0, escape_forward_slashes=False)
+    elif indent is not None:
+        return json.dumps(obj, indent=indent)
+    else:
+        return json.dumps(obj, separators=(",", ":"))
+
+
+def dump_json(obj: Any, outfile: TextIO, indent: int = None, backend: JsonEncoderBackend = JsonEncoderBackend.AUTO):
+    """encode an object and write it to a file
+
+    Args:
+        obj (Any): the object to encode
+        outfile (TextIO): the file to write
+        indent (int): the indentation level of the output, None for compact output
+        backend (JsonEncoderBackend): the encoder backend to use
+    """
+    if indent is not None and resolve_json_encoder_backend(backend=backend, indent=indent) == \
+            JsonEncoderBackend.STDLIB:
+        # indented output is written in chunks to avoid holding the whole text in memory, while compact output is
+        # encoded in a single pass, which uses the faster C encoder of the standard library
+        json.dump(obj, outfile, indent=indent)
+    else:
+        outfile.write(dumps_json(obj, indent=indent, backend=backend))
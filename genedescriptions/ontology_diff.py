@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+
+"""compare two snapshots of an ontology and find the genes whose descriptions may change between them"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from typing import Any, Dict, Iterable, List, Set, Union
+
+from ontobio.assocmodel import AssociationSet
+from ontobio.io.assocparser import AssocParserConfig
+from ontobio.io.gafparser import GafParser
+from ontobio.assoc_factory import AssociationSetFactory
+from ontobio.ontol import Ontology
+from ontobio.ontol_factory import OntologyFactory
+
+from genedescriptions.array_ontology import ArrayOntology
+from genedescriptions.ontology_tools import set_all_depths_in_subgraph, set_all_information_content_values
+
+logger = logging.getLogger(__name__)
+
+# version of the snapshot format. Increase it whenever the properties saved for each term change
+SNAPSHOT_VERSION = 1
+
+# information content values that differ less than this are considered equal
+IC_TOLERANCE = 1e-9
+
+
+def get_ontology_snapshot(ontology: Union[Ontology, ArrayOntology]) -> Dict[str, List[Any]]:
+    """get the properties of the terms of an ontology that are used to generate descriptions
+
+    Depth and information content values are calculated if missing, as they would be during the generation of the
+    descriptions
+
+    Args:
+        ontology (Union[Ontology, ArrayOntology]): the ontology
+
+    Returns:
+        Dict[str, List[Any]]: label, sorted parent ids, depth and information content of each term, indexed by term id.
+            Empty if the ontology is None
+    """
+    if ontology is None:
+        return {}
+    roots = ontology.get_roots()
+    if any("depth" not in ontology.node(root_id) for root_id in roots):
+        for root_id in roots:
+            set_all_depths_in_subgraph(ontology=ontology, root_id=root_id, relations=None)
+    if any("IC" not in ontology.node(root_id) for root_id in roots):
+        set_all_information_content_values(ontology=ontology)
+    snapshot = {}
+    for node_id in ontology.nodes():
+        node = ontology.node(node_id)
+        snapshot[node_id] = [node.get("label"), sorted(set(ontology.parents(node_id))), node.get("depth"),
+                             node.get("IC")]
+    return snapshot
+
+
+def save_ontology_snapshot(snapshot: Dict[str, List[Any]], file_path: str):
+    """save an ontology snapshot to a json file, replacing it atomically if it already exists
+
+    Args:
+        snapshot (Dict[str, List[Any]]): the snapshot, as returned by get_ontology_snapshot
+        file_path (str): path to the snapshot file
+    """
+    dir_path = os.path.dirname(file_path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_file_path = tempfile.mkstemp(dir=dir_path if dir_path else None, suffix=".tmp")
+    with os.fdopen(fd, "w") as tmp_file:
+        json.dump({"version": SNAPSHOT_VERSION, "terms": snapshot}, tmp_file)
+    os.replace(tmp_file_path, file_path)
+
+
+def load_ontology_snapshot(file_path: str) -> Dict[str, List[Any]]:
+    """load an ontology snapshot saved by save_ontology_snapshot
+
+    Args:
+        file_path (str): path to the snapshot file
+
+    Returns:
+        Dict[str, List[Any]]: the snapshot, or None if the file does not exist or has been saved with a different
+            version
+    """
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path) as snapshot_file:
+        snapshot_dict = json.load(snapshot_file)
+    if snapshot_dict.get("version") != SNAPSHOT_VERSION:
+        logger.debug("Ignoring ontology snapshot " + file_path + " saved with a different version")
+        return None
+    return snapshot_dict["terms"]
+
+
+class OntologyDiff(object):
+    """differences between two snapshots of an ontology"""
+
+    def __init__(self, old_snapshot: Dict[str, List[Any]], new_snapshot: Dict[str, List[Any]]):
+        """compare two snapshots
+
+        Args:
+            old_snapshot (Dict[str, List[Any]]): the old snapshot, as returned by get_ontology_snapshot
+            new_snapshot (Dict[str, List[Any]]): the new snapshot, as returned by get_ontology_snapshot
+        """
+        self.added_terms = sorted(set(new_snapshot) - set(old_snapshot))
+        self.removed_terms = sorted(set(old_snapshot) - set(new_snapshot))
+        self.label_changes = {}
+        self.parents_changes = {}
+        self.depth_changes = {}
+        self.ic_changes = {}
+        for term_id in sorted(set(old_snapshot) & set(new_snapshot)):
+            old_label, old_parents, old_depth, old_ic = old_snapshot[term_id]
+            new_label, new_parents, new_depth, new_ic = new_snapshot[term_id]
+            if old_label != new_label:
+                self.label_changes[term_id] = (old_label, new_label)
+            if old_parents != new_parents:
+                self.parents_changes[term_id] = (old_parents, new_parents)
+            if old_depth != new_depth:
+                self.depth_changes[term_id] = (old_depth, new_depth)
+            if (old_ic is None) != (new_ic is None) or old_ic is not None and abs(old_ic - new_ic) > IC_TOLERANCE:
+                self.ic_changes[term_id] = (old_ic, new_ic)
+
+    def is_empty(self, include_ic_changes: bool = True) -> bool:
+        return not self.get_changed_terms(include_ic_changes=include_ic_changes)
+
+    def get_changed_terms(self, include_ic_changes: bool = True) -> Set[str]:
+        """get the terms that have been added, removed or modified
+
+        Args:
+            include_ic_changes (bool): whether to include the terms whose only change is their information content.
+                Adding or removing a leaf term changes the information content of all its ancestors, so these changes
+                usually extend to the roots of the ontology
+
+        Returns:
+            Set[str]: the ids of the changed terms
+        """
+        changed_terms = set(self.added_terms) | set(self.removed_terms) | set(self.label_changes) | \
+            set(self.parents_changes) | set(self.depth_changes)
+        if include_ic_changes:
+            changed_terms.update(self.ic_changes)
+        return changed_terms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """get the differences as a dictionary that can be serialized
+
+        Returns:
+            Dict[str, Any]: the differences
+        """
+        return {"added_terms": self.added_terms,
+                "removed_terms": self.removed_terms,
+                "label_changes": self.label_changes,
+                "parents_changes": self.parents_changes,
+                "depth_changes": self.depth_changes,
+                "ic_changes": self.ic_changes}
+
+
+def get_affected_terms(term_ids: Iterable[str], ontology: Union[Ontology, ArrayOntology]) -> Set[str]:
+    """get a set of terms together with all their descendants in an ontology
+
+    Descriptions include the common ancestors of the annotated terms, so a change to a term can affect the descriptions
+    of the genes annotated to any of its descendants
+
+    Args:
+        term_ids (Iterable[str]): the ids of the terms
+        ontology (Union[Ontology, ArrayOntology]): the ontology
+
+    Returns:
+        Set[str]: the ids of the terms and of their descendants
+    """
+    affected_terms = set(term_ids)
+    to_visit = [term_id for term_id in affected_terms if ontology is not None and ontology.has_node(term_id)]
+    while to_visit:
+        for child_id in ontology.children(to_visit.pop()):
+            if child_id not in affected_terms:
+                affected_terms.add(child_id)
+                to_visit.append(child_id)
+    return affected_terms
+
+
+def get_annotated_genes(association_set: AssociationSet, term_ids: Set[str]) -> Set[str]:
+    """get the genes annotated to any of a set of terms
+
+    Args:
+        association_set (AssociationSet): the annotations
+        term_ids (Set[str]): the ids of the terms
+
+    Returns:
+        Set[str]: the ids of the annotated genes
+    """
+    if association_set is None or association_set.associations_by_subj is None or not term_ids:
+        return set()
+    return {subject_id for subject_id, associations in association_set.associations_by_subj.items() if
+            any(association["object"]["id"] in term_ids for association in associations)}
+
+
+def get_genes_affected_by_diff(ontology_diff: OntologyDiff, ontology: Union[Ontology, ArrayOntology],
+                               association_set: AssociationSet, include_ic_changes: bool = True) -> Set[str]:
+    """get the genes whose descriptions may change because of the differences between two snapshots of an ontology
+
+    Args:
+        ontology_diff (OntologyDiff): the differences between the snapshots
+        ontology (Union[Ontology, ArrayOntology]): the new ontology
+        association_set (AssociationSet): the annotations to the new ontology
+        include_ic_changes (bool): whether to consider changes to information content, which are relevant only for
+            trimming algorithms based on it
+
+    Returns:
+        Set[str]: the ids of the affected genes
+    """
+    return get_annotated_genes(association_set, get_affected_terms(ontology_diff.get_changed_terms(
+        include_ic_changes=include_ic_changes), ontology))
+
+
+def _load_ontology(file_path: str, relations: List[str] = None) -> Ontology:
+    logger.info("Loading ontology from " + file_path)
+    ontology = OntologyFactory().create(file_path).subontology(relations=relations)
+    for root_id in ontology.get_roots():
+        set_all_depths_in_subgraph(ontology=ontology, root_id=root_id, relations=None)
+    return ontology
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two versions of an ontology and list the genes whose "
+                                                 "descriptions may change between them")
+    parser.add_argument("old_ontology", type=str,
+                        help="old ontology file, in obo or json format, or snapshot file with --snapshots")
+    parser.add_argument("new_ontology", type=str,
+                        help="new ontology file, in obo or json format, or snapshot file with --snapshots")
+    parser.add_argument("-s", "--snapshots", dest="snapshots", action="store_true", default=False,
+                        help="read the ontologies from snapshot files saved by incremental runs of the pipelines "
+                             "instead of ontology files. Without a new ontology file, changed terms are not extended "
+                             "to their descendants")
+    parser.add_argument("-n", "--new-ontology-file", dest="new_ontology_file", type=str, default=None,
+                        help="with --snapshots, new ontology file used to find the descendants of the changed terms")
+    parser.add_argument("-a", "--associations", metavar="associations", dest="associations", type=str, nargs="+",
+                        default=[], help="GAF files with the annotations to the new ontology, used to find the genes "
+                                         "affected by the changes")
+    parser.add_argument("-r", "--relations", metavar="relations", dest="relations", type=str, nargs="+",
+                        default=None, help="relations used to extract the sub-ontology, such as subClassOf "
+                                           "BFO:0000050 for GO. Default all relations")
+    parser.add_argument("-i", "--include-ic-changes", dest="include_ic_changes", action="store_true", default=False,
+                        help="consider changes to information content when finding the affected genes, as needed for "
+                             "descriptions trimmed with the ic algorithm")
+    parser.add_argument("-o", "--output-file", metavar="output_file", dest="output_file", type=str, default=None,
+                        help="json file where to write the report. Default standard output")
+    parser.add_argument("-L", "--log-level", dest="log_level", choices=['DEBUG', 'INFO', 'WARNING', 'ERROR',
+                                                                        'CRITICAL'], help="set the logging level")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+    new_ontology = None
+    if args.snapshots:
+        old_snapshot = load_ontology_snapshot(args.old_ontology)
+        new_snapshot = load_ontology_snapshot(args.new_ontology)
+        if old_snapshot is None or new_snapshot is None:
+            parser.error("invalid or outdated snapshot files")
+        if args.new_ontology_file:
+            new_ontology = _load_ontology(args.new_ontology_file, relations=args.relations)
+    else:
+        old_snapshot = get_ontology_snapshot(_load_ontology(args.old_ontology, relations=args.relations))
+        new_ontology = _load_ontology(args.new_ontology, relations=args.relations)
+        new_snapshot = get_ontology_snapshot(new_ontology)
+    ontology_diff = OntologyDiff(old_snapshot, new_snapshot)
+    affected_terms = get_affected_terms(ontology_diff.get_changed_terms(
+        include_ic_changes=args.include_ic_changes), new_ontology)
+    affected_genes = set()
+    for associations_file_path in args.associations:
+        logger.info("Loading associations from " + associations_file_path)
+        association_set = AssociationSetFactory().create_from_assocs(assocs=GafParser(config=AssocParserConfig(
+            remove_double_prefixes=True, paint=True)).parse(file=associations_file_path, skipheader=True),
+            ontology=new_ontology)
+        affected_genes.update(get_annotated_genes(association_set, affected_terms))
+    report = ontology_diff.to_dict()
+    report["num_affected_terms"] = len(affected_terms)
+    report["affected_genes"] = sorted(affected_genes)
+    logger.info(str(len(ontology_diff.get_changed_terms(include_ic_changes=args.include_ic_changes))) +
+                " changed terms, " + str(len(affected_terms)) + " affected terms, " + str(len(affected_genes)) +
+                " affected genes")
+    if args.output_file:
+        with open(args.output_file, "w") as output_file:
+            json.dump(report, output_file, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        sys.stdout.write("\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import logging
+import re
+
+from typing import Dict, List, Tuple, Union
+
+from ontobio.ontol import Ontology
+
+from genedescriptions.array_ontology import ArrayOntology
+
+logger = logging.getLogger(__name__)
+
+
+class OntologyLabelIndex(object):
+    """index from the labels, and optionally the synonyms, of the terms of an ontology to their ids
+
+    Names are first looked up as exact labels, then in normalized form, ignoring case, extra whitespace and leading
+    articles, so that names with or without the article added to expression ontology labels resolve to the same term.
+    The index reflects the labels at the time it is built and must be rebuilt if the ontology is renamed later
+    """
+
+    def __init__(self, ontology: Union[Ontology, ArrayOntology], synonyms: bool = False):
+        """build the index of an ontology
+
+        Args:
+            ontology (Union[Ontology, ArrayOntology]): the ontology to index
+            synonyms (bool): whether to index term synonyms in addition to labels. Synonyms are only looked up if no
+                label matches
+        """
+        self.ontology = ontology
+        self._ids_by_label = {}
+        self._ids_by_normalized_label = {}
+        self._ids_by_normalized_synonym = {}
+        for node_id in ontology.nodes():
+            label = ontology.label(node_id)
+            if label is None:
+                continue
+            self._ids_by_label.setdefault(label, node_id)
+            self._ids_by_normalized_label.setdefault(self.normalize(label), node_id)
+            if synonyms and isinstance(ontology, Ontology):
+                for synonym in ontology.synonyms(node_id):
+                    self._ids_by_normalized_synonym.setdefault(self.normalize(synonym.val), node_id)
+        logger.debug("Indexed " + str(len(self._ids_by_label)) + " ontology labels")
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """get the normalized form of a term name used for inexact lookups
+
+        Args:
+            name (str): the name to normalize
+
+        Returns:
+            str: the name in lower case, with single spaces between words and without leading articles
+        """
+        return re.sub(r"^(the|a|an) ", "", " ".join(name.lower().split()))
+
+    def resolve(self, name: str) -> str:
+        """get the id of the term with the given name
+
+        As in Ontology.resolve_names, names in the form prefix:id are treated as ids and returned unchanged, and names
+        containing the '%' wildcard are matched against all the labels
+
+        Args:
+            name (str): the name of the term
+
+        Returns:
+            str: the id of the term, or None if no term matches the name
+        """
+        if len(name.split(":")) == 2:
+            return name
+        if "%" in name:
+            name_regex = re.compile(name.replace("%", ".*"))
+            return next((label_id for label, label_id in self._ids_by_label.items() if name_regex.search(label)),
+                        None)
+        term_id = self._ids_by_label.get(name)
+        if term_id is None:
+            normalized_name = self.normalize(name)
+            term_id = self._ids_by_normalized_label.get(normalized_name)
+            if term_id is None:
+                term_id = self._ids_by_normalized_synonym.get(normalized_name)
+        return term_id
+
+    def resolve_names(self, names: List[str]) -> Tuple[Dict[str, str], List[str]]:
+        """get the ids of the terms with the given names
+
+        Args:
+            names (List[str]): the names of the terms
+
+        Returns:
+            Tuple[Dict[str, str], List[str]]: the ids of the resolved terms, indexed by name, and the list of names
+                that could not be resolved
+        """
+        resolved_names = {}
+        unresolved_names = []
+        for name in names:
+            term_id = self.resolve(name)
+            if term_id is not None:
+                resolved_names[name] = term_id
+            else:
+                unresolved_names.append(name)
+        return resolved_names, unresolved_names
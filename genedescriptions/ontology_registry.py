@@ -0,0 +1,60 @@
+import logging
+import threading
+
+from typing import Union
+
+from ontobio.ontol import Ontology
+
+from genedescriptions.array_ontology import ArrayOntology
+
+logger = logging.getLogger(__name__)
+
+
+class OntologyRegistry(object):
+    """registry of the ontologies loaded in a process, so that data managers that load the same ontology file with the
+    same relations and renaming rules share a single parsed instance instead of parsing the file again
+
+    Ontologies are indexed by the key returned by DataManager.get_ontology_key. Shared ontologies must not be modified
+    by the data managers after loading, except for values that are the same for all of them, such as information
+    content
+    """
+
+    def __init__(self):
+        self._ontologies = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str):
+        with self._lock:
+            return key in self._ontologies
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ontologies)
+
+    def get(self, key: str) -> Union[Ontology, ArrayOntology]:
+        """get a registered ontology
+
+        Args:
+            key (str): the key of the ontology
+
+        Returns:
+            Union[Ontology, ArrayOntology]: the ontology, or None if no ontology has been registered with the key
+        """
+        with self._lock:
+            return self._ontologies.get(key)
+
+    def register(self, key: str, ontology: Union[Ontology, ArrayOntology]):
+        """add an ontology to the registry, replacing any ontology previously registered with the same key
+
+        Args:
+            key (str): the key of the ontology
+            ontology (Union[Ontology, ArrayOntology]): the ontology
+        """
+        logger.debug("Registering ontology " + key)
+        with self._lock:
+            self._ontologies[key] = ontology
+
+    def clear(self):
+        """remove all the ontologies from the registry"""
+        with self._lock:
+            self._ontologies.clear()
@@ -2,7 +2,10 @@
 import logging
 import math
 from collections import defaultdict
-from typing import List, Tuple, Union, Set
+from typing import Iterable, List, Tuple, Union, Set
+from weakref import WeakKeyDictionary
+
+import networkx as nx
 from ontobio.ontol import Ontology
 
 
@@ -385,4 +388,82 @@ def find_set_covering(subsets: List[Tuple[str, str, Set[str]]], value: List[floa
     return included_sets
 
 
+class AncestorsBitsetIndex(object):
+    """index of the ancestors of the terms of an ontology, each represented as a bitset
+
+    Each term is assigned a bit, following a topological order of the ontology, and the set of ancestors of a term is
+    stored as an integer with the bits of the ancestors set. Ancestors are calculated once per term, when first
+    requested, so that operations on sets of terms become bitwise operations on integers
+    """
+
+    def __init__(self, ontology: Ontology):
+        self.ontology = ontology
+        try:
+            sorted_nodes = list(nx.topological_sort(ontology.get_graph()))
+        except nx.NetworkXUnfeasible:
+            sorted_nodes = list(ontology.nodes())
+        self.node_bits = {node: 1 << i for i, node in enumerate(sorted_nodes)}
+        self._ancestors_bitsets = {}
+
+    def get_node_bit(self, node: str) -> int:
+        """get the bit assigned to a term. Terms that are not in the ontology are assigned a new bit
+
+        Args:
+            node (str): the term id
+
+        Returns:
+            int: the bitset with only the bit of the term set
+        """
+        if node not in self.node_bits:
+            self.node_bits[node] = 1 << len(self.node_bits)
+        return self.node_bits[node]
+
+    def get_nodes_bitset(self, nodes: Iterable[str]) -> int:
+        """get the bitset representing a set of terms
+
+        Args:
+            nodes (Iterable[str]): the term ids
+
+        Returns:
+            int: the bitset with the bits of the terms set
+        """
+        bitset = 0
+        for node in nodes:
+            bitset |= self.get_node_bit(node)
+        return bitset
+
+    def get_ancestors_bitset(self, node: str, reflexive: bool = False) -> int:
+        """get the bitset representing the ancestors of a term
+
+        Args:
+            node (str): the term id
+            reflexive (bool): whether to include the term itself in the set
 
+        Returns:
+            int: the bitset with the bits of the ancestors set
+        """
+        if node not in self._ancestors_bitsets:
+            self._ancestors_bitsets[node] = self.get_nodes_bitset(self.ontology.ancestors(node))
+        if reflexive:
+            return self._ancestors_bitsets[node] | self.get_node_bit(node)
+        return self._ancestors_bitsets[node]
+
+
+_ancestors_bitset_indices = WeakKeyDictionary()
+
+
+def get_ancestors_bitset_index(ontology: Ontology) -> AncestorsBitsetIndex:
+    """get the ancestors bitset index of an ontology, creating it the first time it is requested
+
+    The index is shared by all the callers that use the same ontology object and it is not updated if the ontology is
+    modified after its creation
+
+    Args:
+        ontology (Ontology): the ontology
+
+    Returns:
+        AncestorsBitsetIndex: the index of the ontology
+    """
+    if ontology not in _ancestors_bitset_indices:
+        _ancestors_bitset_indices[ontology] = AncestorsBitsetIndex(ontology)
+    return _ancestors_bitset_indices[ontology]
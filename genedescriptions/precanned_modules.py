@@ -7,9 +7,11 @@ from genedescriptions.config_parser import GenedescConfigParser
 from genedescriptions.data_manager import DataManager
 from genedescriptions.descriptions_generator import OntologySentenceGenerator
 from genedescriptions.gene_description import GeneDescription
+from genedescriptions.instrumentation import timed
 from genedescriptions.sentence_generation_functions import concatenate_words_with_oxford_comma
 
 
+@timed("precanned_modules.set_gene_ontology_module")
 def set_gene_ontology_module(dm: DataManager, conf_parser: GenedescConfigParser, gene_desc: GeneDescription,
                              gene: Gene):
     go_sent_generator_exp = OntologySentenceGenerator(gene_id=gene.id, module=Module.GO, data_manager=dm,
@@ -58,6 +60,7 @@ def set_gene_ontology_module(dm: DataManager, conf_parser: GenedescConfigParser,
                                 sentence_generator_exp_only=go_sent_generator_exp)
 
 
+@timed("precanned_modules.set_disease_module")
 def set_disease_module(df: DataManager, conf_parser: GenedescConfigParser, gene_desc: GeneDescription, gene: Gene,
                        orthologs_key_diseases=None, human: bool=False):
     do_sentence_exp_generator = OntologySentenceGenerator(gene_id=gene.id,
@@ -87,6 +90,7 @@ def set_disease_module(df: DataManager, conf_parser: GenedescConfigParser, gene_
     gene_desc.set_initial_stats(module=Module.DO_ORTHOLOGY, sentence_generator=do_via_orth_sentence_generator)
 
 
+@timed("precanned_modules.set_alliance_human_orthology_module")
 def set_alliance_human_orthology_module(orthologs: List[List[str]], gene_desc: GeneDescription,
                                         excluded_orthologs: bool = False):
     """set orthology module for Alliance human orthologs
@@ -108,6 +112,7 @@ def set_alliance_human_orthology_module(orthologs: List[List[str]], gene_desc: G
         gene_desc.set_or_extend_module_description_and_final_stats(module=Module.ORTHOLOGY, description=sentence)
 
 
+@timed("precanned_modules.generate_ortholog_sentence_wormbase_human")
 def generate_ortholog_sentence_wormbase_human(orthologs: List[List[str]], human_genes_props: Dict[str, List[str]]):
     """build orthology sentence for WormBase human orthologs
 
@@ -129,6 +134,7 @@ def generate_ortholog_sentence_wormbase_human(orthologs: List[List[str]], human_
             human_genes_props[best_orth[0]]], orth_sentence
 
 
+@timed("precanned_modules.generate_ortholog_sentence_wormbase_non_c_elegans")
 def generate_ortholog_sentence_wormbase_non_c_elegans(orthologs: List[List[str]], orthologs_sp_fullname: str,
                                                       api_manager: APIManager):
     """build orthology sentence for WormBase non-human hortologs
@@ -148,13 +154,14 @@ def generate_ortholog_sentence_wormbase_non_c_elegans(orthologs: List[List[str]]
             orthologs_sp_fullname = " ".join(fullname_arr)
         if len(orthologs) > 3:
             # sort orthologs by tpc popularity and alphabetically (if tied)
-            orthologs_pop = [o_p for o_p in sorted([[ortholog, api_manager.get_textpresso_popularity(ortholog[1])] for
-                                                    ortholog in orthologs], key=lambda x: (x[1], x[0][1]),
-                                                   reverse=True)]
+            popularities = api_manager.get_textpresso_popularities([ortholog[1] for ortholog in orthologs])
+            gene_classes = api_manager.get_gene_classes([ortholog[0] for ortholog in orthologs])
+            orthologs_pop = [o_p for o_p in sorted([[ortholog, popularities[ortholog[1]]] for ortholog in orthologs],
+                                                   key=lambda x: (x[1], x[0][1]), reverse=True)]
             classes_orth_pop = defaultdict(list)
             orthologs_pop_wo_class = []
             for o_p in orthologs_pop:
-                gene_class = api_manager.get_gene_class(o_p[0][0])
+                gene_class = gene_classes[o_p[0][0]]
                 if gene_class:
                     classes_orth_pop[gene_class].append(o_p)
                 else:
@@ -0,0 +1,152 @@
+"""profilers that can be attached to the whole generation of the descriptions or to selected parts of it"""
+import cProfile
+import io
+import logging
+import pstats
+
+from enum import Enum
+from typing import List
+
+try:
+    import pyinstrument
+    from pyinstrument import renderers as pyinstrument_renderers
+except ImportError:
+    pyinstrument = None
+    pyinstrument_renderers = None
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerType(Enum):
+    OFF = "off"
+    CPROFILE = "cprofile"
+    PYINSTRUMENT = "pyinstrument"
+
+
+class ProfileScope(Enum):
+    RUN = "run"
+    GENES = "genes"
+
+
+def get_available_profiler_types() -> List[ProfilerType]:
+    """get the list of profilers that can be used in the current environment
+
+    Returns:
+        List[ProfilerType]: the available profilers
+    """
+    profiler_types = [ProfilerType.OFF, ProfilerType.CPROFILE]
+    if pyinstrument is not None:
+        profiler_types.append(ProfilerType.PYINSTRUMENT)
+    return profiler_types
+
+
+class _ProfilerContext(object):
+    __slots__ = ["profiler"]
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler.start()
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.stop()
+
+
+class Profiler(object):
+    """wrapper of cProfile or pyinstrument that can be started and stopped multiple times, so that only selected parts
+    of a run, such as the generation of the descriptions of some genes, are profiled. The data of all the profiled parts
+    are combined
+
+    cProfile output is written as a pstats file, which can be read by pstats, snakeviz or flameprof to draw flame
+    graphs, and as a text summary. pyinstrument output is written as an html report and, if supported by the installed
+    version, as a speedscope json file. With profiler type off, all the methods do nothing
+    """
+
+    def __init__(self, profiler_type: ProfilerType = ProfilerType.OFF):
+        """create a new profiler
+
+        Args:
+            profiler_type (ProfilerType): the profiler to use
+
+        Raises:
+            ValueError: if pyinstrument is requested but not installed
+        """
+        self.profiler_type = profiler_type
+        self.running = False
+        self._profiler = None
+        if profiler_type == ProfilerType.CPROFILE:
+            self._profiler = cProfile.Profile()
+        elif profiler_type == ProfilerType.PYINSTRUMENT:
+            if pyinstrument is None:
+                raise ValueError("pyinstrument profiler requested but pyinstrument is not installed")
+            self._profiler = pyinstrument.Profiler()
+
+    @property
+    def enabled(self) -> bool:
+        return self._profiler is not None
+
+    def start(self):
+        """start profiling, if not already started"""
+        if self._profiler is None or self.running:
+            return
+        if self.profiler_type == ProfilerType.CPROFILE:
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+        self.running = True
+
+    def stop(self):
+        """stop profiling, if started"""
+        if not self.running:
+            return
+        if self.profiler_type == ProfilerType.CPROFILE:
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        self.running = False
+
+    def profile(self, enabled: bool = True):
+        """get a context manager that profiles its block
+
+        Args:
+            enabled (bool): whether to profile the block
+
+        Returns:
+            a context manager
+        """
+        return _ProfilerContext(self if enabled else Profiler())
+
+    def write(self, file_path_prefix: str, max_text_lines: int = 100) -> List[str]:
+        """write the collected profile
+
+        Args:
+            file_path_prefix (str): path of the files to write, without extension
+            max_text_lines (int): the maximum number of functions in the text summary of cProfile data
+
+        Returns:
+            List[str]: the paths of the files written
+        """
+        self.stop()
+        file_paths = []
+        if self.profiler_type == ProfilerType.CPROFILE:
+            file_paths.append(file_path_prefix + ".pstats")
+            self._profiler.dump_stats(file_paths[-1])
+            text_stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=text_stream).sort_stats("cumulative").print_stats(max_text_lines)
+            file_paths.append(file_path_prefix + ".txt")
+            with open(file_paths[-1], "w") as text_file:
+                text_file.write(text_stream.getvalue())
+        elif self.profiler_type == ProfilerType.PYINSTRUMENT:
+            if self._profiler.last_session is None:
+                logger.warning("No profiling data collected")
+                return file_paths
+            file_paths.append(file_path_prefix + ".html")
+            with open(file_paths[-1], "w") as html_file:
+                html_file.write(self._profiler.output_html())
+            if hasattr(pyinstrument_renderers, "SpeedscopeRenderer"):
+                file_paths.append(file_path_prefix + ".speedscope.json")
+                with open(file_paths[-1], "w") as speedscope_file:
+                    speedscope_file.write(self._profiler.output(pyinstrument_renderers.SpeedscopeRenderer()))
+        return file_paths
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from enum import Enum
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMode(Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class ReplayMissError(Exception):
+    """error raised in replay mode when a response has not been recorded"""
+    pass
+
+
+class ReplayStore(object):
+    """record the responses of external services (HGNC, Textpresso, WormBase REST) to a directory and replay them
+    deterministically without accessing the network
+
+    Each response is stored as a separate file named after the hash of its request key, together with a small json
+    file with the details of the request, so that a snapshot can be inspected and shared as a plain directory
+    """
+
+    def __init__(self, dir_path: str, mode: ReplayMode = ReplayMode.OFF):
+        """create a new store
+
+        Args:
+            dir_path (str): the directory where responses are recorded
+            mode (ReplayMode): OFF to always fetch responses from the network, RECORD to fetch them and save them in
+                the store, REPLAY to read them from the store only
+        """
+        self.dir_path = dir_path
+        self.mode = mode
+        if self.mode == ReplayMode.RECORD:
+            os.makedirs(self.dir_path, exist_ok=True)
+
+    @staticmethod
+    def get_request_key(method: str, url: str, body: bytes = None) -> str:
+        """get the key that identifies a request in the store
+
+        Args:
+            method (str): the HTTP method of the request
+            url (str): the url of the request
+            body (bytes): the body of the request
+
+        Returns:
+            str: the key of the request
+        """
+        key = method.upper() + " " + url
+        if body:
+            key += " " + hashlib.sha256(body).hexdigest()
+        return key
+
+    def _get_response_file_path(self, request_key: str) -> str:
+        return os.path.join(self.dir_path, hashlib.sha256(request_key.encode("utf-8")).hexdigest() + ".bin")
+
+    def has_response(self, request_key: str) -> bool:
+        return os.path.isfile(self._get_response_file_path(request_key))
+
+    def load_response(self, request_key: str) -> bytes:
+        """read a recorded response
+
+        Args:
+            request_key (str): the key of the request
+
+        Returns:
+            bytes: the recorded response
+
+        Raises:
+            ReplayMissError: if the response has not been recorded
+        """
+        try:
+            with open(self._get_response_file_path(request_key), "rb") as response_file:
+                return response_file.read()
+        except FileNotFoundError:
+            raise ReplayMissError("no recorded response in " + self.dir_path + " for request " + request_key)
+
+    def save_response(self, request_key: str, response: bytes):
+        """record a response, replacing any previous response for the same request
+
+        Args:
+            request_key (str): the key of the request
+            response (bytes): the response to record
+        """
+        response_file_path = self._get_response_file_path(request_key)
+        # write to a temporary file first so that concurrent readers never see partial responses
+        fd, tmp_file_path = tempfile.mkstemp(dir=self.dir_path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(response)
+        os.replace(tmp_file_path, response_file_path)
+        with open(response_file_path[0:-4] + ".json", "w") as info_file:
+            json.dump({"request": request_key, "size": len(response), "timestamp": time.time()}, info_file)
+
+    def fetch(self, request_key: str, fetch_func: Callable[[], bytes]) -> bytes:
+        """get the response of a request according to the mode of the store
+
+        Args:
+            request_key (str): the key of the request, as returned by get_request_key or any other string that uniquely
+                identifies the request
+            fetch_func (Callable[[], bytes]): function that sends the request and returns its response. It is not
+                called in replay mode
+
+        Returns:
+            bytes: the response of the request
+
+        Raises:
+            ReplayMissError: if the store is in replay mode and the response has not been recorded
+        """
+        if self.mode == ReplayMode.REPLAY:
+            logger.debug("Replaying response for request " + request_key)
+            return self.load_response(request_key)
+        response = fetch_func()
+        if self.mode == ReplayMode.RECORD:
+            logger.debug("Recording response for request " + request_key)
+            self.save_response(request_key, response)
+        return response
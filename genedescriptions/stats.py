@@ -1,8 +1,12 @@
+from collections import OrderedDict
+from operator import attrgetter
 from typing import List
 
 import numpy as np
 
 from genedescriptions.data_manager import DataManager
+from genedescriptions.instrumentation import timed
+from genedescriptions.ontology_tools import get_ancestors_bitset_index
 
 
 class SingleDescStats(object):
@@ -49,16 +53,20 @@ class SingleDescStats(object):
 
     @staticmethod
     def _get_num_covered_nodes(set_initial_terms, set_final_terms, ontology):
-        num_covered_nodes = 0
-        final_t_ancestors = {final_term: ontology.ancestors(final_term) for final_term in set_final_terms}
-        for initial_term in set_initial_terms:
-            initial_t_ancestors = set(ontology.ancestors(initial_term, reflexive=True))
-            for final_term in set_final_terms:
-                if final_term in initial_t_ancestors or initial_term in final_t_ancestors[final_term]:
-                    num_covered_nodes += 1
-                    break
-        return num_covered_nodes
+        if not set_initial_terms or not set_final_terms:
+            return 0
+        ancestors_index = get_ancestors_bitset_index(ontology)
+        final_terms_bitset = ancestors_index.get_nodes_bitset(set_final_terms)
+        final_terms_ancestors_bitset = 0
+        for final_term in set_final_terms:
+            final_terms_ancestors_bitset |= ancestors_index.get_ancestors_bitset(final_term)
+        # an initial term is covered if one of the final terms is the term itself or one of its ancestors or
+        # descendants
+        return sum(1 for initial_term in set_initial_terms if
+                   ancestors_index.get_ancestors_bitset(initial_term, reflexive=True) & final_terms_bitset or
+                   ancestors_index.get_node_bit(initial_term) & final_terms_ancestors_bitset)
 
+    @timed("stats.single_desc_stats")
     def calculate_stats(self, data_manager: DataManager = None):
         self.num_final_experimental_go_ids_f = len(self.set_final_experimental_go_ids_f)
         self.num_final_experimental_go_ids_p = len(self.set_final_experimental_go_ids_p)
@@ -93,6 +101,19 @@ class SingleDescStats(object):
             self.coverage_percentage = (go_num_covered_terms + do_num_covered_terms + exp_num_covered_terms) / \
                                        num_initial_terms if num_initial_terms > 0 else 0
 
+    def to_dict(self, include_extra_info: bool = False):
+        """get the stats as a dictionary that can be serialized, without modifying the object
+
+        Args:
+            include_extra_info (bool): whether to include the sets of term ids used to calculate the stats, which are
+                removed by delete_extra_info
+
+        Returns:
+            Dict[str, Any]: the stats of the gene description
+        """
+        return OrderedDict([(key, value) for key, value in vars(self).items() if include_extra_info or
+                            not key.startswith("set_")])
+
     def delete_extra_info(self):
         del self.set_final_experimental_go_ids_f
         del self.set_final_experimental_go_ids_p
@@ -111,7 +132,38 @@ class SingleDescStats(object):
 
 
 class DescriptionsStats(object):
-    """overall statistics for a set of gene descriptions"""
+    """overall statistics for a set of gene descriptions
+
+    Stats rows added one at a time are only accumulated in column sums, and the stats fields are set from the sums when
+    the stats are serialized through to_dict or calculated through calculate_stats
+    """
+
+    # description fields for which the number of genes with non null value is counted
+    NON_NULL_COUNTED_FIELDS = ["description", "go_description", "go_function_description", "go_process_description",
+                               "go_component_description", "do_description", "do_experimental_description",
+                               "do_biomarker_description", "do_orthology_description", "tissue_expression_description",
+                               "gene_expression_cluster_description", "molecule_expression_cluster_description",
+                               "anatomy_expression_cluster_description", "protein_domain_description",
+                               "human_gene_function_description", "sister_species_description",
+                               "orthology_description"]
+    _get_non_null_counted_fields = attrgetter(*NON_NULL_COUNTED_FIELDS)
+    # description fields for which the number of genes with null value is counted
+    NULL_COUNTED_FIELDS = ["go_description", "do_description", "orthology_description"]
+    # counters, in the order of the counter columns of the stats rows
+    COUNTER_STATS = ["total_number_of_genes", *["number_genes_with_non_null_" + field for field in
+                                                NON_NULL_COUNTED_FIELDS],
+                     *["number_genes_with_null_" + field for field in NULL_COUNTED_FIELDS],
+                     "number_genes_with_more_than_3_initial_go_terms", "number_genes_with_more_than_3_initial_do_terms",
+                     "number_genes_with_final_do_terms_covering_multiple_initial_terms",
+                     "number_genes_with_more_than_3_best_orthologs"]
+    # averages, in the order of the value and condition columns of the stats rows
+    AVERAGE_STATS = ["average_number_initial_go_terms_f", "average_number_initial_go_terms_p",
+                     "average_number_initial_go_terms_c", "average_number_go_annotations",
+                     "average_number_final_go_terms_f", "average_number_final_go_terms_p",
+                     "average_number_final_go_terms_c", "average_number_initial_do_terms",
+                     "average_number_final_do_terms", "average_number_do_annotations", "average_number_orthologs",
+                     "average_term_level", "average_term_coverage", "average_term_level_trimmed",
+                     "average_term_coverage_trimmed"]
 
     def __init__(self):
         self.total_number_of_genes = 0
@@ -154,109 +206,119 @@ class DescriptionsStats(object):
         self.average_term_level = 0
         self.average_term_level_trimmed = 0
         self.average_term_coverage_trimmed = 0
+        # column sums of the stats rows added so far, with average values summed only where their condition is met
+        self._stats_rows_sums = [0] * (len(self.COUNTER_STATS) + 2 * len(self.AVERAGE_STATS))
+        self._stats_outdated = False
 
-    @staticmethod
-    def _get_average_num_items_in_list_of_sets(set_var_name, desc_var_name, gene_descriptions):
-        size_arr = [len(getattr(gene_desc.stats, set_var_name)) for gene_desc in gene_descriptions if
-                    getattr(gene_desc, desc_var_name) is not None]
-        return np.average(size_arr) if len(size_arr) > 0 else 0
+    def to_dict(self):
+        """get the overall stats as a dictionary that can be serialized
 
-    @staticmethod
-    def _get_average(var_name, desc_var_names: List[str], gene_descriptions):
-        clean_num_arr = [getattr(gene_desc.stats, var_name) for gene_desc in gene_descriptions if
-                         any([getattr(gene_desc, desc_var_name) for desc_var_name in desc_var_names])]
-        return np.average(clean_num_arr) if len(clean_num_arr) > 0 else 0
+        Returns:
+            Dict[str, Any]: the overall stats
+        """
+        if self._stats_outdated:
+            self._set_stats_from_sums()
+        return {key: value for key, value in vars(self).items() if not key.startswith("_")}
 
     @staticmethod
-    def _get_average_for_trimmed_terms(var_name, gene_descriptions):
-        clean_num_arr = [getattr(gene_desc.stats, var_name) for gene_desc in gene_descriptions if
-                         gene_desc.stats.trimmed]
-        return np.average(clean_num_arr) if len(clean_num_arr) > 0 else 0
+    def get_stats_row(gene_desc) -> tuple:
+        """get the values of a gene description that contribute to the overall stats
 
-    @staticmethod
-    def _get_num_genes(gene_descriptions, desc_field_name: str, empty_desc: bool = False):
-        return len([gene_desc for gene_desc in gene_descriptions if empty_desc and getattr(gene_desc, desc_field_name)
-                    is None or not empty_desc and getattr(gene_desc, desc_field_name) is not None])
+        The row contains one column per counter, set to 1 if the gene is counted, followed by the values and the
+        conditions (1 if the value is included in the average) of the averages. Single gene stats of the description
+        must be calculated before getting its row
+
+        Args:
+            gene_desc (GeneDescription): the gene description
+
+        Returns:
+            tuple: the stats row of the gene description
+        """
+        stats = gene_desc.stats
+        go_desc = bool(gene_desc.go_description)
+        do_desc = bool(gene_desc.do_description)
+        go_not_none = gene_desc.go_description is not None
+        do_not_none = gene_desc.do_description is not None
+        any_ontology_desc = go_desc or do_desc or bool(gene_desc.tissue_expression_description)
+        num_initial_do_ids = len(stats.set_initial_do_ids)
+        num_best_orthologs = len(stats.set_best_orthologs)
+        return (True, *[value is not None for value in DescriptionsStats._get_non_null_counted_fields(gene_desc)],
+                gene_desc.go_description is None, gene_desc.do_description is None,
+                gene_desc.orthology_description is None,
+                stats.num_initial_go_ids_f > 3 or stats.num_initial_go_ids_p > 3 or stats.num_initial_go_ids_c > 3,
+                num_initial_do_ids > 3, stats.number_final_do_term_covering_multiple_initial_do_terms > 0,
+                num_best_orthologs > 3,
+                # values of the averages
+                stats.num_initial_go_ids_f, stats.num_initial_go_ids_p, stats.num_initial_go_ids_c,
+                stats.total_number_go_annotations, len(stats.set_final_go_ids_f), len(stats.set_final_go_ids_p),
+                len(stats.set_final_go_ids_c), num_initial_do_ids, len(stats.set_final_do_ids),
+                stats.total_number_do_annotations, num_best_orthologs, stats.average_terms_level,
+                stats.coverage_percentage, stats.average_terms_level, stats.coverage_percentage,
+                # conditions of the averages
+                go_desc, go_desc, go_desc, go_desc, go_not_none, go_not_none, go_not_none, do_not_none, do_not_none,
+                do_desc, gene_desc.orthology_description is not None, any_ontology_desc, any_ontology_desc,
+                stats.trimmed, stats.trimmed)
+
+    def _set_stats_from_sums(self):
+        num_counters = len(self.COUNTER_STATS)
+        num_averages = len(self.AVERAGE_STATS)
+        for stat_name, counter_sum in zip(self.COUNTER_STATS, self._stats_rows_sums[0:num_counters]):
+            setattr(self, stat_name, int(counter_sum))
+        for stat_name, average_sum, average_count in zip(
+                self.AVERAGE_STATS, self._stats_rows_sums[num_counters:num_counters + num_averages],
+                self._stats_rows_sums[num_counters + num_averages:]):
+            setattr(self, stat_name, average_sum / average_count if average_count > 0 else 0)
+        self._stats_outdated = False
+
+    def add_stats_rows(self, stats_rows: List[tuple]):
+        """update the overall stats with the stats rows of a set of gene descriptions, using vectorized column sums
+
+        Args:
+            stats_rows (List[tuple]): the stats rows of the gene descriptions, as returned by get_stats_row
+        """
+        if len(stats_rows) == 0:
+            return
+        num_counters = len(self.COUNTER_STATS)
+        num_averages = len(self.AVERAGE_STATS)
+        stats_rows = np.array(stats_rows, dtype=float)
+        stats_rows[:, num_counters:num_counters + num_averages] *= stats_rows[:, num_counters + num_averages:]
+        self._stats_rows_sums = [prev_sum + new_sum for prev_sum, new_sum in
+                                 zip(self._stats_rows_sums, stats_rows.sum(axis=0).tolist())]
+        self._stats_outdated = True
+
+    def add_stats_row(self, stats_row: tuple):
+        """update the overall stats with the stats row of a single gene description
+
+        Args:
+            stats_row (tuple): the stats row of the gene description, as returned by get_stats_row
+        """
+        num_counters = len(self.COUNTER_STATS)
+        num_averages = len(self.AVERAGE_STATS)
+        for i in range(num_counters):
+            self._stats_rows_sums[i] += stats_row[i]
+        for i in range(num_counters, num_counters + num_averages):
+            if stats_row[i + num_averages]:
+                self._stats_rows_sums[i] += stats_row[i]
+                self._stats_rows_sums[i + num_averages] += 1
+        self._stats_outdated = True
+
+    def add_gene_desc(self, gene_desc):
+        """update the overall stats with the data of a single gene description
+
+        This is the incremental version of calculate_stats, which allows the stats to be computed without keeping all
+        the gene descriptions in memory. The single gene stats of the description must be calculated before it is added
+
+        Args:
+            gene_desc (GeneDescription): the gene description to add
+        """
+        self.add_stats_row(self.get_stats_row(gene_desc))
 
+    @timed("stats.descriptions_stats")
     def calculate_stats(self, gene_descriptions):
         """calculate overall stats and populate fields"""
-        self.total_number_of_genes = len(gene_descriptions)
-        self.average_number_initial_go_terms_f = self._get_average("num_initial_go_ids_f", ["go_description"],
-                                                                   gene_descriptions)
-        self.average_number_initial_go_terms_p = self._get_average("num_initial_go_ids_p", ["go_description"],
-                                                                   gene_descriptions)
-        self.average_number_initial_go_terms_c = self._get_average("num_initial_go_ids_c", ["go_description"],
-                                                                   gene_descriptions)
-        self.average_number_final_go_terms_f = self._get_average_num_items_in_list_of_sets(
-            "set_final_go_ids_f", "go_description", gene_descriptions)
-        self.average_number_final_go_terms_p = self._get_average_num_items_in_list_of_sets(
-            "set_final_go_ids_p", "go_description", gene_descriptions)
-        self.average_number_final_go_terms_c = self._get_average_num_items_in_list_of_sets(
-            "set_final_go_ids_c", "go_description", gene_descriptions)
-        self.average_number_initial_do_terms = self._get_average_num_items_in_list_of_sets(
-            "set_initial_do_ids", "do_description", gene_descriptions)
-        self.average_number_final_do_terms = self._get_average_num_items_in_list_of_sets(
-            "set_final_do_ids", "do_description", gene_descriptions)
-        self.number_genes_with_non_null_description = self._get_num_genes(gene_descriptions, "description")
-        self.number_genes_with_non_null_go_description = self._get_num_genes(gene_descriptions, "go_description")
-        self.number_genes_with_null_go_description = self._get_num_genes(gene_descriptions, "go_description", True)
-        self.number_genes_with_non_null_go_function_description = self._get_num_genes(gene_descriptions,
-                                                                                      "go_function_description")
-        self.number_genes_with_non_null_go_process_description = self._get_num_genes(gene_descriptions,
-                                                                                     "go_process_description")
-        self.number_genes_with_non_null_go_component_description = self._get_num_genes(gene_descriptions,
-                                                                                       "go_component_description")
-        self.number_genes_with_more_than_3_initial_go_terms = \
-            len([gene_desc for gene_desc in gene_descriptions if gene_desc.stats.num_initial_go_ids_f > 3 or
-                 gene_desc.stats.num_initial_go_ids_p > 3 or gene_desc.stats.num_initial_go_ids_c > 3])
-        self.number_genes_with_non_null_do_description = self._get_num_genes(gene_descriptions, "do_description")
-        self.number_genes_with_null_do_description = self._get_num_genes(gene_descriptions, "do_description", True)
-        self.number_genes_with_non_null_do_experimental_description = self._get_num_genes(gene_descriptions,
-                                                                                          "do_experimental_description")
-        self.number_genes_with_non_null_do_biomarker_description = self._get_num_genes(gene_descriptions,
-                                                                                       "do_biomarker_description")
-        self.number_genes_with_non_null_do_orthology_description = self._get_num_genes(gene_descriptions,
-                                                                                       "do_orthology_description")
-        self.number_genes_with_non_null_tissue_expression_description = self._get_num_genes(
-            gene_descriptions, "tissue_expression_description")
-        self.number_genes_with_non_null_gene_expression_cluster_description = self._get_num_genes(
-            gene_descriptions, "gene_expression_cluster_description")
-        self.number_genes_with_non_null_molecule_expression_cluster_description = self._get_num_genes(
-            gene_descriptions, "molecule_expression_cluster_description")
-        self.number_genes_with_non_null_anatomy_expression_cluster_description = self._get_num_genes(
-            gene_descriptions, "anatomy_expression_cluster_description")
-        self.number_genes_with_non_null_protein_domain_description = self._get_num_genes(
-            gene_descriptions, "protein_domain_description")
-        self.number_genes_with_non_null_human_gene_function_description = self._get_num_genes(
-            gene_descriptions, "human_gene_function_description")
-        self.number_genes_with_non_null_sister_species_description = self._get_num_genes(gene_descriptions,
-                                                                                         "sister_species_description")
-        self.number_genes_with_more_than_3_initial_do_terms = \
-            len([gene_desc for gene_desc in gene_descriptions if len(gene_desc.stats.set_initial_do_ids) > 3])
-        self.number_genes_with_final_do_terms_covering_multiple_initial_terms = \
-            len([gene_desc for gene_desc in gene_descriptions if
-                 gene_desc.stats.number_final_do_term_covering_multiple_initial_do_terms > 0])
-        self.average_number_go_annotations = self._get_average("total_number_go_annotations",
-                                                               ["go_description"], gene_descriptions)
-        self.average_number_do_annotations = self._get_average("total_number_do_annotations", ["do_description"],
-                                                               gene_descriptions)
-        self.number_genes_with_more_than_3_best_orthologs = \
-            len([gene_desc for gene_desc in gene_descriptions if len(gene_desc.stats.set_best_orthologs) > 3])
-        self.number_genes_with_non_null_orthology_description = self._get_num_genes(gene_descriptions,
-                                                                                    "orthology_description")
-        self.number_genes_with_null_orthology_description = self._get_num_genes(gene_descriptions,
-                                                                                "orthology_description", True)
-        self.average_number_orthologs = self._get_average_num_items_in_list_of_sets(
-            "set_best_orthologs", "orthology_description", gene_descriptions)
-        self.average_term_level = self._get_average("average_terms_level", ["go_description", "do_description",
-                                                                            "tissue_expression_description"],
-                                                    gene_descriptions)
-        self.average_term_level_trimmed = self._get_average_for_trimmed_terms("average_terms_level", gene_descriptions)
-        self.average_term_coverage = self._get_average("coverage_percentage", ["go_description", "do_description",
-                                                                               "tissue_expression_description"],
-                                                       gene_descriptions)
-        self.average_term_coverage_trimmed = self._get_average_for_trimmed_terms("coverage_percentage",
-                                                                                 gene_descriptions)
+        self._stats_rows_sums = [0] * len(self._stats_rows_sums)
+        self.add_stats_rows([self.get_stats_row(gene_desc) for gene_desc in gene_descriptions])
+        self._set_stats_from_sums()
 
 
 class DescriptionsOverallProperties(object):
@@ -0,0 +1,99 @@
+import logging
+import re
+
+from typing import Dict, Tuple
+
+from ontobio.ontol import Ontology
+
+logger = logging.getLogger(__name__)
+
+# patterns that cannot be merged into a single alternation without changing their meaning: backreferences, which
+# depend on group numbers, named groups, which must be unique, and global inline flags, which must be at the start of
+# the expression
+_UNMERGEABLE_PATTERN_REGEX = re.compile(r"\\[1-9]|\(\?P[<=]|^\(\?[aiLmsux]+\)")
+
+
+class TermsRenamer(object):
+    """rename terms by applying a sequence of regular expression substitutions
+
+    All the expressions are compiled once and merged into a single matcher used as a prefilter, so that names that
+    are not affected by any rule are checked in a single search. The substitutions are applied in the order of the
+    rules, each one to the result of the previous ones, as if each rule was applied separately to all the names
+    """
+
+    def __init__(self, terms_replacement_regex: Dict[str, str] = None):
+        """create a new renamer
+
+        Args:
+            terms_replacement_regex (Dict[str, str]): a dictionary containing the regular expressions to be applied for
+                renaming terms. Each key must be a regular expression to search for terms and the associated value
+                another regular expression that defines the final result
+        """
+        self._rules = [(re.compile(regex_to_substitute), regex_target) for regex_to_substitute, regex_target in
+                       (terms_replacement_regex or {}).items()]
+        mergeable_patterns = []
+        self._unmergeable_rules = []
+        for rule in self._rules:
+            if _UNMERGEABLE_PATTERN_REGEX.search(rule[0].pattern):
+                self._unmergeable_rules.append(rule)
+            else:
+                mergeable_patterns.append("(?:" + self._get_prefilter_pattern(rule[0].pattern) + ")")
+        self._prefilter = None
+        if mergeable_patterns:
+            try:
+                self._prefilter = re.compile("|".join(mergeable_patterns))
+            except re.error:
+                logger.debug("Renaming rules cannot be merged, checking them separately")
+                self._unmergeable_rules = self._rules
+
+    @staticmethod
+    def _get_prefilter_pattern(pattern: str) -> str:
+        # leading and trailing unconstrained wildcards do not change whether a pattern is found in a name, but make the
+        # merged expression backtrack over the whole name for each rule
+        pattern = re.sub(r"^(?:\(\.\*\)|\.\*)(?=[^*+?{])", "", pattern)
+        return re.sub(r"(?<=.)(?<!\\)(?:\(\.\*\)|\.\*)$", "", pattern)
+
+    def _may_rename(self, name: str) -> bool:
+        # a name that does not match any rule is never renamed, since no rule changes it
+        if self._prefilter is not None and self._prefilter.search(name):
+            return True
+        return any(rule[0].search(name) for rule in self._unmergeable_rules)
+
+    def rename(self, name: str) -> str:
+        """apply the renaming rules to a name
+
+        Args:
+            name (str): the name to rename
+
+        Returns:
+            str: the renamed name, or the name itself if no rule applies to it
+        """
+        if not self._may_rename(name):
+            return name
+        for regex_to_substitute, regex_target in self._rules:
+            name = regex_to_substitute.sub(regex_target, name)
+        return name
+
+    def rename_ontology_terms(self, ontology: Ontology) -> Dict[str, Tuple[str, str]]:
+        """rename the labels of the terms of an ontology in place, in a single pass over its nodes
+
+        Args:
+            ontology (Ontology): the ontology containing the terms to be renamed
+
+        Returns:
+            Dict[str, Tuple[str, str]]: the old and new labels of the renamed terms, indexed by term id
+        """
+        renamed_terms = {}
+        if not self._rules:
+            return renamed_terms
+        for node_id in ontology.nodes():
+            node = ontology.node(node_id)
+            label = node.get("label")
+            if label is None:
+                continue
+            new_label = self.rename(label)
+            if new_label != label:
+                node["label"] = new_label
+                renamed_terms[node_id] = (label, new_label)
+        logger.debug("Renamed " + str(len(renamed_terms)) + " ontology terms")
+        return renamed_terms
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from genedescriptions.api_cache import APICache
+from genedescriptions.api_manager import APIManager
+from genedescriptions.replay import ReplayMode, ReplayStore
+
+logger = logging.getLogger("API Manager tests")
+
+
+class MockAPIRequestHandler(BaseHTTPRequestHandler):
+    """mock of Textpresso Central and WormBase REST APIs. Popularity is the length of the keyword and genes with an
+    even id have class 'cls-<id>'. Gene class requests for WBGeneError and popularity requests for tpc-error always
+    fail, while gene class requests for WBGeneFlaky2 fail twice before succeeding"""
+
+    requests_count = Counter()
+
+    def _send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8"))
+        self.requests_count["tpc:" + query["query"]["keywords"]] += 1
+        if query["query"]["keywords"] == "tpc-error":
+            self.send_error(503)
+        else:
+            self._send_json(len(query["query"]["keywords"]))
+
+    def do_GET(self):
+        gene_id = self.path.split("/")[-2]
+        self.requests_count["class:" + gene_id] += 1
+        if gene_id == "WBGeneError" or gene_id == "WBGeneFlaky2" and \
+                self.requests_count["class:" + gene_id] <= 2:
+            self.send_error(503)
+        elif int(gene_id[-1]) % 2 == 0:
+            self._send_json({"gene_class": {"data": {"tag": {"label": "cls-" + gene_id}}}})
+        else:
+            self._send_json({"gene_class": {"data": None}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestAPIManager(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), MockAPIRequestHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        logger.info("Starting API Manager tests")
+        MockAPIRequestHandler.requests_count.clear()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.cache_dir.name, "api_cache.sqlite")
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def get_api_manager(self, cache_path=None, cache_ttl_days=30, retries=0, replay_store=None):
+        api_manager = APIManager(textpresso_api_token="token", cache_path=cache_path, cache_ttl_days=cache_ttl_days,
+                                 max_workers=4, timeout=5, retries=retries, backoff_factor=0.01,
+                                 replay_store=replay_store)
+        server_url = "http://127.0.0.1:" + str(self.server.server_port)
+        api_manager.tpc_api_endpoint = server_url + "/v1/textpresso/api/get_documents_count"
+        api_manager.wb_rest_api_endpoint = server_url + "/rest/field/gene/"
+        return api_manager
+
+    def test_batched_requests_are_deduplicated(self):
+        api_manager = self.get_api_manager()
+        popularities = api_manager.get_textpresso_popularities(["unc-22", "lin-3", "unc-22", "daf-16a"])
+        self.assertEqual(popularities, {"unc-22": 6, "lin-3": 5, "daf-16a": 7})
+        self.assertEqual(api_manager.get_textpresso_popularity("lin-3"), 5)
+        self.assertEqual(MockAPIRequestHandler.requests_count["tpc:unc-22"], 1)
+        self.assertEqual(MockAPIRequestHandler.requests_count["tpc:lin-3"], 1)
+        gene_classes = api_manager.get_gene_classes(["WBGene00000002", "WBGene00000003", "WBGene00000002"])
+        self.assertEqual(gene_classes, {"WBGene00000002": "cls-WBGene00000002", "WBGene00000003": None})
+        self.assertEqual(api_manager.get_gene_class("WBGene00000003"), None)
+        self.assertEqual(MockAPIRequestHandler.requests_count["class:WBGene00000003"], 1)
+
+    def test_failed_gene_class_requests_are_not_cached(self):
+        api_manager = self.get_api_manager(cache_path=self.cache_path)
+        self.assertEqual(api_manager.get_gene_class("WBGeneError"), None)
+        self.assertEqual(api_manager.get_gene_class("WBGeneError"), None)
+        self.assertEqual(MockAPIRequestHandler.requests_count["class:WBGeneError"], 2)
+
+    def test_failed_textpresso_requests_are_not_cached(self):
+        api_manager = self.get_api_manager(cache_path=self.cache_path)
+        self.assertEqual(api_manager.get_textpresso_popularities(["tpc-error", "unc-22"]), {"tpc-error": 0,
+                                                                                             "unc-22": 6})
+        self.assertEqual(api_manager.get_textpresso_popularity("tpc-error"), 0)
+        self.assertEqual(MockAPIRequestHandler.requests_count["tpc:tpc-error"], 2)
+
+    def test_persistent_cache_across_instances(self):
+        api_manager = self.get_api_manager(cache_path=self.cache_path)
+        api_manager.get_textpresso_popularities(["unc-22", "lin-3"])
+        api_manager.get_gene_classes(["WBGene00000002", "WBGene00000003"])
+        new_api_manager = self.get_api_manager(cache_path=self.cache_path)
+        self.assertEqual(new_api_manager.get_textpresso_popularities(["unc-22", "lin-3"]), {"unc-22": 6, "lin-3": 5})
+        self.assertEqual(new_api_manager.get_gene_class("WBGene00000002"), "cls-WBGene00000002")
+        self.assertEqual(sum(MockAPIRequestHandler.requests_count.values()), 4)
+        # genes without a class are not stored in the persistent cache
+        self.assertEqual(new_api_manager.get_gene_class("WBGene00000003"), None)
+        self.assertEqual(MockAPIRequestHandler.requests_count["class:WBGene00000003"], 2)
+        expired_api_manager = self.get_api_manager(cache_path=self.cache_path, cache_ttl_days=-1)
+        self.assertEqual(expired_api_manager.get_textpresso_popularity("unc-22"), 6)
+        self.assertEqual(MockAPIRequestHandler.requests_count["tpc:unc-22"], 2)
+
+    def test_retries_and_metrics(self):
+        api_manager = self.get_api_manager(retries=2)
+        self.assertEqual(api_manager.get_gene_class("WBGeneFlaky2"), "cls-WBGeneFlaky2")
+        self.assertEqual(MockAPIRequestHandler.requests_count["class:WBGeneFlaky2"], 3)
+        self.assertEqual(api_manager.get_gene_class("WBGeneError"), None)
+        self.assertEqual(MockAPIRequestHandler.requests_count["class:WBGeneError"], 3)
+        api_manager.get_textpresso_popularities(["unc-22", "lin-3"])
+        gene_class_metrics = api_manager.http_session.metrics["wb_gene_class"]
+        self.assertEqual(gene_class_metrics.num_requests, 2)
+        self.assertEqual(gene_class_metrics.num_failures, 1)
+        self.assertEqual(gene_class_metrics.num_retries, 4)
+        self.assertEqual(api_manager.http_session.metrics["textpresso_documents_count"].num_requests, 2)
+        self.assertEqual(api_manager.http_session.metrics["textpresso_documents_count"].num_failures, 0)
+
+    def test_record_and_replay_responses(self):
+        replay_dir = os.path.join(self.cache_dir.name, "replay")
+        api_manager = self.get_api_manager(replay_store=ReplayStore(dir_path=replay_dir, mode=ReplayMode.RECORD))
+        api_manager.get_textpresso_popularities(["unc-22", "lin-3"])
+        api_manager.get_gene_classes(["WBGene00000002", "WBGene00000003"])
+        replaying_api_manager = self.get_api_manager(replay_store=ReplayStore(dir_path=replay_dir,
+                                                                              mode=ReplayMode.REPLAY))
+        replaying_api_manager.textpresso_api_token = "another_token"
+        replaying_api_manager.tpc_api_endpoint = api_manager.tpc_api_endpoint
+        self.assertEqual(replaying_api_manager.get_textpresso_popularities(["unc-22", "lin-3"]),
+                         {"unc-22": 6, "lin-3": 5})
+        self.assertEqual(replaying_api_manager.get_gene_classes(["WBGene00000002", "WBGene00000003"]),
+                         {"WBGene00000002": "cls-WBGene00000002", "WBGene00000003": None})
+        self.assertEqual(replaying_api_manager.get_gene_class("WBGene00000004"), None)
+        self.assertEqual(sum(MockAPIRequestHandler.requests_count.values()), 4)
+
+    def test_record_with_warm_cache_and_replay_without_cache(self):
+        self.get_api_manager(cache_path=self.cache_path).get_textpresso_popularities(["unc-22", "lin-3"])
+        replay_dir = os.path.join(self.cache_dir.name, "replay")
+        recording_api_manager = self.get_api_manager(cache_path=self.cache_path, replay_store=ReplayStore(
+            dir_path=replay_dir, mode=ReplayMode.RECORD))
+        self.assertEqual(recording_api_manager.get_textpresso_popularities(["unc-22", "lin-3"]),
+                         {"unc-22": 6, "lin-3": 5})
+        self.assertEqual(MockAPIRequestHandler.requests_count["tpc:unc-22"], 2)
+        replaying_api_manager = self.get_api_manager(replay_store=ReplayStore(dir_path=replay_dir,
+                                                                              mode=ReplayMode.REPLAY))
+        self.assertEqual(replaying_api_manager.get_textpresso_popularities(["unc-22", "lin-3"]),
+                         {"unc-22": 6, "lin-3": 5})
+        self.assertEqual(sum(MockAPIRequestHandler.requests_count.values()), 4)
+
+    def test_api_cache(self):
+        cache = APICache(self.cache_path, ttl_seconds=None)
+        cache.set("ns", "key1", {"a": 1})
+        cache.set_many("ns", {"key2": None, "key3": 3})
+        self.assertEqual(cache.get("ns", "key1"), (True, {"a": 1}))
+        self.assertEqual(cache.get("ns", "key2"), (True, None))
+        self.assertEqual(cache.get("other_ns", "key1"), (False, None))
+        self.assertEqual(cache.get_many("ns", ["key2", "key3", "key4"]), {"key2": None, "key3": 3})
+        cache.ttl_seconds = -1
+        self.assertEqual(cache.get_many("ns", ["key1", "key2"]), {})
+        cache.delete_expired()
+        cache.ttl_seconds = None
+        self.assertEqual(cache.get("ns", "key1"), (False, None))
+        cache.close()
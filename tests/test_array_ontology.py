@@ -0,0 +1,73 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from genedescriptions.array_ontology import ArrayOntology
+from genedescriptions.commons import Module
+from genedescriptions.config_parser import GenedescConfigParser
+from genedescriptions.data_manager import DataManager, DataType
+from genedescriptions.descriptions_generator import OntologySentenceGenerator
+
+logger = logging.getLogger("Array Ontology tests")
+
+
+class TestArrayOntology(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Array Ontology tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.conf_parser = GenedescConfigParser(os.path.join(self.this_dir, os.path.pardir, "tests", "config_test.yml"))
+        self.array_cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.array_cache_dir.cleanup()
+
+    def load_go_data(self, array_ontology_cache_dir=None, use_cache=False):
+        df = DataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"], use_cache=use_cache)
+        df.load_ontology_from_file(ontology_type=DataType.GO, ontology_url="file://" + os.path.join(
+            self.this_dir, "data", "go_gd_test.obo"), ontology_cache_path=os.path.join(self.this_dir, "cache",
+                                                                                         "go_gd_test.obo"),
+                                   config=self.conf_parser, array_ontology_cache_dir=array_ontology_cache_dir)
+        df.load_associations_from_file(associations_type=DataType.GO, associations_url="file://" + os.path.join(
+            self.this_dir, "data", "gene_association_1.7.wb.partial"),
+                                       associations_cache_path=os.path.join(self.this_dir, "cache",
+                                                                            "gene_association_1.7.wb.partial"),
+                                       config=self.conf_parser)
+        return df
+
+    def test_array_ontology_same_as_ontology(self):
+        df = self.load_go_data()
+        array_df = self.load_go_data(array_ontology_cache_dir=self.array_cache_dir.name)
+        self.assertTrue(isinstance(array_df.go_ontology, ArrayOntology))
+        ontology = df.go_ontology
+        array_ontology = array_df.go_ontology
+        self.assertEqual(sorted(array_ontology.get_roots()), sorted(ontology.get_roots()))
+        self.assertEqual(sorted(array_ontology.nodes()), sorted(ontology.nodes()))
+        for node_id in ["GO:0008150", "GO:0007568", "GO:1900426"]:
+            for prop in ["label", "depth"]:
+                self.assertEqual(array_ontology.node(node_id)[prop], ontology.node(node_id)[prop])
+            self.assertEqual(sorted(array_ontology.ancestors(node_id, reflexive=True)),
+                             sorted(ontology.ancestors(node_id, reflexive=True)))
+            self.assertEqual(sorted(array_ontology.parents(node_id, relations=["subClassOf"])),
+                             sorted(ontology.parents(node_id, relations=["subClassOf"])))
+            self.assertEqual(sorted(array_ontology.children(node_id)), sorted(ontology.children(node_id)))
+        for gene_id in ["WB:WBGene00000912", "WB:WBGene00000018"]:
+            sentences = [OntologySentenceGenerator(gene_id=gene_id, module=Module.GO, data_manager=data_manager,
+                                                   config=self.conf_parser).get_module_sentences(
+                config=self.conf_parser, aspect='P', qualifier='', merge_groups_with_same_prefix=True,
+                keep_only_best_group=True).get_description() for data_manager in [df, array_df]]
+            self.assertEqual(sentences[0], sentences[1])
+
+    def test_load_saved_array_ontology(self):
+        array_df = self.load_go_data(array_ontology_cache_dir=self.array_cache_dir.name)
+        saved_dirs = os.listdir(self.array_cache_dir.name)
+        self.assertEqual(len(saved_dirs), 1)
+        self.assertTrue(ArrayOntology.is_saved(os.path.join(self.array_cache_dir.name, saved_dirs[0])))
+        loaded_ontology = ArrayOntology.load(os.path.join(self.array_cache_dir.name, saved_dirs[0]))
+        self.assertEqual(loaded_ontology.node("GO:0007568"), array_df.go_ontology.node("GO:0007568"))
+        self.assertTrue("IC" in loaded_ontology.node("GO:0007568"))
+        self.assertEqual(loaded_ontology.label("GO:9999999", id_if_null=True), "GO:9999999")
+        self.assertEqual(loaded_ontology.ancestors("GO:9999999"), [])
+        graph = loaded_ontology.get_graph()
+        self.assertEqual(graph.number_of_edges(), array_df.go_ontology.get_graph().number_of_edges())
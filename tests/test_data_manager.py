@@ -5,6 +5,7 @@ import os
 from genedescriptions.commons import Module
 from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
 from genedescriptions.data_manager import DataManager, DataType
+from genedescriptions.ontology_registry import OntologyRegistry
 
 logger = logging.getLogger("Gene Ontology Module tests")
 
@@ -44,6 +45,25 @@ class TestGOModule(unittest.TestCase):
     def test_rename_terms(self):
         self.assertTrue(all(len(self.df.go_ontology.search(term)) == 0 for term in list(
             self.conf_parser.get_module_property(module=Module.GO, prop=ConfigModuleProperty.RENAME_TERMS).keys())))
+        self.assertTrue(len(self.df.renamed_terms[DataType.GO]) > 0)
+        self.assertTrue(all(self.df.go_ontology.label(term_id) == new_label and old_label != new_label for
+                            term_id, (old_label, new_label) in self.df.renamed_terms[DataType.GO].items()))
 
     def test_exclude_terms(self):
         pass
+
+    def test_ontology_registry(self):
+        ontology_registry = OntologyRegistry()
+        data_managers = [DataManager(do_relations=None, go_relations=go_relations, ontology_registry=ontology_registry)
+                         for go_relations in [["subClassOf", "BFO:0000050"], ["subClassOf", "BFO:0000050"],
+                                              ["subClassOf"]]]
+        for data_manager in data_managers:
+            data_manager.load_ontology_from_file(ontology_type=DataType.GO, ontology_url="file://" + os.path.join(
+                self.this_dir, "data", "go_gd_test.obo"), ontology_cache_path=os.path.join(self.this_dir, "cache",
+                                                                                           "go_gd_test.obo"),
+                                                 config=self.conf_parser)
+        self.assertTrue(data_managers[0].go_ontology is data_managers[1].go_ontology)
+        self.assertTrue(data_managers[0].go_ontology is not data_managers[2].go_ontology)
+        self.assertEqual(len(ontology_registry), 2)
+        self.assertEqual(data_managers[1].go_ontology.node("GO:0000075")["depth"],
+                         self.df.go_ontology.node("GO:0000075")["depth"])
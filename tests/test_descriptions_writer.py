@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from genedescriptions.descriptions_writer import DescriptionsWriter, StreamingDescriptionsWriter
+from genedescriptions.gene_description import GeneDescription
+
+logger = logging.getLogger("Descriptions Writer tests")
+
+
+class TestDescriptionsWriter(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Descriptions Writer tests")
+        self.out_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.out_dir.cleanup()
+
+    @staticmethod
+    def _get_gene_descs():
+        gene_descs = []
+        for i in range(5):
+            gene_desc = GeneDescription(gene_id="WB:WBGene0000000" + str(i), gene_name="gene-" + str(i))
+            for aspect in ["f", "p", "c"]:
+                setattr(gene_desc.stats, "num_initial_go_ids_" + aspect, 0)
+                setattr(gene_desc.stats, "num_initial_experimental_go_ids_" + aspect, 0)
+            if i % 2 == 0:
+                gene_desc.description = "Exhibits protein binding activity " + str(i) + "."
+                gene_desc.go_description = gene_desc.description
+                gene_desc.go_function_description = gene_desc.description
+                gene_desc.stats.set_initial_go_ids = ["GO:000000" + str(j) for j in range(i)]
+                gene_desc.stats.num_initial_go_ids_f = i
+                gene_desc.stats.num_initial_experimental_go_ids_f = i // 2
+            gene_descs.append(gene_desc)
+        return gene_descs
+
+    def _write_with_both_writers(self, pretty: bool, include_single_gene_stats: bool):
+        writer = DescriptionsWriter()
+        writer.overall_properties.species = "c_elegans"
+        for gene_desc in self._get_gene_descs():
+            writer.add_gene_desc(gene_desc)
+        writer.write_json(os.path.join(self.out_dir.name, "full.json"), pretty=pretty,
+                          include_single_gene_stats=include_single_gene_stats)
+        writer.write_plain_text(os.path.join(self.out_dir.name, "full.txt"))
+        writer.write_tsv(os.path.join(self.out_dir.name, "full.tsv"))
+        streaming_writer = StreamingDescriptionsWriter()
+        streaming_writer.overall_properties.species = "c_elegans"
+        streaming_writer.open_output_files(
+            json_file_path=os.path.join(self.out_dir.name, "streamed.json"),
+            plain_text_file_path=os.path.join(self.out_dir.name, "streamed.txt"),
+            tsv_file_path=os.path.join(self.out_dir.name, "streamed.tsv"), pretty=pretty,
+            include_single_gene_stats=include_single_gene_stats)
+        with streaming_writer:
+            for gene_desc in self._get_gene_descs():
+                streaming_writer.add_gene_desc(gene_desc)
+
+    def _assert_same_output(self, file_ext: str, parse_json: bool = False):
+        with open(os.path.join(self.out_dir.name, "full." + file_ext)) as full_file, \
+                open(os.path.join(self.out_dir.name, "streamed." + file_ext)) as streamed_file:
+            if parse_json:
+                self.assertEqual(json.load(full_file), json.load(streamed_file))
+            else:
+                self.assertEqual(full_file.read(), streamed_file.read())
+
+    def test_streaming_writer_same_output_as_writer(self):
+        self._write_with_both_writers(pretty=True, include_single_gene_stats=True)
+        self._assert_same_output("json", parse_json=True)
+        self._assert_same_output("txt")
+        self._assert_same_output("tsv")
+
+    def test_streaming_writer_compact_json_without_stats(self):
+        self._write_with_both_writers(pretty=False, include_single_gene_stats=False)
+        self._assert_same_output("json", parse_json=True)
+        with open(os.path.join(self.out_dir.name, "streamed.json")) as streamed_file:
+            streamed_json = json.load(streamed_file)
+        self.assertEqual(len(streamed_json["data"]), 5)
+        self.assertTrue("general_stats" not in streamed_json)
+        self.assertTrue("stats" not in streamed_json["data"][0])
+
+    def test_streaming_writer_no_genes(self):
+        streaming_writer = StreamingDescriptionsWriter()
+        json_path = os.path.join(self.out_dir.name, "empty.json")
+        with streaming_writer:
+            streaming_writer.open_output_files(json_file_path=json_path, pretty=True, include_single_gene_stats=True)
+        with open(json_path) as json_file:
+            self.assertEqual(json.load(json_file)["data"], [])
+
+    def test_streaming_writer_error_leaves_partial_files(self):
+        streaming_writer = StreamingDescriptionsWriter()
+        json_path = os.path.join(self.out_dir.name, "failed.json")
+        txt_path = os.path.join(self.out_dir.name, "failed.txt")
+        with self.assertRaises(RuntimeError):
+            with streaming_writer:
+                streaming_writer.open_output_files(json_file_path=json_path, plain_text_file_path=txt_path,
+                                                   pretty=True, include_single_gene_stats=True)
+                streaming_writer.add_gene_desc(self._get_gene_descs()[0])
+                raise RuntimeError()
+        self.assertFalse(os.path.exists(json_path))
+        self.assertFalse(os.path.exists(txt_path))
+        self.assertTrue(os.path.exists(txt_path + ".partial"))
+        with open(json_path + ".partial") as json_file:
+            partial_json = json_file.read()
+        self.assertTrue("general_stats" not in partial_json)
+        self.assertRaises(ValueError, json.loads, partial_json)
+
+    def test_streaming_writer_does_not_support_write_methods(self):
+        streaming_writer = StreamingDescriptionsWriter()
+        json_path = os.path.join(self.out_dir.name, "streamed.json")
+        self.assertRaises(TypeError, streaming_writer.write_json, json_path, pretty=True)
+        self.assertRaises(TypeError, streaming_writer.write_ace, json_path, [], "WS270")
+        self.assertRaises(TypeError, streaming_writer.write_plain_text, json_path)
+        self.assertRaises(TypeError, streaming_writer.write_tsv, json_path)
+        self.assertFalse(os.path.exists(json_path))
+
+    def test_write_json_does_not_modify_gene_descs(self):
+        writer = DescriptionsWriter()
+        for gene_desc in self._get_gene_descs():
+            writer.add_gene_desc(gene_desc)
+        json_path = os.path.join(self.out_dir.name, "full.json")
+        writer.write_json(json_path, pretty=True, include_single_gene_stats=True)
+        self.assertEqual(writer.data[2].stats.set_initial_go_ids, ["GO:0000000", "GO:0000001"])
+        self.assertFalse(writer.data[2].add_gene_name)
+        with open(json_path) as json_file:
+            written_json = json.load(json_file)
+        self.assertEqual(list(written_json.keys()), ["overall_properties", "general_stats", "data"])
+        self.assertTrue("add_gene_name" not in written_json["data"][0])
+        self.assertTrue("set_initial_go_ids" not in written_json["data"][0]["stats"])
+        self.assertEqual(written_json["data"][2]["stats"]["num_initial_go_ids_f"], 2)
+        writer.write_json(json_path, pretty=False, include_single_gene_stats=False)
+        with open(json_path) as json_file:
+            written_json = json.load(json_file)
+        self.assertEqual(list(written_json.keys()), ["overall_properties", "data"])
+        self.assertTrue("stats" not in written_json["data"][0])
+
+    def test_streaming_writer_add_gene_desc_dict(self):
+        self._write_with_both_writers(pretty=True, include_single_gene_stats=True)
+        with open(os.path.join(self.out_dir.name, "streamed.json")) as streamed_file:
+            streamed_json = json.load(streamed_file)
+        stats_rows = []
+        streaming_writer = StreamingDescriptionsWriter()
+        streaming_writer.overall_properties.species = "c_elegans"
+        streaming_writer.open_output_files(json_file_path=os.path.join(self.out_dir.name, "full.json"),
+                                           plain_text_file_path=os.path.join(self.out_dir.name, "full.txt"),
+                                           tsv_file_path=os.path.join(self.out_dir.name, "full.tsv"), pretty=True,
+                                           include_single_gene_stats=True)
+        with streaming_writer:
+            for gene_desc in self._get_gene_descs():
+                stats_rows.append(streaming_writer.add_gene_desc(gene_desc))
+        streaming_writer = StreamingDescriptionsWriter()
+        streaming_writer.overall_properties.species = "c_elegans"
+        streaming_writer.open_output_files(json_file_path=os.path.join(self.out_dir.name, "streamed.json"),
+                                           plain_text_file_path=os.path.join(self.out_dir.name, "streamed.txt"),
+                                           tsv_file_path=os.path.join(self.out_dir.name, "streamed.tsv"),
+                                           pretty=True, include_single_gene_stats=True)
+        with streaming_writer:
+            for gene_desc_dict, stats_row in zip(streamed_json["data"], stats_rows):
+                streaming_writer.add_gene_desc_dict(gene_desc_dict, stats_row=stats_row)
+        self._assert_same_output("json", parse_json=True)
+        self._assert_same_output("txt")
+        self._assert_same_output("tsv")
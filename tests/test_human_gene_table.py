@@ -0,0 +1,48 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from genedescriptions.human_gene_table import HumanGeneTable
+
+logger = logging.getLogger("Human Gene Table tests")
+
+
+class TestHumanGeneTable(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Human Gene Table tests")
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.cache_dir.name, "hgnc", "human_genes.tsv")
+        self.hgnc_content = b"HGNC ID\tEnsembl gene ID\tApproved symbol\tApproved name\n" \
+                            b"HGNC:1100\tENSG00000012048\tBRCA1\tBRCA1 DNA repair associated\n" \
+                            b"HGNC:9999\t\tWITHDRAWN\twithdrawn gene\n" \
+                            b"HGNC:11998\tENSG00000141510\tTP53\ttumor protein p53\r\n"
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_table_serves_both_accessors_from_single_download(self):
+        table = HumanGeneTable(cache_path=self.cache_path)
+        self.assertEqual(table.cache_path, os.path.join(self.cache_dir.name, "hgnc", "human_genes_v1.tsv"))
+        downloads = []
+        table._download = lambda: downloads.append(1) or self.hgnc_content
+        self.assertEqual(len(downloads), 0)
+        self.assertEqual(dict(table.get_human_gene_props()),
+                         {"ENSG00000012048": ["HGNC:1100", "BRCA1", "BRCA1 DNA repair associated"],
+                          "ENSG00000141510": ["HGNC:11998", "TP53", "tumor protein p53"]})
+        self.assertEqual(table.get_ensembl_hgnc_ids_map(), {"ENSG00000012048": "HGNC:1100",
+                                                            "ENSG00000141510": "HGNC:11998"})
+        self.assertEqual(table.get_gene_props("ENSG00000141510"), ("HGNC:11998", "TP53", "tumor protein p53"))
+        self.assertEqual(table.get_hgnc_id("ENSG00000000000"), None)
+        self.assertEqual(len(downloads), 1)
+        self.assertTrue(os.path.isfile(table.cache_path))
+
+    def test_cached_table(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(os.path.join(self.cache_dir.name, "hgnc", "human_genes_v1.tsv"), "wb") as cache_file:
+            cache_file.write(self.hgnc_content)
+        table = HumanGeneTable(cache_path=self.cache_path, use_cache=True)
+        table._download = lambda: self.fail("cached table downloaded again")
+        self.assertEqual(len(table), 2)
+        self.assertTrue("ENSG00000012048" in table)
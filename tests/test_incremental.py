@@ -0,0 +1,62 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from ontobio.ontol_factory import OntologyFactory
+
+from genedescriptions.incremental import IncrementalState, get_fingerprint, get_ontology_fingerprint
+
+logger = logging.getLogger("Incremental tests")
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Incremental tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.out_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.out_dir.cleanup()
+
+    def test_get_fingerprint(self):
+        self.assertEqual(get_fingerprint({"a": [1, 2], "b": "x"}), get_fingerprint({"b": "x", "a": [1, 2]}))
+        self.assertNotEqual(get_fingerprint({"a": [1, 2]}), get_fingerprint({"a": [2, 1]}))
+
+    def test_get_ontology_fingerprint(self):
+        ontology = OntologyFactory().create(os.path.join(self.this_dir, "data", "go_gd_test.obo"))
+        fingerprint = get_ontology_fingerprint(ontology)
+        self.assertEqual(fingerprint, get_ontology_fingerprint(OntologyFactory().create(
+            os.path.join(self.this_dir, "data", "go_gd_test.obo"))))
+        node_id = sorted(ontology.nodes())[0]
+        ontology.node(node_id)["label"] = ontology.label(node_id) + " renamed"
+        self.assertNotEqual(fingerprint, get_ontology_fingerprint(ontology))
+        self.assertIsNone(get_ontology_fingerprint(None))
+
+    def test_save_and_load(self):
+        state_path = os.path.join(self.out_dir.name, "incremental", "c_elegans.json")
+        self.assertIsNone(IncrementalState.load(state_path))
+        state = IncrementalState(context_fingerprint="context", json_file_path=os.path.join(self.out_dir.name,
+                                                                                            "missing.json"),
+                                 ontology_fingerprints={"go": "go_fingerprint"})
+        state.set_gene("WB:WBGene00000001", "fingerprint", ("WB:WBGene00000001", 2, 1.5))
+        state.set_gene("WB:WBGene00000002", "fingerprint2")
+        state.save(state_path)
+        loaded_state = IncrementalState.load(state_path)
+        self.assertTrue(state.is_compatible_with(loaded_state))
+        self.assertFalse(IncrementalState(context_fingerprint="other").is_compatible_with(loaded_state))
+        self.assertEqual(len(loaded_state), 2)
+        self.assertEqual(loaded_state.ontology_fingerprints, {"go": "go_fingerprint"})
+        self.assertEqual(loaded_state.get_gene("WB:WBGene00000001"), ("fingerprint", ("WB:WBGene00000001", 2, 1.5)))
+        self.assertEqual(loaded_state.get_gene("WB:WBGene00000002"), ("fingerprint2", None))
+        self.assertEqual(loaded_state.get_gene("WB:WBGene00000003"), (None, None))
+        self.assertEqual(loaded_state.load_gene_descriptions(), {})
+
+    def test_unreadable_files_are_ignored(self):
+        json_path = os.path.join(self.out_dir.name, "truncated.json")
+        with open(json_path, "w") as json_file:
+            json_file.write("{\"overall_properties\": {}, \"data\": [{\"gene_id\": ")
+        state = IncrementalState(context_fingerprint="context", json_file_path=json_path)
+        self.assertEqual(state.load_gene_descriptions(), {})
+        self.assertIsNone(IncrementalState.load(json_path))
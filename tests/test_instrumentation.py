@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from genedescriptions.commons import DataType, Module
+from genedescriptions.config_parser import GenedescConfigParser
+from genedescriptions.data_manager import DataManager
+from genedescriptions.descriptions_generator import OntologySentenceGenerator
+from genedescriptions.instrumentation import GeneLatencyTracer, Instrumentation, Histogram, instrumentation
+
+logger = logging.getLogger("Instrumentation tests")
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Instrumentation tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.out_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.out_dir.cleanup()
+
+    def test_timer_and_decorator(self):
+        collector = Instrumentation()
+        with collector.timer("block"):
+            pass
+        with collector.timer("block"):
+            pass
+
+        @collector.timed("function")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(add.__name__, "add")
+        report = collector.get_report()
+        self.assertEqual(report["timers"]["block"]["count"], 2)
+        self.assertEqual(report["timers"]["function"]["count"], 1)
+        self.assertGreaterEqual(report["timers"]["block"]["max"], report["timers"]["block"]["min"])
+
+    def test_timer_records_failed_calls(self):
+        collector = Instrumentation()
+
+        @collector.timed()
+        def fail():
+            raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(collector.get_report()["timers"][fail.__module__ + "." + fail.__qualname__]["count"], 1)
+
+    def test_counters_and_histograms(self):
+        collector = Instrumentation()
+        collector.increment("trimmed")
+        collector.increment("trimmed", 2)
+        for value in [1, 3, 3, 2000]:
+            collector.observe("num_terms", value)
+        report = collector.get_report()
+        self.assertEqual(report["counters"]["trimmed"], 3)
+        self.assertEqual(report["histograms"]["num_terms"]["count"], 4)
+        self.assertEqual(report["histograms"]["num_terms"]["max"], 2000)
+        buckets = dict(report["histograms"]["num_terms"]["buckets"])
+        self.assertEqual(buckets["<=1"], 1)
+        self.assertEqual(buckets["<=5"], 2)
+        self.assertEqual(buckets[">" + str(Histogram.DEFAULT_BOUNDARIES[-1])], 1)
+
+    def test_disabled(self):
+        collector = Instrumentation(enabled=False)
+        with collector.timer("block"):
+            pass
+        collector.increment("counter")
+        collector.observe("histogram", 1)
+        self.assertEqual(collector.get_report(), {"timers": {}, "counters": {}, "histograms": {}})
+
+    def test_write_report_and_reset(self):
+        collector = Instrumentation()
+        with collector.timer("block"):
+            collector.increment("counter")
+        report_path = os.path.join(self.out_dir.name, "profile.json")
+        collector.write_report(report_path, properties={"organism": "c_elegans"})
+        with open(report_path) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(report["organism"], "c_elegans")
+        self.assertEqual(report["counters"]["counter"], 1)
+        self.assertIn("block", report["timers"])
+        collector.reset()
+        self.assertEqual(collector.get_report(), {"timers": {}, "counters": {}, "histograms": {}})
+
+    def test_sentence_generation_is_instrumented(self):
+        conf_parser = GenedescConfigParser(os.path.join(self.this_dir, "config_test.yml"))
+        dm = DataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"])
+        dm.load_ontology_from_file(ontology_type=DataType.GO, ontology_url="file://" + os.path.join(
+            self.this_dir, "data", "go_gd_test.obo"), ontology_cache_path=os.path.join(
+            self.this_dir, "cache", "go_gd_test.obo"), config=conf_parser)
+        dm.load_associations_from_file(associations_type=DataType.GO, associations_url="file://" + os.path.join(
+            self.this_dir, "data", "gene_association_1.7.wb.partial"), associations_cache_path=os.path.join(
+            self.this_dir, "cache", "gene_association_1.7.wb.partial"), config=conf_parser)
+        instrumentation.reset()
+        OntologySentenceGenerator(gene_id="WB:WBGene00000912", module=Module.GO, data_manager=dm, config=conf_parser)
+        self.assertEqual(instrumentation.get_report(), {"timers": {}, "counters": {}, "histograms": {}})
+        instrumentation.enabled = True
+        try:
+            generator = OntologySentenceGenerator(gene_id="WB:WBGene00000912", module=Module.GO, data_manager=dm,
+                                                  config=conf_parser)
+            generator.get_module_sentences(config=conf_parser, aspect="P", merge_groups_with_same_prefix=True,
+                                           keep_only_best_group=True)
+        finally:
+            instrumentation.enabled = False
+        report = instrumentation.get_report()
+        self.assertEqual(report["timers"]["sentence_generator.init"]["count"], 1)
+        self.assertEqual(report["timers"]["sentence_generator.get_module_sentences"]["count"], 1)
+        self.assertIn("data_manager.get_annotations_for_gene", report["timers"])
+        self.assertGreater(report["histograms"]["sentence_generator.num_terms_before_trimming"]["count"], 0)
+
+    def test_gene_latency_tracer(self):
+        tracer = GeneLatencyTracer(max_genes=2)
+        for gene_num, elapsed in enumerate([0.3, 0.1, 0.5, 0.2]):
+            tracer.start_gene("WB:WBGene0000000" + str(gene_num), "gene-" + str(gene_num))
+            tracer.add_time("go", elapsed)
+            with tracer.trace("disease"):
+                pass
+            tracer.end_gene(term_counts={"go_initial": gene_num}, properties={"trimmed": gene_num == 2})
+        report = tracer.get_report()
+        self.assertEqual(report["num_genes"], 4)
+        self.assertEqual(report["modules"]["go"]["count"], 4)
+        self.assertEqual(report["modules"]["disease"]["count"], 4)
+        self.assertEqual([gene_data["gene_name"] for gene_data in report["slowest_genes"]], ["gene-2", "gene-0"])
+        self.assertEqual(report["slowest_genes"][0]["term_counts"], {"go_initial": 2})
+        self.assertTrue(report["slowest_genes"][0]["trimmed"])
+        self.assertEqual(set(report["slowest_genes"][0]["modules"].keys()), {"go", "disease"})
+
+    def test_gene_latency_tracer_disabled(self):
+        tracer = GeneLatencyTracer(enabled=False)
+        tracer.start_gene("WB:WBGene00000001", "gene-1")
+        with tracer.trace("go"):
+            pass
+        tracer.end_gene()
+        self.assertEqual(tracer.get_report(), {"num_genes": 0, "modules": {}, "slowest_genes": []})
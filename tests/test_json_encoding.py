@@ -0,0 +1,64 @@
+import io
+import json
+import logging
+import unittest
+
+from collections import OrderedDict
+
+import numpy as np
+
+from genedescriptions import json_encoding
+from genedescriptions.json_encoding import JsonEncoderBackend, dump_json, dumps_json, \
+    get_available_json_encoder_backends, resolve_json_encoder_backend
+
+logger = logging.getLogger("JSON Encoding tests")
+
+
+class TestJsonEncoding(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting JSON Encoding tests")
+        self.obj = OrderedDict([("gene_id", "WB:WBGene00000001"), ("description", "Exhibits binding activity."),
+                                ("stats", OrderedDict([("average_terms_level", np.average([1, 2])),
+                                                       ("num_final_go_ids_f", 2)])),
+                                ("paper_evidences", []), ("go_description", None)])
+
+    def test_stdlib_encoder(self):
+        self.assertEqual(dumps_json(self.obj, indent=4, backend=JsonEncoderBackend.STDLIB),
+                         json.dumps(self.obj, indent=4))
+        compact_text = dumps_json(self.obj, backend=JsonEncoderBackend.STDLIB)
+        self.assertTrue(" " not in compact_text.replace("Exhibits binding activity.", ""))
+        self.assertEqual(json.loads(compact_text), json.loads(json.dumps(self.obj)))
+
+    def test_all_available_encoders_produce_same_data(self):
+        for backend in get_available_json_encoder_backends():
+            for indent in [None, 4]:
+                outfile = io.StringIO()
+                dump_json(self.obj, outfile, indent=indent, backend=backend)
+                self.assertEqual(json.loads(outfile.getvalue()), json.loads(json.dumps(self.obj)))
+
+    def test_backend_resolution(self):
+        self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.AUTO, indent=4), JsonEncoderBackend.STDLIB)
+        self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.AUTO),
+                         get_available_json_encoder_backends()[0])
+        orjson_module = json_encoding.orjson
+        json_encoding.orjson = None
+        try:
+            self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.ORJSON), JsonEncoderBackend.STDLIB)
+            self.assertEqual(json.loads(dumps_json(self.obj, backend=JsonEncoderBackend.ORJSON)),
+                             json.loads(json.dumps(self.obj)))
+        finally:
+            json_encoding.orjson = orjson_module
+
+    def test_orjson_is_not_used_for_unsupported_indentation(self):
+        orjson_module = json_encoding.orjson
+        # only the availability of the module is checked when resolving the backend
+        json_encoding.orjson = orjson_module if orjson_module is not None else object()
+        try:
+            self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.ORJSON, indent=4),
+                             JsonEncoderBackend.STDLIB)
+            self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.ORJSON, indent=2),
+                             JsonEncoderBackend.ORJSON)
+            self.assertEqual(resolve_json_encoder_backend(JsonEncoderBackend.ORJSON), JsonEncoderBackend.ORJSON)
+        finally:
+            json_encoding.orjson = orjson_module
@@ -0,0 +1,80 @@
+import copy
+import logging
+import os
+import tempfile
+import unittest
+
+from genedescriptions.config_parser import GenedescConfigParser
+from genedescriptions.data_manager import DataManager, DataType
+from genedescriptions.ontology_diff import OntologyDiff, get_ontology_snapshot, save_ontology_snapshot, \
+    load_ontology_snapshot, get_affected_terms, get_genes_affected_by_diff
+
+logger = logging.getLogger("Ontology Diff tests")
+
+
+class TestOntologyDiff(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Ontology Diff tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.conf_parser = GenedescConfigParser(os.path.join(self.this_dir, os.path.pardir, "tests", "config_test.yml"))
+        self.df = DataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"])
+        self.df.load_ontology_from_file(ontology_type=DataType.GO, ontology_url="file://" + os.path.join(
+            self.this_dir, "data", "go_gd_test.obo"), ontology_cache_path=os.path.join(self.this_dir, "cache",
+                                                                                       "go_gd_test.obo"),
+                                        config=self.conf_parser)
+        self.df.load_associations_from_file(associations_type=DataType.GO, associations_url="file://" + os.path.join(
+            self.this_dir, "data", "gene_association_1.7.wb.partial"),
+                                            associations_cache_path=os.path.join(self.this_dir, "cache",
+                                                                                 "gene_association_1.7.wb.partial"),
+                                            config=self.conf_parser)
+        self.snapshot = get_ontology_snapshot(self.df.go_ontology)
+
+    def _get_genes_annotated_to_descendants(self, term_id):
+        return {subject_id for subject_id, associations in self.df.go_associations.associations_by_subj.items() if
+                any(term_id in self.df.go_ontology.ancestors(association["object"]["id"], reflexive=True) for
+                    association in associations)}
+
+    def test_no_changes(self):
+        ontology_diff = OntologyDiff(self.snapshot, get_ontology_snapshot(self.df.go_ontology))
+        self.assertTrue(ontology_diff.is_empty())
+        self.assertEqual(get_genes_affected_by_diff(ontology_diff, self.df.go_ontology, self.df.go_associations),
+                         set())
+
+    def test_label_and_parents_changes(self):
+        old_snapshot = copy.deepcopy(self.snapshot)
+        old_snapshot["GO:0009987"][0] = "old cellular process"
+        old_snapshot["GO:0000075"][1] = []
+        old_snapshot["GO:9999999"] = ["removed term", [], 1, 1.0]
+        ontology_diff = OntologyDiff(old_snapshot, self.snapshot)
+        self.assertEqual(ontology_diff.label_changes, {"GO:0009987": ("old cellular process",
+                                                                      self.df.go_ontology.label("GO:0009987"))})
+        self.assertEqual(list(ontology_diff.parents_changes), ["GO:0000075"])
+        self.assertEqual(ontology_diff.removed_terms, ["GO:9999999"])
+        self.assertEqual(ontology_diff.added_terms, [])
+        self.assertEqual(ontology_diff.get_changed_terms(), {"GO:0009987", "GO:0000075", "GO:9999999"})
+        affected_terms = get_affected_terms(["GO:0009987"], self.df.go_ontology)
+        self.assertEqual(affected_terms, set(self.df.go_ontology.descendants("GO:0009987", reflexive=True)))
+        affected_genes = get_genes_affected_by_diff(ontology_diff, self.df.go_ontology, self.df.go_associations)
+        self.assertTrue(len(affected_genes) > 0)
+        self.assertEqual(affected_genes, self._get_genes_annotated_to_descendants("GO:0009987") |
+                         self._get_genes_annotated_to_descendants("GO:0000075"))
+
+    def test_ic_changes(self):
+        old_snapshot = copy.deepcopy(self.snapshot)
+        old_snapshot["GO:0000075"][3] += 1
+        ontology_diff = OntologyDiff(old_snapshot, self.snapshot)
+        self.assertEqual(list(ontology_diff.ic_changes), ["GO:0000075"])
+        self.assertEqual(ontology_diff.get_changed_terms(include_ic_changes=False), set())
+        self.assertEqual(get_genes_affected_by_diff(ontology_diff, self.df.go_ontology, self.df.go_associations,
+                                                    include_ic_changes=False), set())
+        self.assertEqual(get_genes_affected_by_diff(ontology_diff, self.df.go_ontology, self.df.go_associations),
+                         self._get_genes_annotated_to_descendants("GO:0000075"))
+
+    def test_save_and_load_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = os.path.join(tmp_dir, "snapshots", "go.json")
+            self.assertIsNone(load_ontology_snapshot(snapshot_path))
+            save_ontology_snapshot(self.snapshot, snapshot_path)
+            self.assertTrue(OntologyDiff(self.snapshot, load_ontology_snapshot(snapshot_path)).is_empty())
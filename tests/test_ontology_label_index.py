@@ -0,0 +1,42 @@
+import logging
+import unittest
+
+from ontobio.ontol import Ontology, Synonym
+
+from genedescriptions.ontology_label_index import OntologyLabelIndex
+
+logger = logging.getLogger("Ontology Label Index tests")
+
+
+class TestOntologyLabelIndex(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Ontology Label Index tests")
+        self.ontology = Ontology()
+        self.ontology.add_node("WBbt:0005772", label="the intestine")
+        self.ontology.add_node("WBbt:0005175", label="the pharynx")
+        self.ontology.add_node("WBbt:0003679", label="neurons")
+        self.ontology.add_node("WBbt:0005735", label="the Nerve Ring")
+        self.ontology.add_synonym(Synonym("WBbt:0005772", val="gut", pred="hasExactSynonym"))
+
+    def test_resolve(self):
+        labels_index = OntologyLabelIndex(self.ontology)
+        self.assertEqual(labels_index.resolve("the intestine"), "WBbt:0005772")
+        self.assertEqual(labels_index.resolve("intestine"), "WBbt:0005772")
+        self.assertEqual(labels_index.resolve("the  nerve ring"), "WBbt:0005735")
+        self.assertEqual(labels_index.resolve("the neurons"), "WBbt:0003679")
+        self.assertEqual(labels_index.resolve("the ph%"), "WBbt:0005175")
+        self.assertEqual(labels_index.resolve("WBbt:0000100"), "WBbt:0000100")
+        self.assertIsNone(labels_index.resolve("the gut"))
+        self.assertEqual(self.ontology.resolve_names(["the pharynx"]), [labels_index.resolve("the pharynx")])
+
+    def test_resolve_synonyms(self):
+        labels_index = OntologyLabelIndex(self.ontology, synonyms=True)
+        self.assertEqual(labels_index.resolve("the gut"), "WBbt:0005772")
+
+    def test_resolve_names(self):
+        labels_index = OntologyLabelIndex(self.ontology)
+        resolved_names, unresolved_names = labels_index.resolve_names(["the pharynx", "the tail", "neurons",
+                                                                       "the head"])
+        self.assertEqual(resolved_names, {"the pharynx": "WBbt:0005175", "neurons": "WBbt:0003679"})
+        self.assertEqual(unresolved_names, ["the tail", "the head"])
@@ -9,7 +9,8 @@ from genedescriptions.config_parser import GenedescConfigParser
 from genedescriptions.data_manager import DataManager, DataType
 from genedescriptions.descriptions_generator import OntologySentenceGenerator
 from genedescriptions.ontology_tools import get_all_common_ancestors, find_set_covering, \
-    set_all_information_content_values
+    set_all_information_content_values, get_ancestors_bitset_index
+from genedescriptions.stats import SingleDescStats
 
 logger = logging.getLogger("Gene Ontology Tools tests")
 
@@ -87,6 +88,26 @@ class TestOntologyTools(unittest.TestCase):
         for root_id in roots:
             self.assertTrue(self.df.go_ontology.node(root_id)["IC"] == 0, "Root IC not equal to 0")
 
+    def test_ancestors_bitset_index(self):
+        self.load_go_ontology()
+        ontology = self.df.go_ontology
+        index = get_ancestors_bitset_index(ontology)
+        self.assertTrue(index is get_ancestors_bitset_index(ontology), "Index not cached for the same ontology")
+        nodes = list(ontology.nodes())[0:200]
+        for node in nodes:
+            ancestors_bitset = index.get_ancestors_bitset(node, reflexive=True)
+            self.assertEqual({other for other in nodes if index.get_node_bit(other) & ancestors_bitset},
+                             set(ontology.ancestors(node, reflexive=True)) & set(nodes))
+        self.assertEqual(index.get_ancestors_bitset("GO:missing", reflexive=True), index.get_node_bit("GO:missing"))
+        initial_terms = nodes[0:50] + ["GO:missing"]
+        final_terms = nodes[40:60] + ["GO:missing"]
+        final_t_ancestors = {final_term: ontology.ancestors(final_term) for final_term in final_terms}
+        expected_num_covered = len([initial_term for initial_term in initial_terms if any(
+            [final_term in ontology.ancestors(initial_term, reflexive=True) or initial_term in
+             final_t_ancestors[final_term] for final_term in final_terms])])
+        self.assertEqual(SingleDescStats._get_num_covered_nodes(initial_terms, final_terms, ontology),
+                         expected_num_covered)
+
     def test_find_set_covering(self):
         subsets = [("1", "1", {"A", "B", "C"}), ("2", "2", {"A", "B"}), ("3", "3", {"C"}), ("4", "4", {"A"}),
                    ("5", "5", {"B"}), ("6", "6", {"C"})]
@@ -0,0 +1,67 @@
+import logging
+import os
+import pstats
+import tempfile
+import unittest
+
+from genedescriptions.profiling import Profiler, ProfilerType, get_available_profiler_types
+
+logger = logging.getLogger("Profiling tests")
+
+
+def profiled_function():
+    return sum(range(1000))
+
+
+def not_profiled_function():
+    return sum(range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Profiling tests")
+        self.out_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.out_dir.cleanup()
+
+    def test_cprofile(self):
+        profiler = Profiler(ProfilerType.CPROFILE)
+        self.assertTrue(profiler.enabled)
+        for _ in range(2):
+            profiler.start()
+            profiled_function()
+            profiler.stop()
+            not_profiled_function()
+        with profiler.profile():
+            profiled_function()
+        with profiler.profile(enabled=False):
+            not_profiled_function()
+        file_paths = profiler.write(os.path.join(self.out_dir.name, "profile"))
+        self.assertEqual(file_paths, [os.path.join(self.out_dir.name, "profile.pstats"),
+                                      os.path.join(self.out_dir.name, "profile.txt")])
+        function_calls = {function[2]: stats[0] for function, stats in pstats.Stats(file_paths[0]).stats.items()}
+        self.assertEqual(function_calls["profiled_function"], 3)
+        self.assertNotIn("not_profiled_function", function_calls)
+
+    def test_off(self):
+        profiler = Profiler()
+        self.assertFalse(profiler.enabled)
+        with profiler.profile():
+            profiled_function()
+        self.assertFalse(profiler.running)
+        self.assertEqual(profiler.write(os.path.join(self.out_dir.name, "profile")), [])
+        self.assertEqual(os.listdir(self.out_dir.name), [])
+
+    def test_pyinstrument(self):
+        if ProfilerType.PYINSTRUMENT not in get_available_profiler_types():
+            self.assertRaises(ValueError, Profiler, ProfilerType.PYINSTRUMENT)
+            return
+        profiler = Profiler(ProfilerType.PYINSTRUMENT)
+        with profiler.profile():
+            profiled_function()
+        file_paths = profiler.write(os.path.join(self.out_dir.name, "profile"))
+        self.assertIn(os.path.join(self.out_dir.name, "profile.html"), file_paths)
+        self.assertTrue(all(os.path.isfile(file_path) for file_path in file_paths))
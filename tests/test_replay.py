@@ -0,0 +1,43 @@
+import logging
+import tempfile
+import unittest
+
+from genedescriptions.data_manager import DataManager
+from genedescriptions.human_gene_table import HumanGeneTable
+from genedescriptions.replay import ReplayMissError, ReplayMode, ReplayStore
+
+logger = logging.getLogger("Replay tests")
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Replay tests")
+        self.store_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.store_dir.cleanup()
+
+    def test_record_and_replay(self):
+        request_key = ReplayStore.get_request_key("GET", "http://example.org/data")
+        self.assertNotEqual(request_key, ReplayStore.get_request_key("POST", "http://example.org/data", b"body"))
+        recording_store = ReplayStore(dir_path=self.store_dir.name, mode=ReplayMode.RECORD)
+        self.assertEqual(recording_store.fetch(request_key, lambda: b"response"), b"response")
+        self.assertTrue(recording_store.has_response(request_key))
+        replaying_store = ReplayStore(dir_path=self.store_dir.name, mode=ReplayMode.REPLAY)
+        self.assertEqual(replaying_store.fetch(request_key, lambda: self.fail("network accessed in replay mode")),
+                         b"response")
+        with self.assertRaises(ReplayMissError):
+            replaying_store.fetch("GET http://example.org/other", lambda: b"response")
+        self.assertEqual(ReplayStore(dir_path=self.store_dir.name).fetch(request_key, lambda: b"new"), b"new")
+
+    def test_replay_hgnc_data(self):
+        store = ReplayStore(dir_path=self.store_dir.name, mode=ReplayMode.RECORD)
+        hgnc_content = b"HGNC ID\tEnsembl gene ID\tApproved symbol\tApproved name\n" \
+                       b"HGNC:1100\tENSG00000012048\tBRCA1\tBRCA1 DNA repair associated\n" \
+                       b"HGNC:9999\t\tWITHDRAWN\twithdrawn gene\n"
+        store.save_response(ReplayStore.get_request_key("GET", HumanGeneTable.HGNC_URL), hgnc_content)
+        store.mode = ReplayMode.REPLAY
+        human_genes_props = DataManager.get_human_gene_props(human_gene_table=HumanGeneTable(replay_store=store))
+        self.assertEqual(dict(human_genes_props),
+                         {"ENSG00000012048": ["HGNC:1100", "BRCA1", "BRCA1 DNA repair associated"]})
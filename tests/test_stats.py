@@ -0,0 +1,58 @@
+import logging
+import unittest
+
+from genedescriptions.gene_description import GeneDescription
+from genedescriptions.stats import DescriptionsStats
+
+logger = logging.getLogger("Stats tests")
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        logger.info("Starting Stats tests")
+        self.gene_descs = []
+        for i in range(6):
+            gene_desc = GeneDescription(gene_id="WB:WBGene0000000" + str(i), gene_name="gene-" + str(i))
+            gene_desc.stats.num_initial_go_ids_f = i
+            gene_desc.stats.num_initial_go_ids_p = 0
+            gene_desc.stats.num_initial_go_ids_c = 0
+            gene_desc.stats.set_best_orthologs = ["HGNC:" + str(j) for j in range(i)]
+            if i % 2 == 0:
+                gene_desc.go_description = "exhibits binding activity"
+                gene_desc.description = "Exhibits binding activity."
+                gene_desc.stats.set_final_go_ids_f = ["GO:0005488"]
+                gene_desc.stats.average_terms_level = i
+            if i % 3 == 0:
+                gene_desc.orthology_description = "is an ortholog of human BRCA1"
+                gene_desc.go_description = "" if gene_desc.go_description is None else gene_desc.go_description
+            self.gene_descs.append(gene_desc)
+
+    def test_calculate_stats(self):
+        stats = DescriptionsStats()
+        stats.calculate_stats(self.gene_descs)
+        self.assertEqual(stats.total_number_of_genes, 6)
+        self.assertEqual(stats.number_genes_with_non_null_description, 3)
+        self.assertEqual(stats.number_genes_with_non_null_go_description, 4)
+        self.assertEqual(stats.number_genes_with_null_go_description, 2)
+        self.assertEqual(stats.number_genes_with_null_orthology_description, 4)
+        self.assertEqual(stats.number_genes_with_more_than_3_initial_go_terms, 2)
+        self.assertEqual(stats.number_genes_with_more_than_3_best_orthologs, 2)
+        # empty descriptions are excluded from the averages on initial terms but not from those on final terms
+        self.assertAlmostEqual(stats.average_number_initial_go_terms_f, 2)
+        self.assertAlmostEqual(stats.average_number_final_go_terms_f, 0.75)
+        self.assertAlmostEqual(stats.average_term_level, 2)
+        self.assertAlmostEqual(stats.average_number_orthologs, 1.5)
+        self.assertEqual(stats.average_number_do_annotations, 0)
+
+    def test_incremental_stats_same_as_calculate_stats(self):
+        stats = DescriptionsStats()
+        stats.calculate_stats(self.gene_descs)
+        incremental_stats = DescriptionsStats()
+        for gene_desc in self.gene_descs[0:2]:
+            incremental_stats.add_gene_desc(gene_desc)
+        incremental_stats.add_stats_rows([DescriptionsStats.get_stats_row(gene_desc) for gene_desc in
+                                          self.gene_descs[2:]])
+        self.assertEqual(stats.to_dict().keys(), incremental_stats.to_dict().keys())
+        for stat_name, value in stats.to_dict().items():
+            self.assertAlmostEqual(value, incremental_stats.to_dict()[stat_name])
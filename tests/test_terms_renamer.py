@@ -0,0 +1,47 @@
+import logging
+import os
+import re
+import unittest
+
+from ontobio.ontol_factory import OntologyFactory
+
+from genedescriptions.commons import Module
+from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
+from genedescriptions.terms_renamer import TermsRenamer
+
+logger = logging.getLogger("Terms Renamer tests")
+
+
+class TestTermsRenamer(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Terms Renamer tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.conf_parser = GenedescConfigParser(os.path.join(self.this_dir, os.path.pardir, "tests", "config_test.yml"))
+
+    def test_rename_ontology_terms(self):
+        terms_replacement_regex = self.conf_parser.get_module_property(module=Module.GO,
+                                                                       prop=ConfigModuleProperty.RENAME_TERMS)
+        ontology = OntologyFactory().create(os.path.join(self.this_dir, "data", "go_gd_test.obo"))
+        expected_ontology = OntologyFactory().create(os.path.join(self.this_dir, "data", "go_gd_test.obo"))
+        for regex_to_substitute, regex_target in terms_replacement_regex.items():
+            for node in expected_ontology.search(regex_to_substitute, is_regex=True):
+                expected_ontology.node(node)["label"] = re.sub(regex_to_substitute, regex_target,
+                                                               expected_ontology.node(node)["label"])
+        renamed_terms = TermsRenamer(terms_replacement_regex).rename_ontology_terms(ontology)
+        self.assertTrue(len(renamed_terms) > 0)
+        for node_id in ontology.nodes():
+            self.assertEqual(ontology.label(node_id), expected_ontology.label(node_id))
+            if node_id in renamed_terms:
+                self.assertEqual(renamed_terms[node_id][1], ontology.label(node_id))
+                self.assertNotEqual(renamed_terms[node_id][0], renamed_terms[node_id][1])
+
+    def test_rename(self):
+        renamer = TermsRenamer({"^neuron$": "nervous system", "(.*)([a-z]+ )neuron$": "\\1\\2neurons",
+                                "^(\\w+) \\1$": "\\1", "nervous (?P<part>system)": "\\g<part> nervous"})
+        self.assertEqual(renamer.rename("neuron"), "system nervous")
+        self.assertEqual(renamer.rename("motor neuron"), "motor neurons")
+        self.assertEqual(renamer.rename("pharynx pharynx"), "pharynx")
+        self.assertEqual(renamer.rename("pharynx"), "pharynx")
+        self.assertEqual(TermsRenamer().rename("neuron"), "neuron")
@@ -35,3 +35,35 @@ class TestGOModule(unittest.TestCase):
         for annotations in self.df.expression_associations.associations_by_subj.values():
             for annotation in annotations:
                 self.assertTrue(annotation["evidence"]["type"] == "IDA")
+
+    def test_get_best_sister_species_orthologs(self):
+        sister_sp_fullname = "Caenorhabditis briggsae"
+        num_annotations = {"WBGene10000001": 1, "WBGene10000002": 3, "WBGene10000003": 2, "WBGene10000004": 5}
+        requested_genes = []
+
+        class SisterDataManager(object):
+            def get_annotations_for_gene(self, gene_id, annot_type, priority_list):
+                requested_genes.append(gene_id)
+                return [None] * num_annotations[gene_id]
+
+        self.df.orthology_store.add_orthologs("WB:WBGene00000001", sister_sp_fullname, [
+            ["WBGene10000001", "cbg-1", "OrthoFinder;Compara"], ["WBGene10000002", "cbg-2", "OrthoFinder"],
+            ["WBGene10000003", "cbg-3", "OrthoFinder;Compara"]])
+        self.df.orthology_store.add_orthologs("WB:WBGene00000002", sister_sp_fullname, [
+            ["WBGene10000002", "cbg-2", "OrthoFinder"], ["WBGene10000004", "cbg-4", "OrthoFinder"]])
+        self.df.orthology_store.add_orthologs("WB:WBGene00000003", sister_sp_fullname,
+                                              [["WBGene10000001", "cbg-1", "OrthoFinder"]])
+        self.df.orthology_store.add_orthologs("WB:WBGene00000004", "Homo sapiens",
+                                              [["ENSG00000012048", "BRCA1", "OrthoFinder"]])
+        self.df.orthology_store.add_orthologs("WB:WBGene00000005", sister_sp_fullname, [])
+        best_orthologs = self.df.get_best_sister_species_orthologs(
+            sister_sp_fullname=sister_sp_fullname, sister_species_data_fetcher=SisterDataManager())
+        self.assertEqual(best_orthologs, {"WB:WBGene00000001": ["WBGene10000003", "cbg-3"],
+                                          "WB:WBGene00000002": ["WBGene10000004", "cbg-4"],
+                                          "WB:WBGene00000003": ["WBGene10000001", "cbg-1"]})
+        # annotations of each candidate ortholog are counted once
+        self.assertEqual(sorted(requested_genes), sorted(set(requested_genes)))
+        for gene_id, best_ortholog in best_orthologs.items():
+            self.assertEqual(self.df.get_best_orthologs_for_gene(
+                gene_id, orth_species_full_name=[sister_sp_fullname],
+                sister_species_data_fetcher=SisterDataManager())[0][0], best_ortholog)
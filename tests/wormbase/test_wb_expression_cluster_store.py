@@ -0,0 +1,38 @@
+import logging
+import unittest
+
+from wormbase.wb_data_manager import WBDataManager
+from wormbase.wb_expression_cluster_store import ExpressionClusterStore
+
+logger = logging.getLogger("WB Expression Cluster Store tests")
+
+
+class TestExpressionClusterStore(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Expression Cluster Store tests")
+        self.terms_replacement_regex = {"^(.*) neuron$": "\\1 neurons", " cell$": " cells"}
+
+    def test_add_gene(self):
+        store = ExpressionClusterStore(terms_replacement_regex=self.terms_replacement_regex, add_article_to_terms=True)
+        terms = store.add_gene("WBGene00000001", ["AVA neuron", "pharynx", "intestinal cell"],
+                               ["Microarray study", "RNAseq analysis"])
+        self.assertEqual(terms, ("AVA neurons", "the pharynx", "intestinal cells"))
+        self.assertEqual(store.get_terms("WBGene00000001"), terms)
+        self.assertEqual(store.get_studies("WBGene00000001"), ("Microarray", "RNAseq"))
+        self.assertEqual(terms, tuple(WBDataManager.transform_expression_cluster_terms(
+            WBDataManager.get_replaced_terms_arr(["AVA neuron", "pharynx", "intestinal cell"],
+                                                 self.terms_replacement_regex))))
+
+    def test_shared_terms(self):
+        store = ExpressionClusterStore(terms_replacement_regex=self.terms_replacement_regex)
+        store.add_gene("WBGene00000001", ["AVA neuron", "pharynx"], ["Microarray study"])
+        store.add_gene("WBGene00000002", ["pharynx", "AVA neuron"], ["Microarray study"])
+        store.add_gene("WBGene00000003", ["pharynx"], [])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.get_num_unique_terms(), 2)
+        self.assertEqual(store.get_num_unique_studies(), 1)
+        self.assertIs(store.get_terms("WBGene00000001")[0], store.get_terms("WBGene00000002")[1])
+        self.assertIsNone(store.get_studies("WBGene00000003"))
+        self.assertIsNone(store.get_terms("WBGene00000004"))
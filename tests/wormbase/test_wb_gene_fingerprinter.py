@@ -0,0 +1,101 @@
+import logging
+import os
+import unittest
+
+from ontobio.assocmodel import AssociationSet
+
+from genedescriptions.commons import Gene
+from genedescriptions.data_manager import DataManager
+from genedescriptions.config_parser import GenedescConfigParser
+from wormbase.wb_data_manager import WBDataManager
+from wormbase.wb_expression_cluster_store import ExpressionClusterStore
+from wormbase.wb_gene_fingerprinter import WBGeneFingerprinter
+
+logger = logging.getLogger("WB Gene Fingerprinter tests")
+
+
+class TestWBGeneFingerprinter(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting WB Gene Fingerprinter tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.conf_parser = GenedescConfigParser(os.path.join(self.this_dir, "config_test_wb.yml"))
+        self.dm = WBDataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"],
+                                config=self.conf_parser, species="c_briggsae")
+        self.genes = [Gene("WB:WBGene0000000" + str(i), "gene-" + str(i), False, False) for i in range(2)]
+        for gene in self.genes:
+            self.dm.orthology_store.add_orthologs(gene.id, "Caenorhabditis elegans", [
+                ["WB:WBGene0010000" + str(i), "orth-" + str(i), "m1;m2"] for i in range(2)])
+            self.dm.protein_domain_store.add_gene(gene.id[3:], ["PF00001 \"7 transmembrane receptor\""])
+        self.dm.expression_cluster_genereg_data = ExpressionClusterStore()
+        self.dm.expression_cluster_genereg_data.add_gene("WBGene00000001", ["term"], ["study"])
+
+    def _get_fingerprints(self):
+        fingerprinter = WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser)
+        return [fingerprinter.get_gene_fingerprint(gene) for gene in self.genes]
+
+    def test_get_gene_fingerprint(self):
+        fingerprints = self._get_fingerprints()
+        self.assertEqual(fingerprints, self._get_fingerprints())
+        self.assertNotEqual(fingerprints[0], fingerprints[1])
+        self.dm.orthology_store.add_orthologs("WB:WBGene00000000", "Caenorhabditis elegans", [
+            ["WB:WBGene00100000", "orth-0", "m1;m2"]])
+        new_fingerprints = self._get_fingerprints()
+        self.assertNotEqual(fingerprints[0], new_fingerprints[0])
+        self.assertEqual(fingerprints[1], new_fingerprints[1])
+        self.dm.protein_domain_store.add_gene("WBGene00000001", ["IPR000001 \"Kringle\""])
+        self.assertNotEqual(new_fingerprints[1], self._get_fingerprints()[1])
+
+    def test_get_context_fingerprint(self):
+        context_fingerprint = WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser).get_context_fingerprint()
+        self.conf_parser.config["generic"]["output_dir"] = "other_dir"
+        self.assertEqual(context_fingerprint,
+                         WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser).get_context_fingerprint())
+        self.conf_parser.config["go_sentences_options"]["exclude_terms"].append("GO:0000001")
+        self.assertNotEqual(context_fingerprint,
+                            WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser).get_context_fingerprint())
+
+    def test_get_genes_affected_by_ontology_changes(self):
+        fingerprinter = WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser)
+        snapshots = fingerprinter.get_ontology_snapshots()
+        self.assertEqual(snapshots, {"go": {}, "do": {}, "expression": {}})
+        self.assertEqual(fingerprinter.get_genes_affected_by_ontology_changes(
+            old_snapshots={"go": {"GO:0000001": ["removed term", [], 0, 0.0]}}, new_snapshots=snapshots), set())
+
+    @staticmethod
+    def _get_association_set(annotations):
+        association_set = AssociationSet(association_map={}, subject_label_map={})
+        association_set.associations_by_subj = {subject_id: [{"object": {"id": term_id}} for term_id in term_ids] for
+                                                subject_id, term_ids in annotations.items()}
+        return association_set
+
+    def test_ortholog_ontology_changes_affect_genes_with_annotated_orthologs(self):
+        sister_df = WBDataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"],
+                                  config=self.conf_parser, species="c_elegans")
+        sister_df.go_associations = self._get_association_set({"WB:WBGene00100000": ["GO:0000001"],
+                                                               "WB:WBGene00100001": ["GO:0000002"]})
+        df_agr = DataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"])
+        df_agr.go_associations = self._get_association_set({"RGD:HGNC:1": ["GO:0000003"]})
+        self.dm.orthology_store.add_orthologs("WB:WBGene00000001", "Homo sapiens", [["ENSG00000000001", "HUM1",
+                                                                                      "m1;m2"]])
+        fingerprinter = WBGeneFingerprinter(dm=self.dm, conf_parser=self.conf_parser, sister_df=sister_df,
+                                            df_agr=df_agr, sister_best_orthologs={
+                                                "WB:WBGene00000000": ["WBGene00100000", "orth-0"],
+                                                "WB:WBGene00000001": ["WB:WBGene00100001", "orth-1"]},
+                                            ensembl_hgnc_ids_map={"ENSG00000000001": "HGNC:1"})
+        snapshots = fingerprinter.get_ontology_snapshots()
+        self.assertEqual(set(snapshots.keys()), {"go", "do", "expression", "sister_go", "agr_go"})
+        changed_term = ["changed term", [], 0, 0.0]
+        self.assertEqual(fingerprinter.get_genes_affected_by_ontology_changes(
+            old_snapshots={"sister_go": {"GO:0000001": changed_term}}, new_snapshots=snapshots),
+            {"WB:WBGene00000000"})
+        self.assertEqual(fingerprinter.get_genes_affected_by_ontology_changes(
+            old_snapshots={"agr_go": {"GO:0000003": changed_term}}, new_snapshots=snapshots), {"WB:WBGene00000001"})
+        self.assertEqual(fingerprinter.get_genes_affected_by_ontology_changes(
+            old_snapshots={"go": {"GO:0000001": changed_term}, "agr_go": {"GO:0000001": changed_term}},
+            new_snapshots=snapshots), set())
+        self.assertEqual(fingerprinter.get_context_fingerprint(), WBGeneFingerprinter(
+            dm=self.dm, conf_parser=self.conf_parser, sister_df=WBDataManager(
+                do_relations=None, go_relations=["subClassOf"], config=self.conf_parser, species="c_elegans"),
+            df_agr=df_agr).get_context_fingerprint())
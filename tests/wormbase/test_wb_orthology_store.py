@@ -0,0 +1,75 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from wormbase.wb_orthology_store import OrthologyStore
+
+logger = logging.getLogger("WB Orthology Store tests")
+
+ORTHOLOGY_FILE_CONTENT = """# WormBase orthologs
+#
+WBGene00000001\tgene-1
+Caenorhabditis briggsae\tWBGene10000001\tcbg-1\tOrthoFinder
+Caenorhabditis briggsae\tWBGene10000002\tcbg-2\tOrthoFinder;Compara
+Caenorhabditis briggsae\tWBGene10000003\tcbg-3\tOrthoFinder;Compara
+Homo sapiens\tENSG00000012048\tBRCA1\tOrthoFinder;Compara;Panther
+Homo sapiens\tPRJEB28388_00001\tfake\tOrthoFinder;Compara;Panther;Ensembl
+=
+WBGene00000002\tgene-2
+Homo sapiens\tENSG00000139618\tBRCA2\tOrthoFinder
+=
+WBGene00000003\tgene-3
+Caenorhabditis briggsae\tPRJEB28388_00002\tfake\tOrthoFinder
+=
+"""
+
+
+class TestOrthologyStore(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Orthology Store tests")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.orthology_file_path = os.path.join(self.tmp_dir.name, "orthologs.txt")
+        with open(self.orthology_file_path, "w") as orthology_file:
+            orthology_file.write(ORTHOLOGY_FILE_CONTENT)
+        self.store = OrthologyStore.from_file(self.orthology_file_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_from_file(self):
+        self.assertEqual(len(self.store), 2)
+        self.assertTrue("WB:WBGene00000001" in self.store)
+        self.assertFalse("WB:WBGene00000003" in self.store)
+        self.assertEqual(self.store.get_species("WB:WBGene00000001"), ["Caenorhabditis briggsae", "Homo sapiens"])
+        self.assertEqual(self.store.get_orthologs("WB:WBGene00000001", "Caenorhabditis briggsae"),
+                         (("WBGene10000002", "cbg-2", 2), ("WBGene10000003", "cbg-3", 2),
+                          ("WBGene10000001", "cbg-1", 1)))
+        self.assertEqual(self.store.get_orthologs("WB:WBGene00000001", "Homo sapiens"),
+                         (("ENSG00000012048", "BRCA1", 3),))
+        self.assertEqual(self.store.get_orthologs("WB:WBGene00000002", "Caenorhabditis briggsae"), ())
+
+    def test_get_best_orthologs(self):
+        self.assertEqual(self.store.get_best_orthologs("WB:WBGene00000001", ["Caenorhabditis briggsae"]),
+                         ([["WBGene10000002", "cbg-2"], ["WBGene10000003", "cbg-3"]], "Caenorhabditis briggsae"))
+        self.assertEqual(self.store.get_best_orthologs("WB:WBGene00000002", ["Caenorhabditis briggsae",
+                                                                             "Homo sapiens"]),
+                         ([["ENSG00000139618", "BRCA2"]], "Homo sapiens"))
+        self.assertEqual(self.store.get_best_orthologs("WB:WBGene00000004", ["Homo sapiens"]), (None, "Homo sapiens"))
+        num_annotations = {"WBGene10000001": 10, "WBGene10000002": 1, "WBGene10000003": 2}
+        self.assertEqual(self.store.get_best_orthologs("WB:WBGene00000001", ["Caenorhabditis briggsae"],
+                                                       annotations_count_func=lambda x: num_annotations[x]),
+                         ([["WBGene10000003", "cbg-3"]], "Caenorhabditis briggsae"))
+
+    def test_save_and_load(self):
+        index_file_path = os.path.join(self.tmp_dir.name, "index", "orthologs.pickle")
+        self.assertIsNone(OrthologyStore.load(index_file_path))
+        self.store.save(index_file_path)
+        loaded_store = OrthologyStore.load(index_file_path)
+        self.assertEqual(list(loaded_store.get_gene_ids()), list(self.store.get_gene_ids()))
+        for gene_id in self.store.get_gene_ids():
+            for species in self.store.get_species(gene_id):
+                self.assertEqual(loaded_store.get_orthologs(gene_id, species),
+                                 self.store.get_orthologs(gene_id, species))
@@ -0,0 +1,39 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from wormbase.wb_protein_domain_store import ProteinDomainStore
+
+logger = logging.getLogger("WB Protein Domain Store tests")
+
+PROTEIN_DOMAIN_FILE_CONTENT = "WBGene00000001\tgene-1\tCE00001\tPF00001 \"7 transmembrane receptor\"\t" \
+                              "IPR000001 \"Kringle\"\n" \
+                              "WBGene00000002\tgene-2\tCE00002\tIPR000001 \"Kringle\"\tSM00130\n" \
+                              "WBGene00000003\tgene-3\tCE00003\t\n" \
+                              "WBGene00000004\tgene-4\n"
+
+
+class TestProteinDomainStore(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting Protein Domain Store tests")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.protein_domain_file_path = os.path.join(self.tmp_dir.name, "protein_domains.csv")
+        with open(self.protein_domain_file_path, "w") as protein_domain_file:
+            protein_domain_file.write(PROTEIN_DOMAIN_FILE_CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_from_file(self):
+        store = ProteinDomainStore.from_file(self.protein_domain_file_path)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get_num_unique_domains(), 3)
+        self.assertEqual(store.get_domains("WBGene00000001"), [("PF00001", "7 transmembrane receptor"),
+                                                               ("IPR000001", "Kringle")])
+        self.assertEqual(store.get_domains("WBGene00000002"), [("IPR000001", "Kringle"), ("SM00130", "")])
+        self.assertEqual(store.get_domain_names("WBGene00000002"), ["Kringle", "SM00130"])
+        self.assertEqual(store.get_domain_names("WBGene00000003"), [])
+        self.assertFalse("WBGene00000004" in store)
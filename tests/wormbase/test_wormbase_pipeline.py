@@ -0,0 +1,106 @@
+import logging
+import unittest
+import os
+
+from unittest import mock
+
+from genedescriptions.api_manager import APIManager
+from genedescriptions.commons import Gene
+from genedescriptions.config_parser import GenedescConfigParser
+from genedescriptions.gene_description import GeneDescription
+from wormbase.wb_data_manager import WBDataManager
+from wormbase.wb_expression_cluster_store import ExpressionClusterStore
+from wormbase import wormbase_pipeline
+from wormbase.wormbase_pipeline import get_sister_species_data_manager, prefetch_api_data, get_gene_term_counts, \
+    get_trimming_config, select_genes
+
+logger = logging.getLogger("WormBase pipeline tests")
+
+
+class RecordingAPIManager(APIManager):
+    """api manager that records the requested keys instead of sending requests"""
+
+    def __init__(self):
+        super().__init__(textpresso_api_token="")
+        self.requested_keywords = []
+        self.requested_gene_ids = []
+
+    def get_textpresso_popularities(self, keywords):
+        self.requested_keywords.extend(keywords)
+        return {keyword: 0 for keyword in keywords}
+
+    def get_gene_classes(self, gene_ids):
+        self.requested_gene_ids.extend(gene_ids)
+        return {gene_id: None for gene_id in gene_ids}
+
+
+class TestWormBasePipeline(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(filename=None, level="ERROR", format='%(asctime)s - %(name)s - %(levelname)s: %(message)s')
+        logger.info("Starting WormBase pipeline tests")
+        self.this_dir = os.path.split(__file__)[0]
+        self.conf_parser = GenedescConfigParser(os.path.join(self.this_dir, "config_test_wb.yml"))
+        self.dm = WBDataManager(do_relations=None, go_relations=["subClassOf", "BFO:0000050"],
+                                config=self.conf_parser, species="c_briggsae")
+        self.dm.gene_data = {"WB:WBGene0000000" + str(i): Gene("WB:WBGene0000000" + str(i), "gene-" + str(i), False,
+                                                               False) for i in range(3)}
+        self.dm.orthology_store.add_orthologs("WB:WBGene00000000", "Caenorhabditis elegans", [
+            ["WB:WBGene0010000" + str(i), "orth-" + str(i), "m1;m2"] for i in range(5)])
+        self.dm.orthology_store.add_orthologs("WB:WBGene00000001", "Caenorhabditis elegans", [
+            ["WB:WBGene0020000" + str(i), "few-orth-" + str(i), "m1"] for i in range(3)])
+        self.dm.expression_cluster_genereg_data = ExpressionClusterStore()
+        self.dm.expression_cluster_genereg_data.add_gene("WBGene00000001", ["term-" + str(i) for i in range(4)],
+                                                         ["study"])
+        self.dm.expression_cluster_genereg_data.add_gene("WBGene00000002", ["few-term"], ["study"])
+
+    def test_prefetch_api_data(self):
+        api_manager = RecordingAPIManager()
+        prefetch_api_data(dm=self.dm, api_manager=api_manager)
+        self.assertEqual(set(api_manager.requested_keywords), {"orth-" + str(i) for i in range(5)} |
+                         {"term-" + str(i) for i in range(4)})
+        self.assertEqual(set(api_manager.requested_gene_ids), {"WB:WBGene0010000" + str(i) for i in range(5)})
+
+    def test_prefetch_api_data_for_selected_genes(self):
+        api_manager = RecordingAPIManager()
+        prefetch_api_data(dm=self.dm, api_manager=api_manager, genes=[self.dm.gene_data["WB:WBGene00000002"]])
+        self.assertEqual(api_manager.requested_keywords, [])
+        self.assertEqual(api_manager.requested_gene_ids, [])
+
+    def test_select_genes(self):
+        self.assertEqual([gene.id for gene in select_genes(self.dm.get_gene_data())],
+                         ["WB:WBGene0000000" + str(i) for i in range(3)])
+        self.assertEqual([gene.id for gene in select_genes(self.dm.get_gene_data(), max_genes=2)],
+                         ["WB:WBGene00000000", "WB:WBGene00000001"])
+        self.assertEqual([gene.id for gene in select_genes(self.dm.get_gene_data(), gene_ids=[
+            "WBGene00000002", "WB:WBGene00000000", "WB:WBGene99999999"])], ["WB:WBGene00000000", "WB:WBGene00000002"])
+        self.assertEqual([gene.id for gene in select_genes(self.dm.get_gene_data(), gene_ids=[
+            "WBGene00000002", "WBGene00000001"], max_genes=1)], ["WB:WBGene00000001"])
+
+    def test_sister_species_data_manager_is_loaded_once(self):
+        with mock.patch.object(WBDataManager, "load_ontology_from_file") as load_ontology_mock, \
+                mock.patch.object(WBDataManager, "load_associations_from_file") as load_associations_mock, \
+                mock.patch.dict(wormbase_pipeline._shared_data_managers, clear=True):
+            sister_dms = [get_sister_species_data_manager(sister_species="c_elegans", conf_parser=self.conf_parser)
+                          for _ in range(3)]
+            self.assertTrue(all(sister_dm is sister_dms[0] for sister_dm in sister_dms))
+            self.assertEqual(load_ontology_mock.call_count, 1)
+            self.assertEqual(load_associations_mock.call_count, 1)
+
+    def test_get_gene_term_counts(self):
+        gene_desc = GeneDescription(gene_id="WB:WBGene00000000", gene_name="gene-0")
+        gene_desc.stats.set_initial_go_ids = ["GO:0000001", "GO:0000002", "GO:0000003"]
+        gene_desc.stats.set_final_go_ids_p = ["GO:0000001"]
+        gene_desc.stats.set_final_go_ids_f = ["GO:0000002"]
+        gene_desc.stats.set_initial_do_ids = ["DOID:1"]
+        term_counts = get_gene_term_counts(gene_desc)
+        self.assertEqual(term_counts["go_initial"], 3)
+        self.assertEqual(term_counts["go_final"], 2)
+        self.assertEqual(term_counts["do_initial"], 1)
+        self.assertEqual(term_counts["expression_final"], 0)
+
+    def test_get_trimming_config(self):
+        trimming_config = get_trimming_config(self.conf_parser)
+        self.assertEqual(set(trimming_config.keys()), {"go", "expression", "disease"})
+        self.assertTrue(all("trimming_algorithm" in module_config and "max_num_terms" in module_config for
+                            module_config in trimming_config.values()))
@@ -4,13 +4,18 @@ import re
 
 import inflect
 
-from collections import defaultdict
-from typing import List
+from typing import Dict, List
 from ontobio import AssociationSetFactory
 from ontobio.io.gafparser import GafParser
 from genedescriptions.commons import DataType, Gene, Module
 from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
 from genedescriptions.data_manager import ExpressionClusterFeature, DataManager, ExpressionClusterType
+from genedescriptions.instrumentation import timed
+from genedescriptions.ontology_label_index import OntologyLabelIndex
+from genedescriptions.ontology_registry import OntologyRegistry
+from wormbase.wb_expression_cluster_store import ExpressionClusterStore
+from wormbase.wb_orthology_store import OrthologyStore
+from wormbase.wb_protein_domain_store import ProteinDomainStore
 
 
 logger = logging.getLogger("WB Data Manager")
@@ -20,15 +25,20 @@ class WBDataManager(DataManager):
     """data fetcher for WormBase raw files for a single species"""
 
     def __init__(self, config: GenedescConfigParser, species: str, go_relations: List[str] = None,
-                 do_relations: List[str] = None, use_cache: bool = False):
+                 do_relations: List[str] = None, use_cache: bool = False, array_ontology_cache_dir: str = None,
+                 ontology_registry: OntologyRegistry = None):
         """create a new data fetcher for WormBase. Files will be downloaded from WB ftp site. For convenience, file
         locations are automatically generated and stored in class variables ending in _url for remote filed and
         _cache_path for caching
 
         Args:
             species (str): WormBase species to fetch
+            array_ontology_cache_dir (str): if provided, GO is loaded as a read-only array ontology saved in this
+                directory
+            ontology_registry (OntologyRegistry): registry of the ontologies already loaded by other data managers
         """
         self.config = config
+        self.array_ontology_cache_dir = array_ontology_cache_dir
         raw_files_source = config.get_wb_raw_file_sources()
         cache_location = config.get_cache_dir()
         release_version = config.get_wb_release()
@@ -49,7 +59,8 @@ class WBDataManager(DataManager):
             "ec_molreg_prefix" in organisms_info[species] else None
         expression_cluster_genereg_prefix = organisms_info[species]["ec_genereg_prefix"] if \
             "ec_genereg_prefix" in organisms_info[species] else None
-        super().__init__(go_relations=go_relations, do_relations=do_relations, use_cache=use_cache)
+        super().__init__(go_relations=go_relations, do_relations=do_relations, use_cache=use_cache,
+                         ontology_registry=ontology_registry)
         self.gene_data_cache_path = os.path.join(cache_location, "wormbase", release_version, "species", species,
                                                  project_id, "annotation", species + '.' + project_id +
                                                  '.' + release_version + ".geneIDs.txt.gz")
@@ -85,14 +96,16 @@ class WBDataManager(DataManager):
         self.orthology_cache_path = os.path.join(cache_location, "wormbase", release_version, "species", species,
                                                  project_id, "annotation", species + '.' + project_id + '.' +
                                                  release_version + ".orthologs.txt.gz")
-        self.orthologs = defaultdict(lambda: defaultdict(list))
+        self.orthology_index_cache_path = self.orthology_cache_path.replace(
+            ".txt.gz", ".v" + str(OrthologyStore.VERSION) + ".pickle")
+        self.orthology_store = OrthologyStore()
         self.protein_domain_url = raw_files_source + '/' + release_version + '/species/' + species + '/' + \
                                   project_id + '/annotation/' + species + '.' + project_id + '.' + release_version + \
                                   '.protein_domains.csv.gz'
         self.protein_domain_cache_path = os.path.join(cache_location, "wormbase", release_version, "species", species,
                                                       project_id, "annotation", species + '.' + project_id +
                                                       '.' + release_version + ".protein_domains.csv.gz")
-        self.protein_domains = defaultdict(list)
+        self.protein_domain_store = ProteinDomainStore()
         self.expression_ontology_cache_path = os.path.join(cache_location, "wormbase", release_version, "ONTOLOGY",
                                                            "anatomy_ontology." + release_version + ".obo")
         self.expression_ontology_url = raw_files_source + '/' + release_version + '/ONTOLOGY/anatomy_ontology.' + \
@@ -106,19 +119,19 @@ class WBDataManager(DataManager):
         self.expression_cluster_anatomy_cache_path = self._get_expression_cluster_cache_path(
             prefix=expression_cluster_anatomy_prefix, ec_type="anatomy", release_version=release_version,
             cache_location=cache_location)
-        self.expression_cluster_anatomy_data = defaultdict(list) if self.expression_cluster_anatomy_url else None
+        self.expression_cluster_anatomy_data = None
         self.expression_cluster_molreg_url = self._get_expression_cluster_url(
             prefix=expression_cluster_molreg_prefix, ec_type="molReg", release_version=release_version)
         self.expression_cluster_molreg_cache_path = self._get_expression_cluster_cache_path(
             prefix=expression_cluster_molreg_prefix, ec_type="molReg", release_version=release_version,
             cache_location=cache_location)
-        self.expression_cluster_molreg_data = defaultdict(list) if self.expression_cluster_molreg_url else None
+        self.expression_cluster_molreg_data = None
         self.expression_cluster_genereg_url = self._get_expression_cluster_url(
             prefix=expression_cluster_genereg_prefix, ec_type="geneReg", release_version=release_version)
         self.expression_cluster_genereg_cache_path = self._get_expression_cluster_cache_path(
             prefix=expression_cluster_genereg_prefix, ec_type="geneReg", release_version=release_version,
             cache_location=cache_location)
-        self.expression_cluster_genereg_data = defaultdict(list) if self.expression_cluster_genereg_url else None
+        self.expression_cluster_genereg_data = None
 
     @staticmethod
     def _get_expression_cluster_url(prefix, ec_type, release_version):
@@ -137,6 +150,7 @@ class WBDataManager(DataManager):
         else:
             return None
 
+    @timed("wb_data_manager.load_gene_data_from_file")
     def load_gene_data_from_file(self) -> None:
         """load gene list from pre-set file location"""
         logger.info("Loading genes data from file")
@@ -150,6 +164,7 @@ class WBDataManager(DataManager):
                         name = fields[2] if fields[2] != '' else fields[3]
                         self.gene_data["WB:" + fields[1]] = Gene("WB:" + fields[1], name, fields[4] == "Dead", False)
 
+    @timed("wb_data_manager.load_associations_from_file")
     def load_associations_from_file(self, associations_type: DataType, associations_url: str,
                                     associations_cache_path: str, config: GenedescConfigParser,
                                     association_additional_url: str = None,
@@ -215,26 +230,18 @@ class WBDataManager(DataManager):
                 terms_blacklist=config.get_module_property(module=Module.DO_EXPERIMENTAL,
                                                            prop=ConfigModuleProperty.EXCLUDE_TERMS))
 
+    @timed("wb_data_manager.load_orthology_from_file")
     def load_orthology_from_file(self):
         logger.info("Loading orthology from file")
-        orthology_file = self._get_cached_file(cache_path=self.orthology_cache_path,
-                                               file_source_url=self.orthology_url)
-        orthologs = defaultdict(list)
-        gene_id = ""
-        header = True
-        for line in open(orthology_file):
-            if not line.startswith("#"):
-                if line.strip() == "=":
-                    header = True
-                    self.orthologs["WB:" + gene_id] = orthologs
-                    orthologs = defaultdict(list)
-                elif header:
-                    gene_id = line.strip().split()[0]
-                    header = False
-                else:
-                    ortholog_arr = line.strip().split("\t")
-                    if not ortholog_arr[1].startswith("PRJEB28388"):
-                        orthologs[ortholog_arr[0]].append(ortholog_arr[1:4])
+        orthology_store = None
+        if self.use_cache and os.path.isfile(self.orthology_cache_path):
+            orthology_store = OrthologyStore.load(self.orthology_index_cache_path)
+        if orthology_store is None:
+            orthology_file = self._get_cached_file(cache_path=self.orthology_cache_path,
+                                                   file_source_url=self.orthology_url)
+            orthology_store = OrthologyStore.from_file(orthology_file)
+            orthology_store.save(self.orthology_index_cache_path)
+        self.orthology_store = orthology_store
 
     def get_best_orthologs_for_gene(self, gene_id: str, orth_species_full_name: List[str],
                                     sister_species_data_fetcher: DataManager = None,
@@ -257,48 +264,56 @@ class WBDataManager(DataManager):
 
         """
         logger.info("Getting list of best orthologs for gene")
-        best_orthologs = None
-        curr_orth_fullname = None
-        if len(orth_species_full_name) > 0:
-            for curr_orth_fullname in orth_species_full_name:
-                if curr_orth_fullname in self.orthologs[gene_id]:
-                    orthologs = self.orthologs[gene_id][curr_orth_fullname]
-                    # for human orthologs, take only those predicted by more than 1 method - removed
-                    # if len(orth_species_full_name) == 1 and orth_species_full_name[0] == "Homo sapiens":
-                    #     orthologs = [ortholog for ortholog in orthologs if len(ortholog[2].split(";")) > 1]
-                    orthologs_keys = []
-                    if len(orthologs) > 0:
-                        if len(orthologs) > 1:
-                            for ortholog in orthologs:
-                                if sister_species_data_fetcher:
-                                    orthologs_keys.append([ortholog[0], ortholog[1], len(ortholog[2].split(";")),
-                                                           len(sister_species_data_fetcher.get_annotations_for_gene(
-                                                               gene_id=ortholog[0], annot_type=DataType.GO,
-                                                               priority_list=ecode_priority_list))])
-                                else:
-                                    orthologs_keys.append([ortholog[0], ortholog[1], len(ortholog[2].split(";"))])
-                            if sister_species_data_fetcher:
-                                best_orthologs = [sorted(orthologs_keys, key=lambda x: (x[2], x[3]),
-                                                         reverse=True)[0][0:2]]
-                            else:
-                                best_orthologs = [[orth_key[0], orth_key[1]] for orth_key in
-                                                  sorted(orthologs_keys, key=lambda x: x[2], reverse=True) if
-                                                  orth_key[2] == max([orth[2] for orth in orthologs_keys])]
-                        else:
-                            best_orthologs = [[orthologs[0][0], orthologs[0][1]]]
-                        break
-        return best_orthologs, curr_orth_fullname
+        annotations_count_func = None
+        if sister_species_data_fetcher:
+            def annotations_count_func(ortholog_id):
+                return len(sister_species_data_fetcher.get_annotations_for_gene(
+                    gene_id=ortholog_id, annot_type=DataType.GO, priority_list=ecode_priority_list))
+        return self.orthology_store.get_best_orthologs(gene_id, orth_species_full_name=orth_species_full_name,
+                                                       annotations_count_func=annotations_count_func)
+
+    @timed("wb_data_manager.get_best_sister_species_orthologs")
+    def get_best_sister_species_orthologs(self, sister_sp_fullname: str, sister_species_data_fetcher: DataManager,
+                                          ecode_priority_list: List[str] = None) -> Dict[str, List[str]]:
+        """get the best ortholog in the sister species for all the genes, in a single pass
+
+        The best ortholog of each gene is the same returned by get_best_orthologs_for_gene for the sister species, but
+        the annotations of each candidate ortholog are counted only once, even when it is an ortholog of multiple
+        genes
+
+        Args:
+            sister_sp_fullname (str): the full name of the sister species
+            sister_species_data_fetcher (DataManager): data fetcher for the sister species
+            ecode_priority_list (List[str]): the evidence codes of the annotations to count for each ortholog
 
+        Returns:
+            Dict[str, List[str]]: id and name of the best ortholog, for each gene that has orthologs in the sister
+                species
+        """
+        logger.info("Getting best sister species orthologs for all genes")
+        num_annotations = {}
+
+        def annotations_count_func(ortholog_id):
+            if ortholog_id not in num_annotations:
+                num_annotations[ortholog_id] = len(sister_species_data_fetcher.get_annotations_for_gene(
+                    gene_id=ortholog_id, annot_type=DataType.GO, priority_list=ecode_priority_list))
+            return num_annotations[ortholog_id]
+
+        best_orthologs = {}
+        for gene_id in self.orthology_store.get_gene_ids():
+            gene_best_orthologs, _ = self.orthology_store.get_best_orthologs(
+                gene_id, orth_species_full_name=[sister_sp_fullname], annotations_count_func=annotations_count_func)
+            if gene_best_orthologs:
+                best_orthologs[gene_id] = gene_best_orthologs[0]
+        return best_orthologs
+
+    @timed("wb_data_manager.load_protein_domain_information")
     def load_protein_domain_information(self):
         """load protein domain data"""
         logger.info("Loading protein domain information from file")
         protein_domain_file = self._get_cached_file(cache_path=self.protein_domain_cache_path,
                                                     file_source_url=self.protein_domain_url)
-        for line in open(protein_domain_file):
-            linearr = line.strip().split("\t")
-            if len(linearr) > 3 and linearr[3] != "":
-                self.protein_domains[linearr[0]] = [domain[0:-1].split(" \"") if len(domain[0:-1].split(" \"")) > 1 else
-                                                    [domain, ""] for domain in linearr[3:]]
+        self.protein_domain_store = ProteinDomainStore.from_file(protein_domain_file)
 
     @staticmethod
     def get_replaced_terms_arr(terms, terms_replacement_regex):
@@ -310,65 +325,67 @@ class WBDataManager(DataManager):
             new_terms = tmp_terms
         return new_terms
 
-    def _load_expression_cluster_file(self, file_cache_path, file_url, load_into_data,
-                                      add_article_to_terms: bool = False,
-                                      add_to_expression_ontology_annotations: bool = False):
+    def _load_expression_cluster_file(self, file_cache_path, file_url, add_article_to_terms: bool = False,
+                                      add_to_expression_ontology_annotations: bool = False) -> ExpressionClusterStore:
         expr_clust_file = self._get_cached_file(cache_path=file_cache_path, file_source_url=file_url)
         header = True
         associations = []
         terms_ids_map = {}
+        labels_index = None
+        unresolved_terms = []
         if add_to_expression_ontology_annotations:
+            labels_index = OntologyLabelIndex(self.expression_ontology)
             associations = [association for subj_associations in
                             self.expression_associations.associations_by_subj.values() for association in
                             subj_associations]
         terms_replacement_regex = self.config.get_module_property(module=Module.EXPRESSION,
                                                                   prop=ConfigModuleProperty.RENAME_TERMS)
-        for line in open(expr_clust_file):
-            if not header:
-                linearr = line.strip().split("\t")
-                load_into_data[linearr[0]] = linearr[1:]
-                load_into_data[linearr[0]][2] = WBDataManager.get_replaced_terms_arr(
-                    load_into_data[linearr[0]][2].split(","), terms_replacement_regex)
-                if add_article_to_terms:
-                    load_into_data[linearr[0]][2] = WBDataManager.transform_expression_cluster_terms(
-                        load_into_data[linearr[0]][2])
-                if load_into_data[linearr[0]] and load_into_data[linearr[0]][3]:
-                    load_into_data[linearr[0]][3] = [word.replace(" study", "").replace(" analysis", "") for word in
-                                                     load_into_data[linearr[0]][3].split(",")]
-                if add_to_expression_ontology_annotations:
-                    for term in load_into_data[linearr[0]][2]:
-                        if term not in terms_ids_map:
-                            term_ids = self.expression_ontology.resolve_names([term])
-                            if term_ids:
-                                terms_ids_map[term] = term_ids[0]
-                            else:
-                                terms_ids_map[term] = None
-                        if term in terms_ids_map and terms_ids_map[term]:
-                            associations.append(DataManager.create_annotation_record(
-                                line, "WB:" + linearr[0], "", "gene", "", terms_ids_map[term], ["Enriched"], "A", "IDA",
-                                "", "", ""))
-            else:
-                header = False
+        expression_cluster_store = ExpressionClusterStore(terms_replacement_regex=terms_replacement_regex,
+                                                          add_article_to_terms=add_article_to_terms)
+        with open(expr_clust_file) as expr_clust_fh:
+            for line in expr_clust_fh:
+                if not header:
+                    linearr = line.strip().split("\t")
+                    terms = expression_cluster_store.add_gene(
+                        gene_id=linearr[0], terms=linearr[3].split(","),
+                        studies=linearr[4].split(",") if len(linearr) > 4 and linearr[4] else [])
+                    if add_to_expression_ontology_annotations:
+                        for term in terms:
+                            if term not in terms_ids_map:
+                                terms_ids_map[term] = labels_index.resolve(term)
+                                if terms_ids_map[term] is None:
+                                    unresolved_terms.append(term)
+                            if terms_ids_map[term]:
+                                associations.append(DataManager.create_annotation_record(
+                                    line, "WB:" + linearr[0], "", "gene", "", terms_ids_map[term], ["Enriched"], "A",
+                                    "IDA", "", "", ""))
+                else:
+                    header = False
         if add_to_expression_ontology_annotations:
+            if unresolved_terms:
+                logger.info(str(len(unresolved_terms)) + " expression cluster terms not found in the expression "
+                                                         "ontology")
+                logger.debug("Unresolved expression cluster terms: " + ", ".join(unresolved_terms))
             self.set_associations(DataType.EXPR, associations=AssociationSetFactory().create_from_assocs(
                 assocs=associations, ontology=self.expression_ontology), config=self.config)
+        return expression_cluster_store
 
+    @timed("wb_data_manager.load_expression_cluster_data")
     def load_expression_cluster_data(self):
         """load all expression cluster data"""
         logger.info("Loading expression cluster data from file")
-        if self.expression_cluster_anatomy_data is not None:
-            self._load_expression_cluster_file(self.expression_cluster_anatomy_cache_path,
-                                               self.expression_cluster_anatomy_url,
-                                               self.expression_cluster_anatomy_data, add_article_to_terms=True,
-                                               add_to_expression_ontology_annotations=True)
-        if self.expression_cluster_molreg_data is not None:
-            self._load_expression_cluster_file(self.expression_cluster_molreg_cache_path,
-                                               self.expression_cluster_molreg_url,
-                                               self.expression_cluster_molreg_data, add_article_to_terms=False)
-        if self.expression_cluster_genereg_data is not None:
-            self._load_expression_cluster_file(self.expression_cluster_genereg_cache_path,
-                                               self.expression_cluster_genereg_url,
-                                               self.expression_cluster_genereg_data, add_article_to_terms=False)
+        if self.expression_cluster_anatomy_url:
+            self.expression_cluster_anatomy_data = self._load_expression_cluster_file(
+                self.expression_cluster_anatomy_cache_path, self.expression_cluster_anatomy_url,
+                add_article_to_terms=True, add_to_expression_ontology_annotations=True)
+        if self.expression_cluster_molreg_url:
+            self.expression_cluster_molreg_data = self._load_expression_cluster_file(
+                self.expression_cluster_molreg_cache_path, self.expression_cluster_molreg_url,
+                add_article_to_terms=False)
+        if self.expression_cluster_genereg_url:
+            self.expression_cluster_genereg_data = self._load_expression_cluster_file(
+                self.expression_cluster_genereg_cache_path, self.expression_cluster_genereg_url,
+                add_article_to_terms=False)
 
     def get_expression_cluster_feature(self, gene_id, expression_cluster_type: ExpressionClusterType,
                                        feature: ExpressionClusterFeature):
@@ -379,7 +396,8 @@ class WBDataManager(DataManager):
             expression_cluster_type (ExpressionClusterType): the type of expression data to read
             feature (ExpressionClusterFeature): the feature to read
 
-        Returns: the requested feature
+        Returns:
+            Tuple[str, ...]: the requested feature, or None if the gene has no data for it
         """
         target = None
         if expression_cluster_type == ExpressionClusterType.ANATOMY:
@@ -388,14 +406,11 @@ class WBDataManager(DataManager):
             target = self.expression_cluster_molreg_data
         elif expression_cluster_type == ExpressionClusterType.GENEREG:
             target = self.expression_cluster_genereg_data
-        idx = 2
-        if feature == ExpressionClusterFeature.TERMS:
-            idx = 2
-        elif feature == ExpressionClusterFeature.STUDIES:
-            idx = 3
-        if target and gene_id in target and target[gene_id][idx]:
-            return target[gene_id][idx]
-        return None
+        if target is None:
+            return None
+        if feature == ExpressionClusterFeature.STUDIES:
+            return target.get_studies(gene_id)
+        return target.get_terms(gene_id)
 
     @staticmethod
     def transform_expression_cluster_terms(terms_list: List[str]):
@@ -408,7 +423,7 @@ class WBDataManager(DataManager):
         self.load_gene_data_from_file()
         self.load_ontology_from_file(ontology_type=DataType.GO, ontology_url=self.go_ontology_url,
                                      ontology_cache_path=self.go_ontology_cache_path,
-                                     config=self.config)
+                                     config=self.config, array_ontology_cache_dir=self.array_ontology_cache_dir)
         self.load_associations_from_file(associations_type=DataType.GO, associations_url=self.go_associations_url,
                                          associations_cache_path=self.go_associations_cache_path, config=self.config)
         self.load_ontology_from_file(ontology_type=DataType.DO, ontology_url=self.do_ontology_url,
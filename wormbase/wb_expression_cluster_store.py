@@ -0,0 +1,108 @@
+"""immutable store of the expression cluster terms and studies of the genes of a WormBase species"""
+import sys
+
+from typing import Dict, Iterator, List, Tuple
+
+import inflect
+
+from genedescriptions.terms_renamer import TermsRenamer
+
+
+class ExpressionClusterStore(object):
+    """expression cluster terms and studies of a set of genes
+
+    Terms and studies are transformed once per unique value and kept in tables of canonical strings, so that genes
+    sharing the same terms or studies share the same string objects. The data of each gene are stored as tuples
+    """
+
+    def __init__(self, terms_replacement_regex: Dict[str, str] = None, add_article_to_terms: bool = False):
+        """create a new empty store
+
+        Args:
+            terms_replacement_regex (Dict[str, str]): regular expressions to apply to the terms, in order, with their
+                replacement strings
+            add_article_to_terms (bool): whether to add the definite article to singular terms
+        """
+        self._terms_renamer = TermsRenamer(terms_replacement_regex)
+        self._inflect_engine = inflect.engine() if add_article_to_terms else None
+        self._transformed_terms = {}
+        self._transformed_studies = {}
+        self._terms = {}
+        self._studies = {}
+        self._gene_terms = {}
+        self._gene_studies = {}
+
+    def __contains__(self, gene_id: str):
+        return gene_id in self._gene_terms
+
+    def __len__(self):
+        return len(self._gene_terms)
+
+    def _transform_term(self, term: str) -> str:
+        transformed_term = self._transformed_terms.get(term)
+        if transformed_term is None:
+            transformed_term = self._terms_renamer.rename(term)
+            if self._inflect_engine and self._inflect_engine.singular_noun(transformed_term.split(" ")[-1]) is False:
+                transformed_term = "the " + transformed_term
+            transformed_term = self._terms.setdefault(transformed_term, sys.intern(transformed_term))
+            self._transformed_terms[term] = transformed_term
+        return transformed_term
+
+    def _transform_study(self, study: str) -> str:
+        transformed_study = self._transformed_studies.get(study)
+        if transformed_study is None:
+            transformed_study = study.replace(" study", "").replace(" analysis", "")
+            transformed_study = self._studies.setdefault(transformed_study, sys.intern(transformed_study))
+            self._transformed_studies[study] = transformed_study
+        return transformed_study
+
+    def add_gene(self, gene_id: str, terms: List[str], studies: List[str]) -> Tuple[str, ...]:
+        """set the expression cluster data of a gene, replacing any data previously added for it
+
+        Args:
+            gene_id (str): the gene id
+            terms (List[str]): the terms of the gene, before renaming
+            studies (List[str]): the studies of the gene, as written in the expression cluster file
+
+        Returns:
+            Tuple[str, ...]: the terms of the gene, after renaming
+        """
+        self._gene_terms[gene_id] = tuple([self._transform_term(term) for term in terms])
+        self._gene_studies[gene_id] = tuple([self._transform_study(study) for study in studies])
+        return self._gene_terms[gene_id]
+
+    def get_gene_ids(self) -> Iterator[str]:
+        """get the ids of the genes in the store
+
+        Returns:
+            Iterator[str]: the gene ids
+        """
+        return iter(self._gene_terms)
+
+    def get_terms(self, gene_id: str) -> Tuple[str, ...]:
+        """get the expression cluster terms of a gene
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            Tuple[str, ...]: the terms of the gene, or None if the gene has no terms
+        """
+        return self._gene_terms.get(gene_id) or None
+
+    def get_studies(self, gene_id: str) -> Tuple[str, ...]:
+        """get the expression cluster studies of a gene
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            Tuple[str, ...]: the studies of the gene, or None if the gene has no studies
+        """
+        return self._gene_studies.get(gene_id) or None
+
+    def get_num_unique_terms(self) -> int:
+        return len(self._terms)
+
+    def get_num_unique_studies(self) -> int:
+        return len(self._studies)
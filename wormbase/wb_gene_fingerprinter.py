@@ -0,0 +1,203 @@
+"""fingerprints of the input data used to generate the description of each WormBase gene"""
+import copy
+
+from typing import Any, Dict, List, Set
+
+from genedescriptions.commons import Gene, Module
+from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
+from genedescriptions.data_manager import DataManager
+from genedescriptions.incremental import get_fingerprint, get_associations_fingerprint_data
+from genedescriptions.ontology_diff import OntologyDiff, get_ontology_snapshot, get_genes_affected_by_diff
+from wormbase.wb_data_manager import WBDataManager
+
+
+class WBGeneFingerprinter(object):
+    """compute the fingerprints of the inputs of the WormBase gene descriptions of a species
+
+    The context fingerprint covers the data shared by all the genes, that is the configuration. The fingerprint of each
+    gene covers its own data: gene properties, annotations, orthologs, protein domains, expression clusters, and the
+    data of its human and sister species orthologs. Textpresso popularities and gene classes are not included, since
+    they are read from the API cache. GO, DO and anatomy ontologies of the species and the GO ontologies of sister
+    species and human orthologs are compared through their snapshots, which invalidate only the genes affected by their
+    changes. Changes to the ontologies of other species affect the genes whose orthologs are annotated to the changed
+    terms
+    """
+
+    # modules that use each ontology, used to check whether information content is relevant for trimming
+    ONTOLOGY_MODULES = {"go": [Module.GO],
+                        "do": [Module.DO_EXPERIMENTAL, Module.DO_BIOMARKER, Module.DO_ORTHOLOGY],
+                        "expression": [Module.EXPRESSION],
+                        "sister_go": [Module.GO],
+                        "agr_go": [Module.GO]}
+
+    # version of the fingerprint data. Increase it whenever the generation of the descriptions changes, to invalidate
+    # the fingerprints computed by previous versions
+    VERSION = 2
+
+    def __init__(self, dm: WBDataManager, conf_parser: GenedescConfigParser, sister_df: WBDataManager = None,
+                 df_agr: DataManager = None, sister_best_orthologs: Dict[str, List[str]] = None,
+                 human_genes_props: Dict[str, List[str]] = None, ensembl_hgnc_ids_map: Dict[str, str] = None):
+        """create a new fingerprinter
+
+        Args:
+            dm (WBDataManager): the data manager of the species, with all the data loaded
+            conf_parser (GenedescConfigParser): the configuration object
+            sister_df (WBDataManager): the data manager of the sister species, if any
+            df_agr (DataManager): the data manager of AGR human data, if any
+            sister_best_orthologs (Dict[str, List[str]]): the best sister species ortholog of each gene
+            human_genes_props (Dict[str, List[str]]): properties of human genes, indexed by Ensembl ID
+            ensembl_hgnc_ids_map (Dict[str, str]): HGNC ID of human genes, indexed by Ensembl ID
+        """
+        self.dm = dm
+        self.conf_parser = conf_parser
+        self.sister_df = sister_df
+        self.df_agr = df_agr
+        self.sister_best_orthologs = sister_best_orthologs if sister_best_orthologs else {}
+        self.human_genes_props = human_genes_props if human_genes_props else {}
+        self.ensembl_hgnc_ids_map = ensembl_hgnc_ids_map if ensembl_hgnc_ids_map else {}
+        self._orth_fullnames = list(dm.orth_fullnames) if dm.orth_fullnames else []
+        if dm.sister_sp_fullname:
+            self._orth_fullnames.append(dm.sister_sp_fullname)
+
+    def get_context_fingerprint(self) -> str:
+        """get the fingerprint of the data shared by all the genes of the species
+
+        Returns:
+            str: the fingerprint
+        """
+        config = copy.deepcopy({key: value for key, value in self.conf_parser.config.items() if key not in
+                                ["generic", "wb_options"]})
+        # terms added from the GO slim are stored in arbitrary order
+        if "go_sentences_options" in config and config["go_sentences_options"].get("exclude_terms"):
+            config["go_sentences_options"]["exclude_terms"] = sorted(config["go_sentences_options"]["exclude_terms"])
+        return get_fingerprint({
+            "version": self.VERSION,
+            "config": config,
+            "organisms": self.conf_parser.get_wb_organisms_info(),
+            "sister_species": self.sister_df is not None,
+            "human": self.df_agr is not None})
+
+    def _get_ontology_names(self) -> List[str]:
+        return [ontology_name for ontology_name in self.ONTOLOGY_MODULES if
+                (ontology_name != "sister_go" or self.sister_df is not None) and
+                (ontology_name != "agr_go" or self.df_agr is not None)]
+
+    def _get_ontology_and_associations(self, ontology_name: str):
+        if ontology_name == "go":
+            return self.dm.go_ontology, self.dm.go_associations
+        elif ontology_name == "do":
+            return self.dm.do_ontology, self.dm.do_associations
+        elif ontology_name == "expression":
+            return self.dm.expression_ontology, self.dm.expression_associations
+        elif ontology_name == "sister_go":
+            return self.sister_df.go_ontology, self.sister_df.go_associations
+        else:
+            return self.df_agr.go_ontology, self.df_agr.go_associations
+
+    @staticmethod
+    def _get_sister_ortholog_id(sister_best_ortholog: List[str]) -> str:
+        return sister_best_ortholog[0] if sister_best_ortholog[0].startswith("WB:") else "WB:" + sister_best_ortholog[0]
+
+    def _get_genes_with_sister_orthologs(self, sister_gene_ids: Set[str]) -> Set[str]:
+        if not sister_gene_ids:
+            return set()
+        return {gene_id for gene_id, sister_best_ortholog in self.sister_best_orthologs.items() if
+                sister_best_ortholog and self._get_sister_ortholog_id(sister_best_ortholog) in sister_gene_ids}
+
+    def _get_genes_with_human_orthologs(self, human_gene_ids: Set[str]) -> Set[str]:
+        if not human_gene_ids:
+            return set()
+        genes = set()
+        for gene_id in self.dm.orthology_store.get_gene_ids():
+            for ortholog in self.dm.orthology_store.get_orthologs(gene_id, "Homo sapiens"):
+                hgnc_id = self.ensembl_hgnc_ids_map.get(ortholog[0])
+                if hgnc_id and "RGD:" + hgnc_id in human_gene_ids:
+                    genes.add(gene_id)
+                    break
+        return genes
+
+    def get_ontology_snapshots(self) -> Dict[str, Dict[str, List[Any]]]:
+        """get the snapshots of the GO, DO and anatomy ontologies of the species and of the GO ontologies of sister
+        species and human orthologs, if loaded
+
+        Returns:
+            Dict[str, Dict[str, List[Any]]]: the snapshots, as returned by get_ontology_snapshot, indexed by ontology
+                name
+        """
+        return {ontology_name: get_ontology_snapshot(self._get_ontology_and_associations(ontology_name)[0]) for
+                ontology_name in self._get_ontology_names()}
+
+    def get_genes_affected_by_ontology_changes(self, old_snapshots: Dict[str, Dict[str, List[Any]]],
+                                               new_snapshots: Dict[str, Dict[str, List[Any]]]) -> Set[str]:
+        """get the genes whose descriptions may change because of the differences between two sets of snapshots of the
+        ontologies of the species
+
+        Changes to information content are considered only for the ontologies used by modules trimmed with the ic
+        algorithm
+
+        Args:
+            old_snapshots (Dict[str, Dict[str, List[Any]]]): the snapshots of the previous run, indexed by ontology
+                name
+            new_snapshots (Dict[str, Dict[str, List[Any]]]): the snapshots of the current run, as returned by
+                get_ontology_snapshots
+
+        Returns:
+            Set[str]: the ids of the affected genes
+        """
+        affected_genes = set()
+        for ontology_name in self._get_ontology_names():
+            ontology, associations = self._get_ontology_and_associations(ontology_name)
+            include_ic_changes = any(self.conf_parser.get_module_property(
+                module=module, prop=ConfigModuleProperty.TRIMMING_ALGORITHM) == "ic" for module in
+                self.ONTOLOGY_MODULES[ontology_name])
+            annotated_genes = get_genes_affected_by_diff(
+                OntologyDiff(old_snapshots.get(ontology_name, {}), new_snapshots.get(ontology_name, {})),
+                ontology=ontology, association_set=associations, include_ic_changes=include_ic_changes)
+            if ontology_name == "sister_go":
+                annotated_genes = self._get_genes_with_sister_orthologs(annotated_genes)
+            elif ontology_name == "agr_go":
+                annotated_genes = self._get_genes_with_human_orthologs(annotated_genes)
+            affected_genes.update(annotated_genes)
+        return affected_genes
+
+    def _get_human_ortholog_data(self, ortholog_id: str) -> List[Any]:
+        hgnc_id = self.ensembl_hgnc_ids_map.get(ortholog_id)
+        human_data = [self.human_genes_props.get(ortholog_id), hgnc_id]
+        if hgnc_id and self.df_agr is not None:
+            human_data.append(self.df_agr.go_associations.subject_label_map.get("RGD:" + hgnc_id))
+            human_data.append(get_associations_fingerprint_data(self.df_agr.go_associations, "RGD:" + hgnc_id))
+        return human_data
+
+    def get_gene_fingerprint(self, gene: Gene) -> str:
+        """get the fingerprint of the data used to generate the description of a gene
+
+        Args:
+            gene (Gene): the gene
+
+        Returns:
+            str: the fingerprint
+        """
+        ec_gene_id = gene.id[3:]
+        orthologs = {species: self.dm.orthology_store.get_orthologs(gene.id, species) for species in
+                     self._orth_fullnames}
+        human_orthologs = {ortholog[0]: self._get_human_ortholog_data(ortholog[0]) for ortholog in
+                           orthologs.get("Homo sapiens", ())}
+        sister_best_ortholog = self.sister_best_orthologs.get(gene.id)
+        sister_data = None
+        if sister_best_ortholog and self.sister_df is not None:
+            sister_data = [sister_best_ortholog, get_associations_fingerprint_data(
+                self.sister_df.go_associations, self._get_sister_ortholog_id(sister_best_ortholog))]
+        expression_clusters = [[ec_store.get_terms(ec_gene_id), ec_store.get_studies(ec_gene_id)] if ec_store else
+                               None for ec_store in [self.dm.expression_cluster_anatomy_data,
+                                                     self.dm.expression_cluster_molreg_data,
+                                                     self.dm.expression_cluster_genereg_data]]
+        return get_fingerprint({
+            "gene": list(gene),
+            "go": get_associations_fingerprint_data(self.dm.go_associations, gene.id),
+            "do": get_associations_fingerprint_data(self.dm.do_associations, gene.id),
+            "expression": get_associations_fingerprint_data(self.dm.expression_associations, gene.id),
+            "orthologs": orthologs,
+            "human_orthologs": human_orthologs,
+            "protein_domains": self.dm.protein_domain_store.get_domains(ec_gene_id),
+            "expression_clusters": expression_clusters,
+            "sister": sister_data})
@@ -0,0 +1,197 @@
+"""compact store of the orthologs of the genes of a WormBase species, ranked once at load time"""
+import logging
+import os
+import pickle
+import sys
+import tempfile
+
+from typing import Callable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OrthologyStore(object):
+    """orthologs of a set of genes, grouped by species
+
+    Species names are interned and stored once as a list, and the orthologs of each gene for each species are stored
+    as tuples of (ortholog id, ortholog name, number of prediction methods), sorted by decreasing number of methods.
+    Ties keep the order of the orthology file, so that rankings are the same as those obtained by sorting the raw
+    orthology data at each lookup
+    """
+
+    # version of the binary index format. Increase it whenever the structure of the stored data changes
+    VERSION = 1
+
+    def __init__(self):
+        self._species_names = []
+        self._species_indices = {}
+        self._orthologs = {}
+
+    def __contains__(self, gene_id: str):
+        return gene_id in self._orthologs
+
+    def __len__(self):
+        return len(self._orthologs)
+
+    def _get_species_index(self, species: str) -> int:
+        species_index = self._species_indices.get(species)
+        if species_index is None:
+            species_index = len(self._species_names)
+            self._species_names.append(sys.intern(species))
+            self._species_indices[self._species_names[-1]] = species_index
+        return species_index
+
+    def add_orthologs(self, gene_id: str, species: str, orthologs: List[List[str]]):
+        """set the orthologs of a gene for a species, replacing any orthologs previously added for the same species
+
+        Args:
+            gene_id (str): the gene id
+            species (str): the full name of the species of the orthologs
+            orthologs (List[List[str]]): the orthologs, each containing ortholog id, ortholog name and the prediction
+                methods separated by semicolons
+        """
+        ranked_orthologs = sorted([(ortholog[0], ortholog[1], len(ortholog[2].split(";")) if len(ortholog) > 2 else 1)
+                                   for ortholog in orthologs], key=lambda x: x[2], reverse=True)
+        if gene_id not in self._orthologs:
+            self._orthologs[gene_id] = {}
+        self._orthologs[gene_id][self._get_species_index(species)] = tuple(ranked_orthologs)
+
+    def get_gene_ids(self) -> Iterator[str]:
+        """get the ids of the genes in the store
+
+        Returns:
+            Iterator[str]: the gene ids
+        """
+        return iter(self._orthologs)
+
+    def get_species(self, gene_id: str) -> List[str]:
+        """get the species in which a gene has orthologs
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            List[str]: the full names of the species
+        """
+        return [self._species_names[species_index] for species_index, orthologs in
+                self._orthologs.get(gene_id, {}).items() if orthologs]
+
+    def get_orthologs(self, gene_id: str, species: str) -> Tuple[Tuple[str, str, int], ...]:
+        """get the orthologs of a gene for a species
+
+        Args:
+            gene_id (str): the gene id
+            species (str): the full name of the species
+
+        Returns:
+            Tuple[Tuple[str, str, int], ...]: id, name and number of prediction methods of the orthologs, sorted by
+                decreasing number of methods
+        """
+        species_index = self._species_indices.get(species)
+        if species_index is None:
+            return ()
+        return self._orthologs.get(gene_id, {}).get(species_index, ())
+
+    def get_best_orthologs(self, gene_id: str, orth_species_full_name: List[str],
+                           annotations_count_func: Callable[[str], int] = None) -> Tuple[List[List[str]], str]:
+        """get the list of best orthologs for a gene from the first species in the list that has orthologs for it
+
+        The best orthologs are those predicted by the highest number of methods. If a function to count the
+        annotations of the orthologs is provided, only the ortholog with the highest number of annotations among them
+        is returned
+
+        Args:
+            gene_id (str): the gene id
+            orth_species_full_name (List[str]): list of species from which to look for the best orthologs
+            annotations_count_func (Callable[[str], int]): function that returns the number of annotations of an
+                ortholog given its id
+
+        Returns:
+            Tuple[List[List[str]], str]: the list of best orthologs, each containing ortholog id and name, or None if
+                no orthologs are found, and the name of the organism from which they are taken
+        """
+        curr_orth_fullname = None
+        for curr_orth_fullname in orth_species_full_name:
+            orthologs = self.get_orthologs(gene_id, curr_orth_fullname)
+            if orthologs:
+                max_num_methods = orthologs[0][2]
+                best_orthologs = [ortholog for ortholog in orthologs if ortholog[2] == max_num_methods]
+                if annotations_count_func and len(orthologs) > 1:
+                    best_orthologs = [max(best_orthologs, key=lambda x: annotations_count_func(x[0]))]
+                return [[ortholog[0], ortholog[1]] for ortholog in best_orthologs], curr_orth_fullname
+        return None, curr_orth_fullname
+
+    @staticmethod
+    def from_file(file_path: str) -> 'OrthologyStore':
+        """parse a WormBase orthology file
+
+        Args:
+            file_path (str): path to the uncompressed orthology file
+
+        Returns:
+            OrthologyStore: the store with the orthologs in the file
+        """
+        store = OrthologyStore()
+        orthologs = {}
+        gene_id = ""
+        header = True
+        with open(file_path) as orthology_file:
+            for line in orthology_file:
+                if line.startswith("#"):
+                    continue
+                line = line.strip()
+                if line == "=":
+                    header = True
+                    store._orthologs.pop("WB:" + gene_id, None)
+                    for species, species_orthologs in orthologs.items():
+                        store.add_orthologs("WB:" + gene_id, species, species_orthologs)
+                    orthologs = {}
+                elif header:
+                    gene_id = line.split()[0]
+                    header = False
+                else:
+                    ortholog_arr = line.split("\t")
+                    if not ortholog_arr[1].startswith("PRJEB28388"):
+                        if ortholog_arr[0] not in orthologs:
+                            orthologs[ortholog_arr[0]] = []
+                        orthologs[ortholog_arr[0]].append(ortholog_arr[1:4])
+        return store
+
+    def save(self, file_path: str):
+        """save the store to a binary index file, replacing it atomically if it already exists
+
+        Args:
+            file_path (str): path to the index file
+        """
+        logger.debug("Saving orthology index to " + file_path)
+        dir_path = os.path.dirname(file_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        fd, tmp_file_path = tempfile.mkstemp(dir=dir_path if dir_path else None, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp_file:
+            pickle.dump((self.VERSION, self._species_names, self._orthologs), tmp_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file_path, file_path)
+
+    @staticmethod
+    def load(file_path: str) -> 'OrthologyStore':
+        """load a store from a binary index file saved by OrthologyStore.save
+
+        Args:
+            file_path (str): path to the index file
+
+        Returns:
+            OrthologyStore: the store, or None if the file does not exist or has been saved with a different version
+        """
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "rb") as index_file:
+            version, species_names, orthologs = pickle.load(index_file)
+        if version != OrthologyStore.VERSION:
+            logger.debug("Ignoring orthology index " + file_path + " saved with a different version")
+            return None
+        store = OrthologyStore()
+        for species in species_names:
+            store._get_species_index(species)
+        store._orthologs = orthologs
+        return store
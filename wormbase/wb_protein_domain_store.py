@@ -0,0 +1,95 @@
+"""compact store of the protein domains of the genes of a WormBase species"""
+import sys
+
+from array import array
+from typing import List, Tuple
+
+
+class ProteinDomainStore(object):
+    """protein domains of a set of genes
+
+    Each distinct domain is parsed once and its accession and description are kept in a shared table. The domains of
+    each gene are stored as an array of indices into the table
+    """
+
+    def __init__(self):
+        self._accessions = []
+        self._descriptions = []
+        self._domain_indices = {}
+        self._gene_domains = {}
+
+    def __contains__(self, gene_id: str):
+        return gene_id in self._gene_domains
+
+    def __len__(self):
+        return len(self._gene_domains)
+
+    def _get_domain_index(self, domain: str) -> int:
+        domain_index = self._domain_indices.get(domain)
+        if domain_index is None:
+            # domains are written as accession "description"
+            domain_arr = domain[0:-1].split(" \"")
+            if len(domain_arr) > 1:
+                accession, description = domain_arr[0], domain_arr[1]
+            else:
+                accession, description = domain, ""
+            domain_index = len(self._accessions)
+            self._accessions.append(sys.intern(accession))
+            self._descriptions.append(sys.intern(description))
+            self._domain_indices[domain] = domain_index
+        return domain_index
+
+    def add_gene(self, gene_id: str, domains: List[str]):
+        """set the protein domains of a gene, replacing any domains previously added for it
+
+        Args:
+            gene_id (str): the gene id
+            domains (List[str]): the domains of the gene, as written in the protein domain file
+        """
+        self._gene_domains[gene_id] = array("i", [self._get_domain_index(domain) for domain in domains])
+
+    @staticmethod
+    def from_file(file_path: str) -> 'ProteinDomainStore':
+        """parse a WormBase protein domain file, one line at a time
+
+        Args:
+            file_path (str): path to the uncompressed protein domain file
+
+        Returns:
+            ProteinDomainStore: the store with the domains in the file
+        """
+        store = ProteinDomainStore()
+        with open(file_path) as protein_domain_file:
+            for line in protein_domain_file:
+                linearr = line.strip().split("\t")
+                if len(linearr) > 3 and linearr[3] != "":
+                    store.add_gene(linearr[0], linearr[3:])
+        return store
+
+    def get_domains(self, gene_id: str) -> List[Tuple[str, str]]:
+        """get the protein domains of a gene
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            List[Tuple[str, str]]: accession and description of the domains of the gene. Descriptions are empty for
+                domains without description
+        """
+        return [(self._accessions[domain_index], self._descriptions[domain_index]) for domain_index in
+                self._gene_domains.get(gene_id, ())]
+
+    def get_domain_names(self, gene_id: str) -> List[str]:
+        """get the names of the protein domains of a gene, to be used in descriptions
+
+        Args:
+            gene_id (str): the gene id
+
+        Returns:
+            List[str]: the description of each domain of the gene, or its accession if the domain has no description
+        """
+        return [self._descriptions[domain_index] or self._accessions[domain_index] for domain_index in
+                self._gene_domains.get(gene_id, ())]
+
+    def get_num_unique_domains(self) -> int:
+        return len(self._accessions)
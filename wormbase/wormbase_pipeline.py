@@ -5,7 +5,7 @@ import datetime
 import logging
 import os
 
-from typing import List
+from typing import Any, Dict, Iterable, List, Set, Tuple
 from num2words import num2words
 
 from genedescriptions.api_manager import APIManager
@@ -13,50 +13,230 @@ from genedescriptions.commons import DataType, Module, Gene
 from genedescriptions.config_parser import GenedescConfigParser, ConfigModuleProperty
 from genedescriptions.data_manager import DataManager, ExpressionClusterType, ExpressionClusterFeature
 from genedescriptions.gene_description import GeneDescription
+from genedescriptions.human_gene_table import HumanGeneTable
+from genedescriptions.incremental import IncrementalState, get_fingerprint
+from genedescriptions.instrumentation import GeneLatencyTracer, instrumentation
 from genedescriptions.descriptions_generator import OntologySentenceGenerator
-from genedescriptions.descriptions_writer import DescriptionsWriter
+from genedescriptions.descriptions_writer import StreamingDescriptionsWriter
+from genedescriptions.json_encoding import JsonEncoderBackend
+from genedescriptions.ontology_diff import save_ontology_snapshot, load_ontology_snapshot
+from genedescriptions.ontology_registry import OntologyRegistry
+from genedescriptions.profiling import Profiler, ProfilerType, ProfileScope, get_available_profiler_types
 from genedescriptions.precanned_modules import set_gene_ontology_module, set_disease_module, \
     generate_ortholog_sentence_wormbase_human, generate_ortholog_sentence_wormbase_non_c_elegans
+from genedescriptions.replay import ReplayMode, ReplayStore
 from genedescriptions.sentence_generation_functions import concatenate_words_with_oxford_comma, \
     get_best_human_ortholog_for_info_poor
 from wormbase.wb_data_manager import WBDataManager
+from wormbase.wb_gene_fingerprinter import WBGeneFingerprinter
 
 
-def load_data(organism, conf_parser: GenedescConfigParser):
-    logger = logging.getLogger("WB Gene Description Pipeline - Data loader")
-    sister_df = None
-    df_agr = None
-    organisms_info = conf_parser.get_wb_organisms_info()
-    df = WBDataManager(species=organism, do_relations=None, go_relations=["subClassOf", "BFO:0000050"],
-                       config=conf_parser)
-    if organism == "c_elegans":
-        df_agr = DataManager(go_relations=["subClassOf", "BFO:0000050"], do_relations=None)
+# evidence codes of the sister species annotations used to rank orthologs and to generate sister species sentences
+SISTER_SPECIES_ECODE_PRIORITY_LIST = ["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "HTP", "HDA", "HMP", "HGI", "HEP"]
+
+# sister species and AGR human data managers loaded in the process, indexed by data type, species and WB release.
+# They contain the same data for all the organisms that refer to them and are not modified after loading
+_shared_data_managers = {}
+
+
+def get_sister_species_data_manager(sister_species: str, conf_parser: GenedescConfigParser, use_cache: bool = False,
+                                    array_ontology_cache_dir: str = None,
+                                    ontology_registry: OntologyRegistry = None) -> WBDataManager:
+    """get a data manager with GO data for a sister species, loading it only the first time it is requested in the
+    process
+
+    Args:
+        sister_species (str): the WormBase name of the sister species
+        conf_parser (GenedescConfigParser): the configuration object
+        use_cache (bool): whether to use cached files
+        array_ontology_cache_dir (str): if provided, GO is loaded as an array ontology saved in this directory
+        ontology_registry (OntologyRegistry): registry of the ontologies already loaded
+
+    Returns:
+        WBDataManager: the data manager for the sister species
+    """
+    cache_key = ("sister_species", sister_species, conf_parser.get_wb_release())
+    if cache_key not in _shared_data_managers:
+        logger = logging.getLogger("WB Gene Description Pipeline - Data loader")
+        sister_df = WBDataManager(species=sister_species, do_relations=None,
+                                  go_relations=["subClassOf", "BFO:0000050"], config=conf_parser,
+                                  use_cache=use_cache, ontology_registry=ontology_registry)
+        logger.info("Loading GO data for sister species")
+        sister_df.load_ontology_from_file(ontology_type=DataType.GO, ontology_url=sister_df.go_ontology_url,
+                                          ontology_cache_path=sister_df.go_ontology_cache_path,
+                                          config=conf_parser, array_ontology_cache_dir=array_ontology_cache_dir)
+        sister_df.load_associations_from_file(associations_type=DataType.GO,
+                                              associations_url=sister_df.go_associations_url,
+                                              associations_cache_path=sister_df.go_associations_cache_path,
+                                              config=conf_parser)
+        _shared_data_managers[cache_key] = sister_df
+    return _shared_data_managers[cache_key]
+
+
+def get_agr_human_data_manager(conf_parser: GenedescConfigParser, use_cache: bool = False,
+                               array_ontology_cache_dir: str = None,
+                               ontology_registry: OntologyRegistry = None) -> DataManager:
+    """get a data manager with GO data for human genes from AGR, loading it only the first time it is requested in the
+    process
+
+    Args:
+        conf_parser (GenedescConfigParser): the configuration object
+        use_cache (bool): whether to use cached files
+        array_ontology_cache_dir (str): if provided, GO is loaded as an array ontology saved in this directory
+        ontology_registry (OntologyRegistry): registry of the ontologies already loaded
+
+    Returns:
+        DataManager: the data manager for human genes
+    """
+    cache_key = ("agr_human", conf_parser.get_wb_human_orthologs_go_ontology(),
+                 conf_parser.get_wb_human_orthologs_go_associations())
+    if cache_key not in _shared_data_managers:
+        df_agr = DataManager(go_relations=["subClassOf", "BFO:0000050"], do_relations=None, use_cache=use_cache,
+                             ontology_registry=ontology_registry)
         df_agr.load_ontology_from_file(ontology_type=DataType.GO,
                                        ontology_url=conf_parser.get_wb_human_orthologs_go_ontology(),
                                        ontology_cache_path=os.path.join(conf_parser.get_cache_dir(),
                                                                         "wormbase_agr_human", "go_ontology.obo"),
-                                       config=conf_parser)
+                                       config=conf_parser, array_ontology_cache_dir=array_ontology_cache_dir)
         df_agr.load_associations_from_file(associations_type=DataType.GO,
                                            associations_url=conf_parser.get_wb_human_orthologs_go_associations(),
                                            associations_cache_path=os.path.join(
                                                conf_parser.get_cache_dir(), "wormbase_agr_human", "go_assoc.daf.gz"),
                                            config=conf_parser)
+        _shared_data_managers[cache_key] = df_agr
+    return _shared_data_managers[cache_key]
+
+
+def load_data(organism, conf_parser: GenedescConfigParser, use_cache: bool = False,
+              array_ontology_cache_dir: str = None, ontology_registry: OntologyRegistry = None):
+    logger = logging.getLogger("WB Gene Description Pipeline - Data loader")
+    sister_df = None
+    df_agr = None
+    organisms_info = conf_parser.get_wb_organisms_info()
+    df = WBDataManager(species=organism, do_relations=None, go_relations=["subClassOf", "BFO:0000050"],
+                       config=conf_parser, use_cache=use_cache, array_ontology_cache_dir=array_ontology_cache_dir,
+                       ontology_registry=ontology_registry)
+    if organism == "c_elegans":
+        df_agr = get_agr_human_data_manager(conf_parser=conf_parser, use_cache=use_cache,
+                                            array_ontology_cache_dir=array_ontology_cache_dir,
+                                            ontology_registry=ontology_registry)
     if "main_sister_species" in organisms_info[organism] and organisms_info[organism]["main_sister_species"]:
-        sister_df = WBDataManager(species=organisms_info[organism]["main_sister_species"],
-                                  do_relations=None, go_relations=["subClassOf", "BFO:0000050"], config=conf_parser)
-        logger.info("Loading GO data for sister species")
-        sister_df.load_ontology_from_file(ontology_type=DataType.GO, ontology_url=sister_df.go_ontology_url,
-                                          ontology_cache_path=sister_df.go_ontology_cache_path,
-                                          config=conf_parser)
-        sister_df.load_associations_from_file(associations_type=DataType.GO,
-                                              associations_url=sister_df.go_associations_url,
-                                              associations_cache_path=sister_df.go_associations_cache_path,
-                                              config=conf_parser)
+        sister_df = get_sister_species_data_manager(sister_species=organisms_info[organism]["main_sister_species"],
+                                                    conf_parser=conf_parser, use_cache=use_cache,
+                                                    array_ontology_cache_dir=array_ontology_cache_dir,
+                                                    ontology_registry=ontology_registry)
     logger.info("Loading all data for main species")
     df.load_all_data_from_file()
     return df, sister_df, df_agr
 
 
+def select_genes(genes: Iterable[Gene], gene_ids: Iterable[str] = None, max_genes: int = None) -> List[Gene]:
+    """select the genes to process
+
+    Args:
+        genes (Iterable[Gene]): all the genes of the species
+        gene_ids (Iterable[str]): if provided, only the genes with these ids are selected. The WB prefix is optional
+        max_genes (int): if provided, the maximum number of genes to select
+
+    Returns:
+        List[Gene]: the selected genes, in the original order
+    """
+    if gene_ids:
+        gene_ids = {gene_id if gene_id.startswith("WB:") else "WB:" + gene_id for gene_id in gene_ids}
+        genes = [gene for gene in genes if gene.id in gene_ids]
+    else:
+        genes = list(genes)
+    if max_genes is not None:
+        genes = genes[0:max_genes]
+    return genes
+
+
+def prefetch_api_data(dm: WBDataManager, api_manager: APIManager, genes: Iterable[Gene] = None):
+    """resolve all the Textpresso popularity and gene class lookups needed to generate the descriptions of a species
+    before processing the genes, so that the requests are sent concurrently and the results are cached in the api
+    manager
+
+    Lookups are needed for the best orthologs of genes with more than 3 non-human best orthologs and for the genereg
+    expression cluster terms of genes with more than 3 of them. The keys are collected for all the genes, including
+    those that end up not needing them, so that the generation loop never waits for the network
+
+    Args:
+        dm (WBDataManager): the data manager of the species, with all the data loaded
+        api_manager (APIManager): the api manager to fill
+        genes (Iterable[Gene]): the genes to process. Default all the genes of the species
+    """
+    logger = logging.getLogger("WB Gene Description Pipeline - API prefetch")
+    popularity_keywords = set()
+    gene_class_ids = set()
+    for gene in genes if genes is not None else dm.get_gene_data():
+        if not (len(dm.orth_fullnames) == 1 and dm.orth_fullnames[0] == "Homo sapiens"):
+            best_orthologs, _ = dm.get_best_orthologs_for_gene(gene.id, orth_species_full_name=dm.orth_fullnames)
+            if best_orthologs and len(best_orthologs) > 3:
+                popularity_keywords.update([ortholog[1] for ortholog in best_orthologs])
+                gene_class_ids.update([ortholog[0] for ortholog in best_orthologs])
+        ec_genereg_terms = dm.get_expression_cluster_feature(gene_id=gene.id[3:],
+                                                             expression_cluster_type=ExpressionClusterType.GENEREG,
+                                                             feature=ExpressionClusterFeature.TERMS)
+        if ec_genereg_terms and len(ec_genereg_terms) > 3:
+            popularity_keywords.update(ec_genereg_terms)
+    logger.info("Prefetching Textpresso popularity for " + str(len(popularity_keywords)) + " keywords and gene class "
+                "for " + str(len(gene_class_ids)) + " genes")
+    api_manager.get_textpresso_popularities(popularity_keywords)
+    api_manager.get_gene_classes(gene_class_ids)
+
+
+def load_previous_incremental_run(fingerprinter: WBGeneFingerprinter, json_file_path: str, state_file_path: str,
+                                  snapshots_dir: str) -> Tuple[IncrementalState, IncrementalState,
+                                                               Dict[str, Dict[str, Any]], Set[str]]:
+    """create the incremental state of the current run and load the state and the descriptions of the previous run
+
+    The snapshots of the ontologies of the current run are saved in the snapshots directory, indexed by fingerprint,
+    and compared with those of the previous run to find the genes affected by ontology changes
+
+    Args:
+        fingerprinter (WBGeneFingerprinter): the fingerprinter of the species
+        json_file_path (str): path to the json file of the current run
+        state_file_path (str): path to the incremental state file
+        snapshots_dir (str): directory where to save ontology snapshots
+
+    Returns:
+        Tuple[IncrementalState, IncrementalState, Dict[str, Dict[str, Any]], Set[str]]: the state of the current run,
+            the state of the previous run, the descriptions of the previous run that can be reused, indexed by gene id,
+            and the ids of the genes affected by ontology changes. The previous descriptions are empty if there is no
+            compatible previous run
+    """
+    logger = logging.getLogger("WB Gene Description Pipeline - Incremental")
+    ontology_snapshots = fingerprinter.get_ontology_snapshots()
+    ontology_fingerprints = {}
+    for ontology_name, ontology_snapshot in ontology_snapshots.items():
+        ontology_fingerprints[ontology_name] = get_fingerprint(ontology_snapshot)
+        snapshot_path = os.path.join(snapshots_dir, ontology_fingerprints[ontology_name] + ".json")
+        if not os.path.isfile(snapshot_path):
+            save_ontology_snapshot(ontology_snapshot, snapshot_path)
+    incremental_state = IncrementalState(context_fingerprint=fingerprinter.get_context_fingerprint(),
+                                         json_file_path=json_file_path, ontology_fingerprints=ontology_fingerprints)
+    prev_incremental_state = IncrementalState.load(state_file_path)
+    if not incremental_state.is_compatible_with(prev_incremental_state):
+        logger.info("No compatible previous run, generating all the descriptions")
+        return incremental_state, prev_incremental_state, {}, set()
+    prev_ontology_snapshots = {}
+    for ontology_name, ontology_fingerprint in prev_incremental_state.ontology_fingerprints.items():
+        if ontology_fingerprint == ontology_fingerprints.get(ontology_name):
+            prev_ontology_snapshots[ontology_name] = ontology_snapshots[ontology_name]
+        else:
+            prev_ontology_snapshots[ontology_name] = load_ontology_snapshot(os.path.join(
+                snapshots_dir, ontology_fingerprint + ".json"))
+            if prev_ontology_snapshots[ontology_name] is None:
+                logger.info("Snapshot of the previous " + ontology_name + " ontology not found, generating all the "
+                            "descriptions")
+                return incremental_state, prev_incremental_state, {}, set()
+    dirty_gene_ids = fingerprinter.get_genes_affected_by_ontology_changes(old_snapshots=prev_ontology_snapshots,
+                                                                          new_snapshots=ontology_snapshots)
+    logger.info(str(len(dirty_gene_ids)) + " genes affected by ontology changes")
+    # previous descriptions are read before opening the output files, which may replace them
+    return incremental_state, prev_incremental_state, prev_incremental_state.load_gene_descriptions(), dirty_gene_ids
+
+
 def set_orthology_sentence(dm: WBDataManager, orth_fullnames: List[str], gene_desc: GeneDescription,
                            human_genes_props, api_manager):
     best_orthologs, selected_orth_name = dm.get_best_orthologs_for_gene(gene_desc.gene_id,
@@ -127,9 +307,9 @@ def set_expression_cluster_sentence(dm: WBDataManager, conf_parser: GenedescConf
     if ec_genereg_terms:
         several_word = ""
         if len(ec_genereg_terms) > 3:
-            t_p = [t_p for t_p in sorted([[term, api_manager.get_textpresso_popularity(term)] for
-                                          term in ec_genereg_terms], key=lambda x: (x[1], x[0][1]),
-                                         reverse=True)]
+            popularities = api_manager.get_textpresso_popularities(ec_genereg_terms)
+            t_p = [t_p for t_p in sorted([[term, popularities[term]] for term in ec_genereg_terms],
+                                         key=lambda x: (x[1], x[0][1]), reverse=True)]
             ec_genereg_terms = [term for term, popularity in t_p[0:3]]
             several_word = "several genes including "
         gene_desc.set_or_extend_module_description_and_final_stats(
@@ -172,27 +352,26 @@ def set_information_poor_sentence(orth_fullnames: List[str], selected_orthologs,
                                                                         human_df_agr.go_associations.subject_label_map[
                                                                             best_orth] + " " + human_func_sent)
 
-    protein_domains = dm.protein_domains[gene_desc.gene_id[3:]]
-    if protein_domains:
+    protein_domain_names = dm.protein_domain_store.get_domain_names(gene_desc.gene_id[3:])
+    if protein_domain_names:
         dom_word = "domain"
-        if len(protein_domains) > 1:
+        if len(protein_domain_names) > 1:
             dom_word = "domains"
         gene_desc.set_or_extend_module_description_and_final_stats(
             module=Module.PROTEIN_DOMAIN,
             description="is predicted to encode a protein with the following " + dom_word + ": " +
-                        concatenate_words_with_oxford_comma([ptdom[1] if ptdom[1] != "" else ptdom[0] for
-                                                             ptdom in protein_domains]))
+                        concatenate_words_with_oxford_comma(protein_domain_names))
 
 
 def set_sister_species_sentence(dm: WBDataManager, conf_parser: GenedescConfigParser, sister_sp_fullname,
-                                sister_df: WBDataManager, species, organism, gene_desc: GeneDescription, gene: Gene):
-    best_ortholog = dm.get_best_orthologs_for_gene(
-        gene_desc.gene_id, orth_species_full_name=[sister_sp_fullname], sister_species_data_fetcher=sister_df,
-        ecode_priority_list=["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "HTP", "HDA", "HMP", "HGI",
-                             "HEP"])[0][0]
-    if not best_ortholog[0].startswith("WB:"):
-        best_ortholog[0] = "WB:" + best_ortholog[0]
-    sister_sentences_generator = OntologySentenceGenerator(gene_id=best_ortholog[0], module=Module.GO,
+                                sister_df: WBDataManager, species, organism, gene_desc: GeneDescription, gene: Gene,
+                                best_ortholog: List[str] = None):
+    if best_ortholog is None:
+        best_ortholog = dm.get_best_orthologs_for_gene(
+            gene_desc.gene_id, orth_species_full_name=[sister_sp_fullname], sister_species_data_fetcher=sister_df,
+            ecode_priority_list=SISTER_SPECIES_ECODE_PRIORITY_LIST)[0][0]
+    best_ortholog_id = best_ortholog[0] if best_ortholog[0].startswith("WB:") else "WB:" + best_ortholog[0]
+    sister_sentences_generator = OntologySentenceGenerator(gene_id=best_ortholog_id, module=Module.GO,
                                                            data_manager=sister_df, config=conf_parser,
                                                            humans=sister_sp_fullname == "Homo sapiens",
                                                            limit_to_group="EXPERIMENTAL")
@@ -205,13 +384,215 @@ def set_sister_species_sentence(dm: WBDataManager, conf_parser: GenedescConfigPa
                                                  sister_sp_module_sentences.get_description())
 
 
+def get_gene_term_counts(gene_desc: GeneDescription) -> Dict[str, int]:
+    """get the number of annotated and final terms of the ontology modules of a gene description
+
+    Args:
+        gene_desc (GeneDescription): the gene description
+
+    Returns:
+        Dict[str, int]: the number of terms, indexed by module and stage
+    """
+    stats = gene_desc.stats
+    return {"go_annotations": stats.total_number_go_annotations,
+            "go_initial": len(stats.set_initial_go_ids),
+            "go_final": len(stats.set_final_go_ids_f) + len(stats.set_final_go_ids_p) + len(stats.set_final_go_ids_c),
+            "expression_initial": len(stats.set_initial_expression_ids),
+            "expression_final": len(stats.set_final_expression_ids),
+            "do_annotations": stats.total_number_do_annotations,
+            "do_initial": len(stats.set_initial_do_ids),
+            "do_final": len(stats.set_final_do_ids)}
+
+
+def get_trimming_config(conf_parser: GenedescConfigParser) -> Dict[str, Dict[str, Any]]:
+    """get the trimming algorithm and the maximum number of terms of the modules that apply trimming
+
+    Args:
+        conf_parser (GenedescConfigParser): the configuration object
+
+    Returns:
+        Dict[str, Dict[str, Any]]: the trimming properties, indexed by module name
+    """
+    return {module_name: {"trimming_algorithm": conf_parser.get_module_property(
+        module=module, prop=ConfigModuleProperty.TRIMMING_ALGORITHM), "max_num_terms": conf_parser.get_module_property(
+        module=module, prop=ConfigModuleProperty.MAX_NUM_TERMS_IN_SENTENCE)} for module_name, module in
+        [("go", Module.GO), ("expression", Module.EXPRESSION), ("disease", Module.DO_EXPERIMENTAL)]}
+
+
+def generate_descriptions(args, conf_parser: GenedescConfigParser, gene_profiler: Profiler):
+    """generate the descriptions of all the organisms to process
+
+    Args:
+        args: the command line arguments
+        conf_parser (GenedescConfigParser): the configuration object
+        gene_profiler (Profiler): profiler started for the generation of the description of each gene and stopped
+            before writing it
+    """
+    logger = logging.getLogger("WB Gene Description Pipeline")
+    if args.incremental and "json" not in args.output_formats:
+        logger.warning("Incremental mode requires the json output format, generating all the descriptions")
+        args.incremental = False
+    if args.incremental and (args.gene_ids or args.max_genes is not None):
+        logger.warning("Incremental mode is not available for a subset of genes, generating all the selected "
+                       "descriptions")
+        args.incremental = False
+    organisms_list = conf_parser.get_wb_organisms_to_process()
+    replay_store = ReplayStore(dir_path=os.path.join(conf_parser.get_cache_dir(), "replay"),
+                               mode=ReplayMode(args.replay_mode))
+    human_gene_table = HumanGeneTable(cache_path=os.path.join(conf_parser.get_cache_dir(), "hgnc", "human_genes.tsv"),
+                                      use_cache=args.use_cache, replay_store=replay_store)
+    human_genes_props = DataManager.get_human_gene_props(human_gene_table=human_gene_table)
+    ensembl_hgnc_ids_map = DataManager.get_ensembl_hgnc_ids_map(human_gene_table=human_gene_table)
+    api_manager = APIManager(textpresso_api_token=args.textpresso_token,
+                             cache_path=os.path.join(conf_parser.get_cache_dir(), "api_cache.sqlite") if
+                             args.use_cache else None,
+                             cache_ttl_days=args.api_cache_ttl, max_workers=args.api_max_workers,
+                             timeout=args.api_timeout, retries=args.api_retries, replay_store=replay_store)
+    array_ontology_cache_dir = os.path.join(conf_parser.get_cache_dir(), "array_ontologies") if \
+        args.array_ontologies else None
+    # ontologies are parsed once and shared by main species, sister species and AGR human data managers, and across
+    # organisms
+    ontology_registry = OntologyRegistry()
+    for organism in organisms_list:
+        logger.info("Processing organism " + organism)
+        # the profile of each organism is collected separately. Sister species and AGR human data are loaded, and
+        # timed, only for the first organism that uses them
+        instrumentation.reset()
+        species = conf_parser.get_wb_organisms_info()
+        with instrumentation.timer("pipeline.load_data"):
+            dm, sister_df, df_agr = load_data(organism=organism, conf_parser=conf_parser, use_cache=args.use_cache,
+                                              array_ontology_cache_dir=array_ontology_cache_dir,
+                                              ontology_registry=ontology_registry)
+        genes = select_genes(dm.get_gene_data(), gene_ids=args.gene_ids, max_genes=args.max_genes)
+        if args.gene_ids or args.max_genes is not None:
+            logger.info("Processing " + str(len(genes)) + " selected genes for " + organism)
+        with instrumentation.timer("pipeline.prefetch_api_data"):
+            prefetch_api_data(dm=dm, api_manager=api_manager, genes=genes)
+        desc_writer = StreamingDescriptionsWriter()
+        desc_writer.overall_properties.species = organism
+        desc_writer.overall_properties.release_version = conf_parser.get_wb_release()[0:-1] + str(
+            int(conf_parser.get_wb_release()[-1]) + 1)
+        desc_writer.overall_properties.date = datetime.date.today().strftime("%B %d, %Y")
+        date_prefix = datetime.date.today().strftime("%Y%m%d")
+        # descriptions of a subset of genes do not replace the complete files of the same day
+        out_file_prefix = os.path.join(conf_parser.get_out_dir(), date_prefix + "_" + organism + (
+            "_subset" if args.gene_ids or args.max_genes is not None else ""))
+        sister_best_orthologs = {}
+        if "main_sister_species" in species[organism] and species[organism]["main_sister_species"]:
+            sister_best_orthologs = dm.get_best_sister_species_orthologs(
+                sister_sp_fullname=dm.sister_sp_fullname, sister_species_data_fetcher=sister_df,
+                ecode_priority_list=SISTER_SPECIES_ECODE_PRIORITY_LIST)
+        fingerprinter = None
+        incremental_state = None
+        prev_incremental_state = None
+        prev_gene_descs = {}
+        dirty_gene_ids = set()
+        incremental_dir = os.path.join(conf_parser.get_cache_dir(), "incremental")
+        incremental_state_path = os.path.join(incremental_dir, organism + ".json")
+        if args.incremental:
+            fingerprinter = WBGeneFingerprinter(dm=dm, conf_parser=conf_parser, sister_df=sister_df, df_agr=df_agr,
+                                                sister_best_orthologs=sister_best_orthologs,
+                                                human_genes_props=human_genes_props,
+                                                ensembl_hgnc_ids_map=ensembl_hgnc_ids_map)
+            with instrumentation.timer("pipeline.load_previous_incremental_run"):
+                incremental_state, prev_incremental_state, prev_gene_descs, dirty_gene_ids = \
+                    load_previous_incremental_run(fingerprinter=fingerprinter,
+                                                  json_file_path=out_file_prefix + ".json",
+                                                  state_file_path=incremental_state_path,
+                                                  snapshots_dir=os.path.join(incremental_dir, "ontologies"))
+        num_reused_genes = 0
+        gene_tracer = GeneLatencyTracer(max_genes=args.slow_genes, enabled=args.slow_genes > 0)
+        logger.info("Writing descriptions to " + ", ".join(args.output_formats))
+        desc_writer.open_output_files(
+            json_file_path=out_file_prefix + ".json" if "json" in args.output_formats else None,
+            plain_text_file_path=out_file_prefix + ".txt" if "txt" in args.output_formats else None,
+            tsv_file_path=out_file_prefix + ".tsv" if "tsv" in args.output_formats else None,
+            ace_file_path=out_file_prefix + ".ace" if "ace" in args.output_formats else None,
+            curators_list=["WBPerson324", "WBPerson37462"], release_version=conf_parser.get_wb_release(),
+            pretty=not args.compact_json, include_single_gene_stats=True, data_manager=dm,
+            json_encoder_backend=JsonEncoderBackend(args.json_encoder))
+        with instrumentation.timer("pipeline.generate_descriptions"), desc_writer:
+            for gene in genes:
+                gene_fingerprint = None
+                if fingerprinter is not None:
+                    gene_fingerprint = fingerprinter.get_gene_fingerprint(gene)
+                    prev_gene_fingerprint, prev_stats_row = prev_incremental_state.get_gene(gene.id) if \
+                        prev_gene_descs else (None, None)
+                    if prev_gene_fingerprint == gene_fingerprint and gene.id in prev_gene_descs and \
+                            gene.id not in dirty_gene_ids:
+                        logger.debug("Copying unchanged description for gene " + gene.name)
+                        desc_writer.add_gene_desc_dict(prev_gene_descs[gene.id], stats_row=prev_stats_row)
+                        incremental_state.set_gene(gene.id, gene_fingerprint, prev_stats_row)
+                        num_reused_genes += 1
+                        instrumentation.increment("pipeline.reused_genes")
+                        continue
+                logger.debug("Generating description for gene " + gene.name)
+                gene_tracer.start_gene(gene.id, gene.name)
+                # the profiler is stopped also if the generation fails, so that its report can be written
+                with gene_profiler.profile():
+                    gene_desc = GeneDescription(gene_id=gene.id, gene_name=gene.name, add_gene_name=False)
+                    with gene_tracer.trace("orthology"):
+                        selected_orthologs = set_orthology_sentence(dm=dm, orth_fullnames=dm.orth_fullnames,
+                                                                    human_genes_props=human_genes_props,
+                                                                    gene_desc=gene_desc, api_manager=api_manager)
+                    with gene_tracer.trace("go"):
+                        set_gene_ontology_module(dm=dm, conf_parser=conf_parser, gene_desc=gene_desc, gene=gene)
+                    with gene_tracer.trace("expression"):
+                        set_tissue_expression_sentence(dm=dm, gene=gene, conf_parser=conf_parser, gene_desc=gene_desc)
+                    if not gene_desc.description:
+                        with gene_tracer.trace("expression_cluster"):
+                            set_expression_cluster_sentence(dm=dm, conf_parser=conf_parser, gene_desc=gene_desc,
+                                                            gene=gene, api_manager=api_manager)
+                    with gene_tracer.trace("disease"):
+                        set_disease_module(df=dm, conf_parser=conf_parser, gene=gene, gene_desc=gene_desc)
+                    if not gene_desc.go_description:
+                        with gene_tracer.trace("info_poor"):
+                            set_information_poor_sentence(orth_fullnames=dm.orth_fullnames,
+                                                          selected_orthologs=selected_orthologs,
+                                                          ensembl_hgnc_ids_map=ensembl_hgnc_ids_map,
+                                                          conf_parser=conf_parser, human_df_agr=df_agr,
+                                                          gene_desc=gene_desc, dm=dm, gene=gene)
+                    if gene.id in sister_best_orthologs:
+                        with gene_tracer.trace("sister_species"):
+                            set_sister_species_sentence(dm=dm, sister_sp_fullname=dm.sister_sp_fullname,
+                                                        sister_df=sister_df, species=species, organism=organism,
+                                                        gene_desc=gene_desc, conf_parser=conf_parser, gene=gene,
+                                                        best_ortholog=sister_best_orthologs[gene.id])
+                if gene_tracer.enabled:
+                    gene_tracer.end_gene(term_counts=get_gene_term_counts(gene_desc),
+                                         properties={"trimmed": gene_desc.stats.trimmed})
+                stats_row = desc_writer.add_gene_desc(gene_desc)
+                instrumentation.increment("pipeline.generated_genes")
+                if gene_desc.stats.trimmed:
+                    instrumentation.increment("pipeline.trimmed_genes")
+                if incremental_state is not None:
+                    incremental_state.set_gene(gene.id, gene_fingerprint, stats_row)
+        if incremental_state is not None:
+            incremental_state.save(incremental_state_path)
+            logger.info("Copied " + str(num_reused_genes) + " unchanged descriptions and generated " +
+                        str(len(incremental_state) - num_reused_genes) + " descriptions for " + organism)
+        logger.info("All genes processed for " + organism)
+        api_manager.http_session.log_metrics()
+        if instrumentation.enabled:
+            instrumentation.log_report(logging.getLogger("WB Gene Description Pipeline - Profile"))
+            instrumentation.write_report(out_file_prefix + "_profile.json", properties={
+                "organism": organism, "release_version": conf_parser.get_wb_release()})
+        if gene_tracer.enabled:
+            logger.info("Slowest genes for " + organism + ": " + ", ".join(
+                gene_data["gene_name"] + " (" + "{:.3f}".format(gene_data["total"]) + "s)" for gene_data in
+                gene_tracer.get_slowest_genes()[0:5]))
+            gene_tracer.write_report(out_file_prefix + "_slow_genes.json", properties={
+                "organism": organism, "trimming": get_trimming_config(conf_parser)})
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate gene descriptions for wormbase")
     parser.add_argument("-c", "--config-file", metavar="config_file", dest="config_file", type=str,
                         default="config.yml", help="configuration file. Default ./config.yaml")
     parser.add_argument("-C", "--use-cache", dest="use_cache", action="store_true", default=False,
                         help="Use cached source files from cache_location specified in config file. Download them from "
-                             "raw_file_source (configured in config file) if not yet cached")
+                             "raw_file_source (configured in config file) if not yet cached. Textpresso and WormBase "
+                             "API results are also stored in and read from the cache")
     parser.add_argument("-l", "--log-file", metavar="log_file", dest="log_file", type=str, default=None,
                         help="path to the log file to generate. Default ./genedescriptions.log")
     parser.add_argument("-L", "--log-level", dest="log_level", choices=['DEBUG', 'INFO', 'WARNING', 'ERROR',
@@ -221,68 +602,75 @@ def main():
     parser.add_argument("-o", "--output-formats", metavar="output_formats", dest="output_formats", type=str, nargs="+",
                         default=["ace", "txt", "json", "tsv"], help="file formats to generate. Accepted values "
                                                                     "are: ace, txt, json, tsv")
+    parser.add_argument("-j", "--compact-json", dest="compact_json", action="store_true", default=False,
+                        help="write the json file without indentation to reduce its size and encoding time")
+    parser.add_argument("-e", "--json-encoder", dest="json_encoder", type=str, default=JsonEncoderBackend.AUTO.value,
+                        choices=[backend.value for backend in JsonEncoderBackend],
+                        help="json encoder to use. Default auto, which uses the fastest installed encoder (orjson or "
+                             "ujson) for compact json and the standard library encoder for indented json")
+    parser.add_argument("-T", "--api-cache-ttl", dest="api_cache_ttl", type=float, default=30,
+                        help="number of days after which cached Textpresso and WormBase API results expire, when the "
+                             "cache is used. Default 30")
+    parser.add_argument("-w", "--api-max-workers", dest="api_max_workers", type=int, default=8,
+                        help="maximum number of concurrent requests to Textpresso and WormBase APIs. Default 8")
+    parser.add_argument("-O", "--api-timeout", dest="api_timeout", type=float, default=60,
+                        help="timeout in seconds for the responses of Textpresso and WormBase APIs. Default 60")
+    parser.add_argument("-r", "--api-retries", dest="api_retries", type=int, default=3,
+                        help="maximum number of retries, with exponential backoff, for failed API requests. Default 3")
+    parser.add_argument("-R", "--replay-mode", dest="replay_mode", type=str, default=ReplayMode.OFF.value,
+                        choices=[mode.value for mode in ReplayMode],
+                        help="'record' to save the responses of HGNC, Textpresso and WormBase services in the cache "
+                             "directory, 'replay' to read previously recorded responses without accessing the network. "
+                             "Default off")
+    parser.add_argument("-A", "--array-ontologies", dest="array_ontologies", action="store_true", default=False,
+                        help="load GO as a read-only array ontology saved in the cache directory and memory-mapped "
+                             "from there, so that it can be shared across data managers and processes. With -C, "
+                             "previously saved array ontologies are loaded without parsing GO again")
+    parser.add_argument("-I", "--incremental", dest="incremental", action="store_true", default=False,
+                        help="copy the descriptions of the genes whose input data did not change since the previous "
+                             "incremental run from its json file, and generate only the others. Fingerprints of the "
+                             "input data are saved in the cache directory. Requires the json output format")
+    parser.add_argument("-G", "--slow-genes", metavar="num_genes", dest="slow_genes", type=int, default=0,
+                        help="time each module of the description of every gene and write a report with the given "
+                             "number of slowest genes, their term counts and the trimming configuration, next to the "
+                             "output files. Default 0, disabled")
+    parser.add_argument("-M", "--metrics", dest="metrics", action="store_true", default=False,
+                        help="collect timers, counters and histograms of the main steps of the generation of the "
+                             "descriptions, log them and write them to a profile report for each organism, next to the "
+                             "output files")
+    parser.add_argument("-p", "--profiler", dest="profiler", type=str, default=ProfilerType.OFF.value,
+                        choices=[profiler_type.value for profiler_type in get_available_profiler_types()],
+                        help="profile the run with cProfile, writing a pstats file and a text summary, or with "
+                             "pyinstrument, if installed, writing an html report and a speedscope file. Profiles are "
+                             "written to the output directory. Default off")
+    parser.add_argument("-P", "--profile-scope", dest="profile_scope", type=str, default=ProfileScope.RUN.value,
+                        choices=[scope.value for scope in ProfileScope],
+                        help="'run' to profile the whole run, including data loading and writing, 'genes' to profile "
+                             "only the generation of the descriptions of the processed genes. Default run")
+    parser.add_argument("-n", "--max-genes", metavar="max_genes", dest="max_genes", type=int, default=None,
+                        help="process only the first max_genes genes of each organism. Output files are written with "
+                             "a _subset suffix")
+    parser.add_argument("-g", "--gene-ids", metavar="gene_ids", dest="gene_ids", type=str, nargs="+", default=None,
+                        help="process only the genes with the given ids, with or without WB prefix. Output files are "
+                             "written with a _subset suffix")
     args = parser.parse_args()
     conf_parser = GenedescConfigParser(args.config_file)
     logging.basicConfig(filename=args.log_file, level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s:'
                                                                              '%(message)s')
     logger = logging.getLogger("WB Gene Description Pipeline")
-    organisms_list = conf_parser.get_wb_organisms_to_process()
-    human_genes_props = DataManager.get_human_gene_props()
-    ensembl_hgnc_ids_map = DataManager.get_ensembl_hgnc_ids_map()
-    api_manager = APIManager(textpresso_api_token=args.textpresso_token)
-    for organism in organisms_list:
-        logger.info("Processing organism " + organism)
-        species = conf_parser.get_wb_organisms_info()
-        dm, sister_df, df_agr = load_data(organism=organism, conf_parser=conf_parser)
-        desc_writer = DescriptionsWriter()
-        desc_writer.overall_properties.species = organism
-        desc_writer.overall_properties.release_version = conf_parser.get_wb_release()[0:-1] + str(
-            int(conf_parser.get_wb_release()[-1]) + 1)
-        desc_writer.overall_properties.date = datetime.date.today().strftime("%B %d, %Y")
-        for gene in dm.get_gene_data():
-            logger.debug("Generating description for gene " + gene.name)
-            gene_desc = GeneDescription(gene_id=gene.id, gene_name=gene.name, add_gene_name=False)
-            selected_orthologs = set_orthology_sentence(dm=dm, orth_fullnames=dm.orth_fullnames,
-                                                        human_genes_props=human_genes_props, gene_desc=gene_desc,
-                                                        api_manager=api_manager)
-            set_gene_ontology_module(dm=dm, conf_parser=conf_parser, gene_desc=gene_desc, gene=gene)
-            set_tissue_expression_sentence(dm=dm, gene=gene, conf_parser=conf_parser, gene_desc=gene_desc)
-            if not gene_desc.description:
-                set_expression_cluster_sentence(dm=dm, conf_parser=conf_parser, gene_desc=gene_desc, gene=gene,
-                                                api_manager=api_manager)
-            set_disease_module(df=dm, conf_parser=conf_parser, gene=gene, gene_desc=gene_desc)
-            if not gene_desc.go_description:
-                set_information_poor_sentence(orth_fullnames=dm.orth_fullnames,
-                                              selected_orthologs=selected_orthologs,
-                                              ensembl_hgnc_ids_map=ensembl_hgnc_ids_map, conf_parser=conf_parser,
-                                              human_df_agr=df_agr, gene_desc=gene_desc, dm=dm, gene=gene)
-            if "main_sister_species" in species[organism] and species[organism]["main_sister_species"] and \
-                    dm.get_best_orthologs_for_gene(gene.id, orth_species_full_name=[dm.sister_sp_fullname],
-                                                   sister_species_data_fetcher=sister_df,
-                                                   ecode_priority_list=["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "HTP",
-                                                                        "HDA", "HMP", "HGI", "HEP"])[0]:
-                set_sister_species_sentence(dm=dm, sister_sp_fullname=dm.sister_sp_fullname, sister_df=sister_df,
-                                            species=species, organism=organism, gene_desc=gene_desc,
-                                            conf_parser=conf_parser, gene=gene)
-            desc_writer.add_gene_desc(gene_desc)
-        logger.info("All genes processed for " + organism)
-        date_prefix = datetime.date.today().strftime("%Y%m%d")
-        if "json" in args.output_formats:
-            logger.info("Writing descriptions to json")
-            desc_writer.write_json(os.path.join(conf_parser.get_out_dir(), date_prefix + "_" + organism + ".json"),
-                                   pretty=True, include_single_gene_stats=True, data_manager=dm)
-        if "txt" in args.output_formats:
-            logger.info("Writing descriptions to txt")
-            desc_writer.write_plain_text(os.path.join(conf_parser.get_out_dir(), date_prefix + "_" + organism + ".txt"))
-        if "tsv" in args.output_formats:
-            logger.info("Writing descriptions to tsv")
-            desc_writer.write_tsv(os.path.join(conf_parser.get_out_dir(), date_prefix + "_" + organism + ".tsv"))
-        if "ace" in args.output_formats:
-            logger.info("Writing descriptions to ace")
-            curators = ["WBPerson324", "WBPerson37462"]
-            release_version = conf_parser.get_wb_release()
-            desc_writer.write_ace(os.path.join(conf_parser.get_out_dir(), date_prefix + "_" + organism + ".ace"),
-                                  curators, release_version)
+    instrumentation.enabled = args.metrics
+    profiler = Profiler(ProfilerType(args.profiler))
+    profile_scope = ProfileScope(args.profile_scope)
+    try:
+        with profiler.profile(enabled=profile_scope == ProfileScope.RUN):
+            generate_descriptions(args=args, conf_parser=conf_parser,
+                                  gene_profiler=profiler if profile_scope == ProfileScope.GENES else Profiler())
+    finally:
+        # the profile of a failed run is written as well, since it may help to find the cause of the failure
+        if profiler.enabled:
+            profile_file_paths = profiler.write(os.path.join(conf_parser.get_out_dir(), datetime.date.today().strftime(
+                "%Y%m%d") + "_" + profile_scope.value + "_profile"))
+            logger.info("Profile written to " + ", ".join(profile_file_paths))
 
 
 if __name__ == '__main__':